@@ -1,3 +1,38 @@
 from django.contrib import admin
+from django.db import transaction
 
-# Register your models here.
+from .ledger import record_behaviors, refresh_students
+from .models import Behavior
+
+
+@admin.register(Behavior)
+class BehaviorAdmin(admin.ModelAdmin):
+    list_display = ('recorded_at', 'student', 'subject', 'classroom', 'behavior_type', 'points', 'recorded_by')
+    list_filter = ('behavior_type', 'subject')
+    search_fields = ('student__user__username', 'description', 'recorded_by')
+    list_select_related = ('student__user', 'subject', 'classroom')
+    raw_id_fields = ('student', 'teacher', 'classroom')
+    ordering = ('-recorded_at',)
+
+    # Admin change/delete views already run inside a transaction, so the
+    # points ledger is updated atomically with the edit.
+    def save_model(self, request, obj, form, change):
+        previous_student_id = form.initial.get('student') if change else None
+        if not change and obj.teacher_id is None:
+            obj.teacher = request.user
+        super().save_model(request, obj, form, change)
+        if change:
+            refresh_students([obj.student_id, previous_student_id])
+        else:
+            record_behaviors([obj])
+
+    def delete_model(self, request, obj):
+        student_id = obj.student_id
+        super().delete_model(request, obj)
+        refresh_students([student_id])
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            student_ids = set(queryset.values_list('student_id', flat=True))
+            super().delete_queryset(request, queryset)
+            refresh_students(student_ids)
@@ -0,0 +1,308 @@
+"""
+Aggregate behavior statistics for dashboards and charts.
+
+Charts read the daily rollups (BehaviorDailyRollup) rather than raw
+Behavior rows and answer with a single grouped query, so a chart over a
+term or a whole year reads one row per student and day, however many
+behaviors were recorded. Calendar boundaries use the school's timezone
+(settings.TIME_ZONE).
+"""
+import hashlib
+from datetime import datetime
+
+from django.core.cache import cache
+from django.db.models import Avg, Count, F, Q, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from .caching import get_generations
+from .models import Assignment, BehaviorDailyRollup, Student, StudentPointsSummary, StudentSubject
+
+DASHBOARD_TIMEOUT = 60 * 60
+CHARTS_TIMEOUT = 15 * 60
+
+# What each value of a class's teacher_charts() radar measures, in order
+RADAR_AXES = ['Behavior', 'Participation', 'Grades', 'Assignments Closed']
+
+# Students below this many points are flagged on the teacher dashboard
+ATTENTION_THRESHOLD = -3
+
+
+def month_start(value, months_back=0):
+    """Return midnight on the first of value's month (school time), shifted back a number of months."""
+    value = timezone.localtime(value, timezone.get_default_timezone())
+    index = value.year * 12 + value.month - 1 - months_back
+    return timezone.make_aware(datetime(index // 12, index % 12 + 1, 1))
+
+
+def recent_months_range(months=6, now=None):
+    """Return (start, end) covering the current calendar month and the months before it."""
+    now = now or timezone.now()
+    return month_start(now, months - 1), month_start(now, -1)
+
+
+def monthly_points(rollups, start, end):
+    """
+    Summarise the daily rollups (a BehaviorDailyRollup queryset) for the
+    school days in [start, end) by calendar month.
+
+    Returns one dict per month in the range, including months with no
+    behaviors, with 'month' (short name), 'start' (ISO date), 'positive'
+    and 'negative' point sums (negative as a magnitude), 'net', and
+    'positive_count'/'negative_count'.
+    """
+    rows = rollups.filter(
+        day__gte=_school_date(start), day__lt=_school_date(end)
+    ).annotate(
+        month=TruncMonth('day')
+    ).values('month').annotate(
+        positive=Sum('positive_points'),
+        negative=Sum('negative_points'),
+        positive_count=Sum('positive_count'),
+        negative_count=Sum('negative_count'),
+    ).order_by('month')
+    by_month = {row['month']: row for row in rows}
+
+    series = []
+    current = month_start(start)
+    while current < end:
+        row = by_month.get(current.date(), {})
+        positive = row.get('positive') or 0
+        negative = abs(row.get('negative') or 0)
+        series.append({
+            'month': current.strftime('%b'),
+            'start': current.date().isoformat(),
+            'positive': positive,
+            'negative': negative,
+            'net': positive - negative,
+            'positive_count': row.get('positive_count') or 0,
+            'negative_count': row.get('negative_count') or 0,
+        })
+        current = month_start(current, -1)
+    return series
+
+
+def teacher_charts(user, classrooms, months=10, now=None):
+    """
+    Return the per-class charts on a teacher's profile, as a dict with
+    'months' (short month names), 'trend' (classroom id -> behavior score
+    per month), 'radar' (classroom id -> one 0-100 value per RADAR_AXES
+    entry, None where a class has no data yet) and 'pending_assessments'.
+
+    Built in one pass of three grouped queries covering every classroom:
+    the daily rollups by subject and month, enrolment and average grade by
+    subject, and assignments by classroom. The result is cached per teacher
+    until a behavior, enrolment, grade or assignment changes one of their
+    classes, and for at most CHARTS_TIMEOUT as assignments fall due.
+    """
+    now = now or timezone.now()
+    classrooms = list(classrooms)
+    start, end = recent_months_range(months, now=now)
+    subject_ids = {classroom.subject_id for classroom in classrooms}
+    subject_generations = get_generations('subject', subject_ids)
+    classroom_generations = get_generations('classroom', [classroom.id for classroom in classrooms])
+    fingerprint = hashlib.md5(repr(sorted(
+        (classroom.id, classroom.subject_id, subject_generations[classroom.subject_id],
+         classroom_generations[classroom.id])
+        for classroom in classrooms
+    )).encode()).hexdigest()
+    cache_key = f'charts:teacher:{user.pk}:{fingerprint}:{_school_date(start)}:{months}'
+    charts = cache.get(cache_key)
+    if charts is None:
+        charts = _teacher_charts(classrooms, start, end, now)
+        cache.set(cache_key, charts, CHARTS_TIMEOUT)
+    return charts
+
+
+def _teacher_charts(classrooms, start, end, now):
+    subject_ids = {classroom.subject_id for classroom in classrooms}
+
+    month_starts = []
+    current = month_start(start)
+    while current < end:
+        month_starts.append(current)
+        current = month_start(current, -1)
+    monthly = {
+        (row['subject_id'], row['month']): row
+        for row in BehaviorDailyRollup.objects.filter(
+            subject_id__in=subject_ids, day__gte=_school_date(start), day__lt=_school_date(end),
+        ).annotate(month=TruncMonth('day')).values('subject_id', 'month').annotate(
+            net=Sum(F('positive_points') + F('negative_points')),
+            positive_count=Sum('positive_count'),
+            negative_count=Sum('negative_count'),
+        ).order_by()
+    }
+    enrolment = {
+        row['subject_id']: row
+        for row in StudentSubject.objects.filter(subject_id__in=subject_ids).values('subject_id').annotate(
+            students=Count('id'),
+            average_grade=Avg('grade'),
+        ).order_by()
+    }
+    assignments = {
+        row['classroom_id']: row
+        for row in Assignment.objects.filter(classroom__in=classrooms).values('classroom_id').annotate(
+            due=Count('id', filter=Q(due_date__lt=now)),
+            closed=Count('id', filter=Q(due_date__lt=now, is_active=False)),
+            pending=Count('id', filter=Q(due_date__gte=now, is_active=True)),
+        ).order_by()
+    }
+
+    trend = {}
+    radar = {}
+    for classroom in classrooms:
+        students = enrolment.get(classroom.subject_id, {}).get('students') or 0
+        months = [monthly.get((classroom.subject_id, month.date()), {}) for month in month_starts]
+        trend[classroom.id] = [
+            round(behavior_score(row.get('net', 0) / students if students else 0)) for row in months
+        ]
+
+        net = sum(row.get('net', 0) for row in months)
+        positive = sum(row.get('positive_count', 0) for row in months)
+        recorded = positive + sum(row.get('negative_count', 0) for row in months)
+        average_grade = enrolment.get(classroom.subject_id, {}).get('average_grade')
+        work = assignments.get(classroom.id, {})
+        radar[classroom.id] = [
+            round(behavior_score(net / students if students else 0)),
+            round(100 * positive / recorded) if recorded else None,
+            round(average_grade) if average_grade is not None else None,
+            round(100 * work['closed'] / work['due']) if work.get('due') else None,
+        ]
+
+    return {
+        'months': [month.strftime('%b') for month in month_starts],
+        'trend': trend,
+        'radar': radar,
+        'pending_assessments': sum(row['pending'] for row in assignments.values()),
+    }
+
+
+def _school_date(value):
+    return timezone.localtime(value, timezone.get_default_timezone()).date()
+
+
+def student_rank(student_id, subject_id=None):
+    """
+    Return (rank, cohort_size) for a student by points total, school-wide or
+    among the students enrolled in a subject (pass classroom.subject_id for
+    a classroom). Rank is the number of students with strictly more points
+    plus one, counted against the indexed points ledger; students without
+    any behaviors count as 0 points.
+    """
+    if subject_id is None:
+        cohort = Student.objects.all()
+        summaries = StudentPointsSummary.objects.all()
+    else:
+        cohort = StudentSubject.objects.filter(subject_id=subject_id).values('student_id').distinct()
+        summaries = StudentPointsSummary.objects.filter(
+            student_id__in=StudentSubject.objects.filter(subject_id=subject_id).values('student_id')
+        )
+
+    total = summaries.filter(student_id=student_id).values_list('total', flat=True).first() or 0
+    cohort_size = cohort.count()
+    if total >= 0:
+        ahead = summaries.filter(total__gt=total).count()
+    else:
+        # Everyone without a summary (0 points) is ahead too
+        ahead = cohort_size - summaries.filter(total__lte=total).count()
+    return ahead + 1, cohort_size
+
+
+def percentile_label(rank, cohort_size):
+    """Describe a rank as the 'Top 25%' / 'Middle 50%' / 'Bottom 25%' band students are shown."""
+    if not cohort_size or rank <= cohort_size * 0.25:
+        return 'Top 25%'
+    if rank <= cohort_size * 0.75:
+        return 'Middle 50%'
+    return 'Bottom 25%'
+
+
+def behavior_score(points):
+    """Map a points total (or class average) onto the dashboard's 0-100 behavior score."""
+    return min(100, max(0, 75 + points))
+
+
+def teacher_dashboard(user, classrooms, attention_limit=4):
+    """
+    Return the behavior summary shown on a teacher's dashboard for the given
+    classrooms: 'total_students', 'class_behavior_scores' (classroom name ->
+    score), 'average_behavior_score' and 'students_requiring_attention'.
+
+    Built from two grouped queries across every classroom at once and cached
+    per teacher until a behavior or enrolment changes one of their subjects.
+    """
+    classrooms = list(classrooms)
+    generations = get_generations('subject', {classroom.subject_id for classroom in classrooms})
+    fingerprint = hashlib.md5(repr(sorted(
+        (classroom.id, classroom.subject_id, generations[classroom.subject_id]) for classroom in classrooms
+    )).encode()).hexdigest()
+    cache_key = f'dashboard:teacher:{user.pk}:{fingerprint}:{attention_limit}'
+    summary = cache.get(cache_key)
+    if summary is None:
+        summary = _teacher_summary(classrooms, attention_limit)
+        cache.set(cache_key, summary, DASHBOARD_TIMEOUT)
+
+    # Names are resolved on every call so a renamed classroom never shows stale
+    names = {classroom.id: classroom.name for classroom in classrooms}
+    class_behavior_scores = {
+        names[classroom.id]: summary['scores'][classroom.id] for classroom in classrooms
+    }
+    return {
+        'total_students': summary['total_students'],
+        'class_behavior_scores': class_behavior_scores,
+        'average_behavior_score': round(
+            sum(class_behavior_scores.values()) / len(class_behavior_scores)
+        ) if class_behavior_scores else 85,
+        'students_requiring_attention': [
+            dict(student, **{'class': names[student['classroom_id']]})
+            for student in summary['attention']
+        ],
+    }
+
+
+def _teacher_summary(classrooms, attention_limit):
+    subject_ids = {classroom.subject_id for classroom in classrooms}
+    enrollments = StudentSubject.objects.filter(subject_id__in=subject_ids)
+
+    # Enrolment count and average points per subject
+    per_subject = {
+        row['subject_id']: row
+        for row in enrollments.values('subject_id').annotate(
+            students=Count('id'),
+            average=Avg(Coalesce('student__points_summary__total', 0)),
+        ).order_by()
+    }
+
+    scores = {}
+    total_students = 0
+    for classroom in classrooms:
+        row = per_subject.get(classroom.subject_id)
+        total_students += row['students'] if row else 0
+        scores[classroom.id] = round(behavior_score(row['average'])) if row else 85
+
+    # Lowest totals across all the teacher's subjects; a student appears once per classroom
+    classrooms_by_subject = {}
+    for classroom in classrooms:
+        classrooms_by_subject.setdefault(classroom.subject_id, []).append(classroom.id)
+    low_scorers = enrollments.filter(
+        student__points_summary__total__lt=ATTENTION_THRESHOLD
+    ).order_by('student__points_summary__total', 'student_id').values_list(
+        'subject_id', 'student_id', 'student__points_summary__total',
+        'student__user__first_name', 'student__user__last_name', 'student__user__username',
+    )[:attention_limit]
+    attention = []
+    for subject_id, student_id, points, first_name, last_name, username in low_scorers:
+        for classroom_id in classrooms_by_subject[subject_id]:
+            attention.append({
+                'id': student_id,
+                'name': f'{first_name} {last_name}'.strip() or username,
+                'classroom_id': classroom_id,
+                'behavior_score': behavior_score(points),
+                'points': points,
+            })
+
+    return {
+        'total_students': total_students,
+        'scores': scores,
+        'attention': attention[:attention_limit],
+    }
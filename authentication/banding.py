@@ -0,0 +1,89 @@
+"""
+Classroom banding: splits the students enrolled in a classroom's subject
+into green (top 50% by points), orange (next 25%) and red (bottom 25%).
+
+Bands are computed from the points ledger with a single aggregate query and
+cached per classroom until a behavior changes the totals of any student in
+that subject.
+"""
+from django.core.cache import cache
+
+from .caching import bump_generation, get_generation
+from .models import StudentSubject
+
+BANDS_TIMEOUT = 60 * 60
+
+
+def behavior_category(points, green_threshold, orange_threshold):
+    """Return the green/orange/red band for a points total."""
+    if points >= green_threshold:
+        return 'green'
+    if points >= orange_threshold:
+        return 'orange'
+    return 'red'
+
+
+def compute_thresholds(all_points):
+    """Return (green_threshold, orange_threshold) for a list of points totals."""
+    all_points = sorted(all_points, reverse=True)
+    total_students = len(all_points)
+
+    # Top 50%
+    green_threshold = all_points[int(total_students * 0.5) - 1] if total_students > 1 else 0
+
+    # Next 25%
+    orange_threshold = all_points[int(total_students * 0.75) - 1] if total_students > 3 else 0
+
+    # Bottom 25% is red
+    return green_threshold, orange_threshold
+
+
+def classroom_bands(classroom):
+    """
+    Return the bands for a classroom as a dict with 'green_threshold',
+    'orange_threshold', 'points' and 'categories' (both keyed by student id).
+    """
+    generation = get_generation('subject', classroom.subject_id)
+    cache_key = f'bands:classroom:{classroom.id}:{generation}'
+    bands = cache.get(cache_key)
+    if bands is None:
+        bands = _compute_bands(classroom.subject_id)
+        cache.set(cache_key, bands, BANDS_TIMEOUT)
+    return bands
+
+
+def student_category(bands, points):
+    """Return the band a points total falls in for an already computed set of bands."""
+    return behavior_category(points, bands['green_threshold'], bands['orange_threshold'])
+
+
+def invalidate_subjects(*subject_ids):
+    bump_generation('subject', *subject_ids)
+
+
+def invalidate_students(student_ids):
+    """Invalidate the bands of every subject these students are enrolled in."""
+    student_ids = [student_id for student_id in student_ids if student_id is not None]
+    if student_ids:
+        invalidate_subjects(*StudentSubject.objects.filter(
+            student_id__in=student_ids
+        ).values_list('subject_id', flat=True).distinct())
+
+
+def _compute_bands(subject_id):
+    points = {
+        student_id: total or 0
+        for student_id, total in StudentSubject.objects.filter(
+            subject_id=subject_id
+        ).values_list('student_id', 'student__points_summary__total')
+    }
+    green_threshold, orange_threshold = compute_thresholds(points.values())
+    return {
+        'green_threshold': green_threshold,
+        'orange_threshold': orange_threshold,
+        'points': points,
+        'categories': {
+            student_id: behavior_category(total, green_threshold, orange_threshold)
+            for student_id, total in points.items()
+        },
+    }
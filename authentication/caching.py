@@ -0,0 +1,54 @@
+"""
+Generations for invalidating cached, derived data.
+
+Cached values embed the current generation of whatever they were built from
+(e.g. a subject) in their cache key. Bumping the generation makes every
+older entry unreachable, so invalidation never has to know which keys exist.
+
+A generation is a random token, and bumping writes a new one rather than
+incrementing the old. Only a plain set is needed, which every cache
+backend does atomically, so concurrent bumps from several workers can
+never cancel out (an incr on the file-based cache is a get followed by a
+set, which can lose one of two bumps).
+"""
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+def _generation_key(scope, pk):
+    return f'generation:{scope}:{pk}'
+
+
+def _fresh_generation():
+    # Never repeats, so neither a bump nor an evicted generation can return to
+    # a value that older cache entries were built with.
+    return uuid.uuid4().hex
+
+
+def get_generations(scope, pks):
+    """Return {pk: generation} for every pk in the scope, creating missing ones."""
+    keys = {_generation_key(scope, pk): pk for pk in pks}
+    found = cache.get_many(keys)
+    missing = {key: _fresh_generation() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        found.update(missing)
+    return {pk: found[key] for key, pk in keys.items()}
+
+
+def get_generation(scope, pk):
+    return get_generations(scope, [pk])[pk]
+
+
+def bump_generation(scope, *pks):
+    """Invalidate everything cached under these pks once the current transaction commits."""
+    pks = {pk for pk in pks if pk is not None}
+    if not pks:
+        return
+
+    def bump():
+        cache.set_many({_generation_key(scope, pk): _fresh_generation() for pk in pks}, timeout=None)
+
+    transaction.on_commit(bump)
@@ -0,0 +1,132 @@
+"""
+Streaming export of behavior records as CSV or JSON lines.
+
+Rows come from a values_list projection read with .iterator(), so only
+one chunk of rows is in memory however many records match. Rows are
+ordered by id, and the id is the first column: to resume an interrupted
+export, pass the last id received as after_id.
+
+Under ASGI a StreamingHttpResponse must be fed an async iterator, or
+Django reads the whole body into memory first. aexport_rows() and
+astream_export() are the async versions: each chunk is fetched by id
+(keyset pagination) on the ORM's sync thread.
+"""
+import csv
+import itertools
+import json
+from datetime import datetime, time, timedelta
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+
+from .models import Behavior
+
+EXPORT_CHUNK_SIZE = 2000
+
+# (column name, Behavior lookup) in output order
+EXPORT_COLUMNS = [
+    ('id', 'id'),
+    ('recorded_at', 'recorded_at'),
+    ('student_id', 'student_id'),
+    ('username', 'student__user__username'),
+    ('first_name', 'student__user__first_name'),
+    ('last_name', 'student__user__last_name'),
+    ('subject_id', 'subject_id'),
+    ('subject', 'subject__name'),
+    ('classroom_id', 'classroom_id'),
+    ('teacher_id', 'teacher_id'),
+    ('behavior_type', 'behavior_type'),
+    ('points', 'points'),
+    ('description', 'description'),
+    ('recorded_by', 'recorded_by'),
+]
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+}
+
+
+def export_rows(subject_ids=None, start=None, end=None, after_id=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield behavior rows (tuples in EXPORT_COLUMNS order) by ascending id.
+
+    subject_ids limits the subjects (None for all); start and end are
+    dates, both inclusive, in the school's timezone; after_id skips
+    everything up to and including that id.
+    """
+    return _export_queryset(subject_ids, start, end, after_id).iterator(chunk_size=chunk_size)
+
+
+async def aexport_rows(subject_ids=None, start=None, end=None, after_id=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Async version of export_rows(), fetching one chunk of chunk_size rows per query."""
+    while True:
+        chunk = await _fetch_chunk(_export_queryset(subject_ids, start, end, after_id), chunk_size)
+        for row in chunk:
+            yield row
+        if len(chunk) < chunk_size:
+            return
+        after_id = chunk[-1][0]
+
+
+def stream_export(rows, export_format):
+    """Encode rows as lines of CSV (with a header) or JSON objects."""
+    header, encode = _encoder(export_format)
+    return itertools.chain(header, map(encode, rows))
+
+
+def astream_export(rows, export_format):
+    """Encode the async iterable rows like stream_export(), as an async iterator."""
+    header, encode = _encoder(export_format)
+    return _aencode(rows, header, encode)
+
+
+async def _aencode(rows, header, encode):
+    for line in header:
+        yield line
+    async for row in rows:
+        yield encode(row)
+
+
+def _export_queryset(subject_ids, start, end, after_id):
+    behaviors = Behavior.objects.all()
+    if subject_ids is not None:
+        behaviors = behaviors.filter(subject_id__in=subject_ids)
+    if start is not None:
+        behaviors = behaviors.filter(recorded_at__gte=_day_start(start))
+    if end is not None:
+        behaviors = behaviors.filter(recorded_at__lt=_day_start(end + timedelta(days=1)))
+    if after_id is not None:
+        behaviors = behaviors.filter(id__gt=after_id)
+    return behaviors.order_by('id').values_list(*(lookup for _, lookup in EXPORT_COLUMNS))
+
+
+@sync_to_async
+def _fetch_chunk(rows, chunk_size):
+    return list(rows[:chunk_size])
+
+
+def _encoder(export_format):
+    """Return (header lines, function encoding one row as a line) for the format."""
+    names = [name for name, _ in EXPORT_COLUMNS]
+    if export_format == 'csv':
+        writer = csv.writer(_Echo())
+        return [writer.writerow(names)], lambda row: writer.writerow(_plain(value) for value in row)
+    if export_format == 'jsonl':
+        return [], lambda row: json.dumps(dict(zip(names, (_plain(value) for value in row)))) + '\n'
+    raise ValueError(f'Unknown export format: {export_format}')
+
+
+class _Echo:
+    """File-like object whose write() returns the line, so csv.writer can feed a generator."""
+
+    def write(self, value):
+        return value
+
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
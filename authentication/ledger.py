@@ -0,0 +1,182 @@
+"""
+Maintenance of the per-student points ledger (StudentPointsSummary).
+
+Every code path that writes Behavior rows must call one of these helpers
+inside the same transaction as the write, so reading a student's total is
+a single indexed lookup instead of summing their whole history. They keep
+the daily rollups (authentication.rollups) in step as well.
+"""
+from django.db.models import (
+    Case, Count, DateTimeField, F, Max, OuterRef, Q, Subquery, Sum, TextField, Value, When,
+)
+from django.utils import timezone
+
+from . import rollups
+from .banding import invalidate_students
+from .models import Behavior, Student, StudentPointsSummary
+
+
+def record_behaviors(behaviors):
+    """
+    Apply newly created Behavior rows to their students' summaries.
+    Students receiving an identical change share a single UPDATE, so a
+    whole-class award costs one query rather than one per student.
+    """
+    deltas = {}
+    for behavior in behaviors:
+        delta = deltas.setdefault(behavior.student_id, [0, 0, 0, None])
+        delta[0] += behavior.points
+        if behavior.behavior_type == 'positive':
+            delta[1] += 1
+        elif behavior.behavior_type == 'negative':
+            delta[2] += 1
+        latest = delta[3]
+        if latest is None or (behavior.recorded_at, behavior.id or 0) >= (latest.recorded_at, latest.id or 0):
+            delta[3] = behavior
+
+    groups = {}
+    for student_id, (total, positive, negative, latest) in deltas.items():
+        key = (total, positive, negative, latest.recorded_at, latest.description)
+        groups.setdefault(key, []).append(student_id)
+
+    missing = []
+    now = timezone.now()
+    for (total, positive, negative, last_at, last_description), student_ids in groups.items():
+        is_newer = Q(last_behavior_at__isnull=True) | Q(last_behavior_at__lte=last_at)
+        updated = StudentPointsSummary.objects.filter(student_id__in=student_ids).update(
+            total=F('total') + total,
+            positive_count=F('positive_count') + positive,
+            negative_count=F('negative_count') + negative,
+            last_behavior_at=Case(
+                When(is_newer, then=Value(last_at)),
+                default=F('last_behavior_at'),
+                output_field=DateTimeField(),
+            ),
+            last_description=Case(
+                When(is_newer, then=Value(last_description)),
+                default=F('last_description'),
+                output_field=TextField(),
+            ),
+            updated_at=now,
+        )
+        if updated < len(student_ids):
+            missing.extend(student_ids)
+
+    refreshed = set()
+    if missing:
+        # First behavior for these students (or a summary was never built):
+        # recompute from the raw rows, which already include this write.
+        existing = set(StudentPointsSummary.objects.filter(
+            student_id__in=missing
+        ).values_list('student_id', flat=True))
+        refreshed = {sid for sid in missing if sid not in existing}
+        refresh_students(refreshed)
+
+    rollups.record([behavior for behavior in behaviors if behavior.student_id not in refreshed])
+    # Cached classroom bands depend on these totals
+    invalidate_students(deltas)
+
+
+def refresh_students(student_ids):
+    """Recompute the summaries and daily rollups of the given students from their Behavior rows."""
+    student_ids = [sid for sid in set(student_ids) if sid is not None]
+    if not student_ids:
+        return 0
+    rollups.refresh(student_ids)
+
+    summaries = [
+        StudentPointsSummary(student_id=row['id'], **{
+            field: row[field] if row[field] is not None else default
+            for field, default in (
+                ('total', 0), ('positive_count', 0), ('negative_count', 0),
+                ('last_behavior_at', None), ('last_description', ''),
+            )
+        })
+        for row in _computed_rows(student_ids)
+    ]
+    StudentPointsSummary.objects.bulk_create(
+        summaries,
+        update_conflicts=True,
+        unique_fields=['student'],
+        update_fields=['total', 'positive_count', 'negative_count',
+                       'last_behavior_at', 'last_description', 'updated_at'],
+    )
+    invalidate_students(student_ids)
+    return len(summaries)
+
+
+def rebuild_all(chunk_size=1000):
+    """Rebuild every student's summary, processing students in chunks."""
+    rebuilt = 0
+    for chunk in _student_id_chunks(chunk_size):
+        rebuilt += refresh_students(chunk)
+    return rebuilt
+
+
+def find_drift(chunk_size=1000):
+    """Return the ids of students whose stored summary differs from their Behavior rows."""
+    fields = ('total', 'positive_count', 'negative_count', 'last_behavior_at')
+    drifted = []
+    for chunk in _student_id_chunks(chunk_size):
+        stored = {
+            row['student_id']: row
+            for row in StudentPointsSummary.objects.filter(student_id__in=chunk).values('student_id', *fields)
+        }
+        for row in _computed_rows(chunk):
+            summary = stored.get(row['id'])
+            expected = {
+                'total': row['total'] or 0,
+                'positive_count': row['positive_count'] or 0,
+                'negative_count': row['negative_count'] or 0,
+                'last_behavior_at': row['last_behavior_at'],
+            }
+            if summary is None:
+                if expected['positive_count'] or expected['negative_count'] or expected['total']:
+                    drifted.append(row['id'])
+            elif any(summary[field] != expected[field] for field in fields):
+                drifted.append(row['id'])
+    return drifted
+
+
+def totals_for(student_ids):
+    """Map each student id to its current points total (0 when it has no behaviors)."""
+    student_ids = list(student_ids)
+    totals = dict.fromkeys(student_ids, 0)
+    if student_ids:
+        totals.update(StudentPointsSummary.objects.filter(
+            student_id__in=student_ids
+        ).values_list('student_id', 'total'))
+    return totals
+
+
+async def atotals_for(student_ids):
+    """totals_for() for async views."""
+    student_ids = list(student_ids)
+    totals = dict.fromkeys(student_ids, 0)
+    if student_ids:
+        summaries = StudentPointsSummary.objects.filter(student_id__in=student_ids).values_list('student_id', 'total')
+        async for student_id, total in summaries:
+            totals[student_id] = total
+    return totals
+
+
+def _computed_rows(student_ids):
+    latest = Behavior.objects.filter(student_id=OuterRef('pk')).order_by('-recorded_at', '-id')
+    return Student.objects.filter(id__in=student_ids).annotate(
+        total=Sum('behaviors__points'),
+        positive_count=Count('behaviors', filter=Q(behaviors__behavior_type='positive')),
+        negative_count=Count('behaviors', filter=Q(behaviors__behavior_type='negative')),
+        last_behavior_at=Max('behaviors__recorded_at'),
+        last_description=Subquery(latest.values('description')[:1]),
+    ).values('id', 'total', 'positive_count', 'negative_count', 'last_behavior_at', 'last_description')
+
+
+def _student_id_chunks(chunk_size):
+    chunk = []
+    for student_id in Student.objects.order_by('id').values_list('id', flat=True).iterator(chunk_size=chunk_size):
+        chunk.append(student_id)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
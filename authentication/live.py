@@ -0,0 +1,194 @@
+"""
+Live seating plan updates pushed to open pages over server-sent events.
+
+Views publish small deltas (points changed, student moved, student
+unassigned) to a per-classroom channel once their transaction commits.
+The in-process Broadcaster hands each event to every subscribed stream,
+so this needs the site served through backend/asgi.py; with several
+worker processes each one only reaches its own subscribers.
+
+Events are only built when someone is listening, so publishing costs
+nothing on a classroom nobody has open.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+
+from django.db import transaction
+
+from .banding import classroom_bands, student_category
+from .ledger import totals_for
+from .models import ClassRoom
+from .seating import build_seating_context, serialize_seating
+
+# Events a slow subscriber may have queued before it is asked to resync
+SUBSCRIBER_BACKLOG = 100
+
+# Seconds between keep-alive comments on an idle stream
+HEARTBEAT_INTERVAL = 15
+
+
+class Subscription:
+    def __init__(self, channel, loop):
+        self.channel = channel
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_BACKLOG)
+
+    def deliver(self, event):
+        # Runs on the subscriber's event loop
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too far behind for deltas to make sense; drop them and ask for a full redraw
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({'type': 'resync'})
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class Broadcaster:
+    """Thread-safe fan-out of events from (sync) views to (async) event streams."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def subscribe(self, channel, loop=None):
+        subscription = Subscription(channel, loop or asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.channel]
+
+    def has_subscribers(self, channel=None):
+        """Whether anyone listens on the channel (or on any channel when it is None)."""
+        with self._lock:
+            if channel is None:
+                return bool(self._subscriptions)
+            return bool(self._subscriptions.get(channel))
+
+    def publish(self, channel, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # The subscriber's loop has closed; its stream is going away
+                self.unsubscribe(subscription)
+
+
+broadcaster = Broadcaster()
+
+
+def classroom_channel(classroom_id):
+    return f'classroom:{classroom_id}'
+
+
+def format_event(event):
+    """Encode an event as a server-sent events message."""
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def event_stream(classroom_id):
+    """Yield server-sent events for a classroom until the client disconnects."""
+    subscription = broadcaster.subscribe(classroom_channel(classroom_id))
+    try:
+        yield 'retry: 3000\n\n'
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            yield format_event(event)
+    finally:
+        broadcaster.unsubscribe(subscription)
+
+
+def _publish_on_commit(classroom_id, build_event):
+    """After commit, build and publish an event if anyone has the classroom open."""
+    def publish():
+        channel = classroom_channel(classroom_id)
+        if broadcaster.has_subscribers(channel):
+            broadcaster.publish(channel, build_event())
+
+    transaction.on_commit(publish)
+
+
+def _listened_classrooms(queryset):
+    return [
+        classroom for classroom in queryset
+        if broadcaster.has_subscribers(classroom_channel(classroom.id))
+    ]
+
+
+def publish_points(student_ids, description=''):
+    """Push new totals and bands for these students to every classroom they are enrolled in."""
+    student_ids = list(student_ids)
+
+    def publish():
+        if not broadcaster.has_subscribers():
+            return
+        classrooms = _listened_classrooms(ClassRoom.objects.filter(
+            subject__studentsubject__student_id__in=student_ids
+        ).distinct())
+        if not classrooms:
+            return
+        totals = totals_for(student_ids)
+        for classroom in classrooms:
+            bands = classroom_bands(classroom)
+            broadcaster.publish(classroom_channel(classroom.id), {
+                'type': 'points',
+                'students': [
+                    {
+                        'student_id': student_id,
+                        'total_points': total,
+                        'category': student_category(bands, total),
+                    }
+                    for student_id, total in totals.items() if student_id in bands['points']
+                ],
+                'description': description,
+                'green_threshold': bands['green_threshold'],
+                'orange_threshold': bands['orange_threshold'],
+            })
+
+    transaction.on_commit(publish)
+
+
+def publish_seat(classroom_id, seating_plan_id, student, row, column):
+    """Push a student taking a seat; `student` is a seating.student_payload() dict."""
+    _publish_on_commit(classroom_id, lambda: {
+        'type': 'seat',
+        'seating_plan_id': seating_plan_id,
+        'student': student,
+        'row': row,
+        'column': column,
+    })
+
+
+def publish_unassign(classroom_id, seating_plan_id, student):
+    """Push a student leaving their seat for the unassigned list."""
+    _publish_on_commit(classroom_id, lambda: {
+        'type': 'unassign',
+        'seating_plan_id': seating_plan_id,
+        'student': student,
+    })
+
+
+def publish_seating(classroom):
+    """Push a whole new seat map, e.g. after randomizing or restoring a plan."""
+    _publish_on_commit(classroom.id, lambda: {
+        'type': 'seating',
+        'seating': serialize_seating(classroom, build_seating_context(classroom)),
+    })
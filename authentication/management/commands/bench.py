@@ -0,0 +1,172 @@
+import json
+import logging
+import platform
+import statistics
+import time
+import tracemalloc
+
+import django
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from authentication.management.stats import percentile
+from authentication.models import ClassRoom, SeatingPlan, StudentSubject
+from authentication.synthetic import build_school
+
+
+class Command(BaseCommand):
+    help = (
+        'Builds a deterministic synthetic school in a throwaway test database and reports '
+        'median/p95 latency, query count and peak memory for the main views as JSON. '
+        'Full scale example: --teachers 50 --students 5000 --behaviors 2000000'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--teachers', type=int, default=10)
+        parser.add_argument('--students', type=int, default=1000)
+        parser.add_argument('--behaviors', type=int, default=100000)
+        parser.add_argument('--saved-plans', type=int, default=2, help='Saved seating plans per classroom')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--iterations', type=int, default=20, help='Timed requests per view')
+        parser.add_argument('--cold', action='store_true', help='Clear the cache before every request')
+        parser.add_argument('--keepdb', action='store_true', help='Keep (and reuse) the benchmark database')
+        parser.add_argument('--output', default='bench.json', help='Where to write the JSON report')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1')
+
+        verbosity = options['verbosity']
+        # One log line per benchmarked request would drown the report
+        logging.getLogger('authentication.requests').setLevel(logging.WARNING)
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options['keepdb'],
+        )
+        try:
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                report = self.run_benchmarks(options, verbosity)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+
+        with open(options['output'], 'w') as output:
+            json.dump(report, output, indent=2, sort_keys=True)
+
+        self.stdout.write(f"{'view':<26}{'median ms':>11}{'p95 ms':>10}{'queries':>9}{'peak KiB':>10}")
+        for name, result in report['views'].items():
+            self.stdout.write(
+                f"{name:<26}{result['median_ms']:>11.1f}{result['p95_ms']:>10.1f}"
+                f"{result['queries']:>9}{result['peak_memory_kib']:>10.0f}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+    def run_benchmarks(self, options, verbosity):
+        prefix = f"bench{options['seed']}_"
+        if not (options['keepdb'] and ClassRoom.objects.filter(teacher__username=f'{prefix}teacher1').exists()):
+            started = time.perf_counter()
+            school = build_school(
+                teachers=options['teachers'], students=options['students'], behaviors=options['behaviors'],
+                saved_plans=options['saved_plans'], seed=options['seed'], prefix=prefix,
+                log=self.stdout.write if verbosity > 1 else None,
+            )
+            self.stdout.write(f'Built synthetic school in {time.perf_counter() - started:.1f}s: {school}')
+
+        classroom = ClassRoom.objects.filter(teacher__username=f'{prefix}teacher1').order_by('id').first()
+        student_id = StudentSubject.objects.filter(
+            subject_id=classroom.subject_id
+        ).order_by('student_id').values_list('student_id', flat=True).first()
+        teacher = classroom.teacher
+        student_user = teacher.__class__.objects.get(student__id=student_id)
+
+        teacher_client = Client()
+        teacher_client.force_login(teacher)
+        student_client = Client()
+        student_client.force_login(student_user)
+
+        def post_json(name, payload):
+            return teacher_client.post(reverse(name), json.dumps(payload), content_type='application/json')
+
+        scenarios = {
+            'seating_plan': lambda: teacher_client.get(reverse('seatingPlan'), {'classroom': classroom.id}),
+            'teacher_profile': lambda: teacher_client.get(reverse('teacher_profile')),
+            'student_behavior_history': lambda: student_client.get(reverse('student_behavior_history')),
+            'get_student_profile': lambda: teacher_client.get(
+                reverse('get_student_profile'), {'student_id': student_id}
+            ),
+            'award_points': lambda: teacher_client.post(reverse('award_points'), {
+                'student_id': student_id, 'classroom_id': classroom.id, 'points': 1, 'reason': 'Benchmark',
+            }),
+            'randomize_seating': lambda: post_json('randomize_seating', {'classroom_id': classroom.id}),
+            'save_seating_plan': lambda: post_json('save_seating_plan', {
+                'classroom_id': classroom.id, 'plan_name': 'Benchmark snapshot',
+            }),
+        }
+
+        views = {}
+        for name, request in scenarios.items():
+            views[name] = self.measure(name, request, options['iterations'], options['cold'])
+            if verbosity > 1:
+                self.stdout.write(f'{name}: {views[name]}')
+
+        # Saved snapshots pile up during the run; drop them so --keepdb reruns start equal
+        SeatingPlan.objects.filter(name='Benchmark snapshot').delete()
+
+        return {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'django': django.get_version(),
+                'python': platform.python_version(),
+                'database': connection.vendor,
+                'scale': {key: options[key] for key in ('teachers', 'students', 'behaviors', 'saved_plans', 'seed')},
+                'iterations': options['iterations'],
+                'cold_cache': options['cold'],
+            },
+            'views': views,
+        }
+
+    def measure(self, name, request, iterations, cold):
+        # Warm up once so imports and first-hit caches don't skew a warm run
+        cache.clear()
+        self.check_response(name, request())
+
+        timings = []
+        query_counts = []
+        for _ in range(iterations):
+            if cold:
+                cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = request()
+                timings.append((time.perf_counter() - started) * 1000)
+            self.check_response(name, response)
+            query_counts.append(len(queries))
+
+        # Measure memory separately so tracing overhead doesn't inflate the timings
+        if cold:
+            cache.clear()
+        tracemalloc.start()
+        try:
+            request()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'median_ms': round(statistics.median(timings), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'min_ms': round(min(timings), 3),
+            'max_ms': round(max(timings), 3),
+            'queries': round(statistics.median(query_counts)),
+            'max_queries': max(query_counts),
+            'peak_memory_kib': round(peak / 1024, 1),
+        }
+
+    def check_response(self, name, response):
+        if response.status_code != 200:
+            raise CommandError(f'{name} returned HTTP {response.status_code}')
+        if response.get('Content-Type', '').startswith('application/json') and response.json().get('success') is False:
+            raise CommandError(f"{name} failed: {response.json().get('error')}")
@@ -0,0 +1,177 @@
+import asyncio
+import itertools
+import json
+import logging
+import platform
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from authentication.management.stats import percentile
+from authentication.models import ClassRoom, StudentSubject
+from authentication.synthetic import build_school
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares concurrent-request throughput of the JSON seating endpoints (award, deduct, student '
+        'profile) served by sync views through the WSGI handler, with one thread per concurrent '
+        'request, and by the async views through the ASGI handler, with one coroutine per concurrent '
+        'request, against a throwaway synthetic school. The sync views are the baseline in '
+        'authentication/management/sync_views.py. Requests are made in process, so server and '
+        'network overhead are not included.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--teachers', type=int, default=4)
+        parser.add_argument('--students', type=int, default=400)
+        parser.add_argument('--behaviors', type=int, default=20000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--requests', type=int, default=300, help='Requests per handler and concurrency level')
+        parser.add_argument(
+            '--concurrency', type=int, nargs='+', default=[1, 8, 32], help='Concurrent requests in flight',
+        )
+        parser.add_argument('--keepdb', action='store_true', help='Keep (and reuse) the benchmark database')
+        parser.add_argument('--output', default='bench_concurrency.json', help='Where to write the JSON report')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or min(options['concurrency']) < 1:
+            raise CommandError('--requests and --concurrency must be at least 1')
+
+        logging.getLogger('authentication.requests').setLevel(logging.WARNING)
+        if connection.vendor == 'sqlite' and not connection.settings_dict['TEST']['NAME']:
+            # Worker threads need their own connections, which an in-memory database can't give them
+            connection.settings_dict['TEST']['NAME'] = 'bench_concurrency.sqlite3'
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options['keepdb'],
+        )
+        try:
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                report = self.run_benchmarks(options)
+        finally:
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+
+        with open(options['output'], 'w') as output:
+            json.dump(report, output, indent=2, sort_keys=True)
+
+        self.stdout.write(f"{'handler':<8}{'concurrency':>12}{'req/s':>9}{'median ms':>11}{'p95 ms':>9}{'errors':>8}")
+        for run in report['runs']:
+            self.stdout.write(
+                f"{run['handler']:<8}{run['concurrency']:>12}{run['requests_per_s']:>9.1f}"
+                f"{run['median_ms']:>11.1f}{run['p95_ms']:>9.1f}{run['errors']:>8}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+    def run_benchmarks(self, options):
+        prefix = f"bench{options['seed']}_"
+        if not (options['keepdb'] and ClassRoom.objects.filter(teacher__username=f'{prefix}teacher1').exists()):
+            started = time.perf_counter()
+            school = build_school(
+                teachers=options['teachers'], students=options['students'], behaviors=options['behaviors'],
+                seed=options['seed'], prefix=prefix,
+            )
+            self.stdout.write(f'Built synthetic school in {time.perf_counter() - started:.1f}s: {school}')
+
+        classroom = ClassRoom.objects.filter(teacher__username=f'{prefix}teacher1').order_by('id').first()
+        self.teacher = classroom.teacher
+        student_ids = list(StudentSubject.objects.filter(
+            subject_id=classroom.subject_id
+        ).order_by('student_id').values_list('student_id', flat=True))
+        # Spread the writes over the class so requests don't all queue on one student's ledger row
+        requests = list(itertools.islice(zip(
+            itertools.cycle(['get_student_profile', 'award_points', 'deduct_points']),
+            itertools.cycle(student_ids),
+        ), options['requests']))
+        self.classroom_id = classroom.id
+
+        runs = []
+        for concurrency in options['concurrency']:
+            for handler, run in (('wsgi', self.run_wsgi), ('asgi', self.run_asgi)):
+                elapsed, timings, errors = run(requests, concurrency)
+                runs.append({
+                    'handler': handler,
+                    'concurrency': concurrency,
+                    'requests': len(requests),
+                    'elapsed_s': round(elapsed, 3),
+                    'requests_per_s': round(len(requests) / elapsed, 1),
+                    'median_ms': round(statistics.median(timings), 3),
+                    'p95_ms': round(percentile(timings, 95), 3),
+                    'errors': errors,
+                })
+                self.stdout.write(f'{handler} x{concurrency}: {runs[-1]}')
+
+        return {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'django': django.get_version(),
+                'python': platform.python_version(),
+                'database': connection.vendor,
+                'scale': {key: options[key] for key in ('teachers', 'students', 'behaviors', 'seed')},
+                'views': {'wsgi': 'sync (authentication.management.sync_views)', 'asgi': 'async'},
+            },
+            'runs': runs,
+        }
+
+    def request_args(self, name, student_id):
+        if name == 'get_student_profile':
+            return 'get', reverse(name), {'student_id': student_id}
+        return 'post', reverse(name), {
+            'student_id': student_id, 'classroom_id': self.classroom_id, 'points': 1, 'reason': 'Benchmark',
+        }
+
+    def run_wsgi(self, requests, concurrency):
+        local = threading.local()
+
+        def send(request):
+            if not hasattr(local, 'client'):
+                local.client = Client()
+                local.client.force_login(self.teacher)
+            method, path, data = self.request_args(*request)
+            started = time.perf_counter()
+            response = getattr(local.client, method)(path, data)
+            return (time.perf_counter() - started) * 1000, _failed(response)
+
+        started = time.perf_counter()
+        with override_settings(ROOT_URLCONF='authentication.management.sync_views'), \
+                ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(send, requests))
+        elapsed = time.perf_counter() - started
+        return elapsed, [ms for ms, _ in results], sum(failed for _, failed in results)
+
+    def run_asgi(self, requests, concurrency):
+        async def run():
+            client = AsyncClient()
+            await client.aforce_login(self.teacher)
+            slots = asyncio.Semaphore(concurrency)
+
+            async def send(request):
+                method, path, data = self.request_args(*request)
+                async with slots:
+                    started = time.perf_counter()
+                    response = await getattr(client, method)(path, data)
+                    return (time.perf_counter() - started) * 1000, _failed(response)
+
+            started = time.perf_counter()
+            results = await asyncio.gather(*(send(request) for request in requests))
+            elapsed = time.perf_counter() - started
+            await sync_to_async(connections.close_all)()
+            return elapsed, [ms for ms, _ in results], sum(failed for _, failed in results)
+
+        return asyncio.run(run())
+
+
+def _failed(response):
+    if response.status_code != 200:
+        return True
+    return response.json().get('success') is False
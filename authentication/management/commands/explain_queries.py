@@ -0,0 +1,105 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Avg, Count, F, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from authentication.analytics import recent_months_range
+from authentication.models import (
+    Behavior, BehaviorDailyRollup, ClassRoom, SeatAssignment, SeatingPlan, Student, StudentPointsSummary,
+    StudentSubject,
+)
+
+# SQLite reports "SCAN <table>" for a full table scan (index scans say USING ... INDEX),
+# PostgreSQL reports "Seq Scan on <table>"
+FULL_SCAN = re.compile(r'\bSCAN (?!.*\bUSING\b.*\bINDEX\b)|Seq Scan on')
+
+
+class Command(BaseCommand):
+    help = 'Prints the query plan for each hot view query and flags full table scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--classroom', type=int, help='Classroom id to plan seating queries for (default: first)')
+        parser.add_argument('--student', type=int, help='Student id to plan history queries for (default: first)')
+        parser.add_argument('--fail-on-scan', action='store_true', help='Exit with an error if any full scan remains')
+
+    def handle(self, *args, **options):
+        classroom = ClassRoom.objects.order_by('id')
+        if options['classroom']:
+            classroom = classroom.filter(id=options['classroom'])
+        classroom = classroom.first()
+        student_id = options['student'] or Student.objects.order_by('id').values_list('id', flat=True).first()
+        if classroom is None or student_id is None:
+            raise CommandError('Need at least one classroom and one student to plan queries against')
+
+        scans = []
+        for name, queryset in self.hot_queries(classroom, student_id):
+            plan = queryset.explain()
+            flagged = [line for line in plan.splitlines() if FULL_SCAN.search(line)]
+            if flagged:
+                scans.append(name)
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            for line in plan.splitlines():
+                self.stdout.write(self.style.WARNING(line) if line in flagged else line)
+            self.stdout.write('')
+
+        if not scans:
+            self.stdout.write(self.style.SUCCESS(f'No full table scans on {connection.vendor}'))
+        elif options['fail_on_scan']:
+            raise CommandError(f'Full table scans in: {", ".join(scans)}')
+        else:
+            self.stdout.write(self.style.WARNING(f'Full table scans in: {", ".join(scans)}'))
+
+    def hot_queries(self, classroom, student_id):
+        """(name, queryset) pairs mirroring the queries the busiest views run."""
+        plan_id = SeatingPlan.objects.filter(
+            classroom=classroom, is_active=True
+        ).values_list('id', flat=True).first() or 0
+        enrolled = StudentSubject.objects.filter(subject_id=classroom.subject_id)
+        behaviors = Behavior.objects.filter(student_id=student_id)
+        chart_start, chart_end = recent_months_range(6)
+        school_tz = timezone.get_default_timezone()
+        chart_days = {
+            'day__gte': timezone.localdate(chart_start, school_tz),
+            'day__lt': timezone.localdate(chart_end, school_tz),
+        }
+
+        return [
+            ('seating: enrolled students', enrolled.select_related('student__user')),
+            ('seating: active plan', SeatingPlan.objects.filter(classroom=classroom, is_active=True)),
+            ('seating: seat assignments', SeatAssignment.objects.filter(
+                seating_plan_id=plan_id
+            ).select_related('student__user')),
+            ('seating: seat lookup', SeatAssignment.objects.filter(seating_plan_id=plan_id, row=0, column=0)),
+            ('seating: points summaries', StudentPointsSummary.objects.filter(
+                student_id__in=enrolled.values('student_id')
+            ).values_list('student_id', 'total', 'last_description')),
+            ('banding: subject totals', enrolled.values_list('student_id', 'student__points_summary__total')),
+            ('history: recent behaviors', behaviors.select_related('subject').order_by('-recorded_at')),
+            ('history: behaviors by type', behaviors.filter(behavior_type='negative').order_by('-recorded_at')),
+            ('history: monthly chart', BehaviorDailyRollup.objects.filter(
+                student_id=student_id, **chart_days
+            ).annotate(month=TruncMonth('day')).values('month').annotate(
+                positive=Sum('positive_points'),
+                negative=Sum('negative_points'),
+            ).order_by('month')),
+            ('history: rank', StudentPointsSummary.objects.filter(total__gt=0)),
+            ('dashboard: subject averages', enrolled.values('subject_id').annotate(
+                students=Count('id'),
+                average=Avg(Coalesce('student__points_summary__total', 0)),
+            ).order_by()),
+            ('dashboard: monthly subject trend', BehaviorDailyRollup.objects.filter(
+                subject_id__in=[classroom.subject_id], **chart_days
+            ).annotate(month=TruncMonth('day')).values('subject_id', 'month').annotate(
+                net=Sum(F('positive_points') + F('negative_points')),
+                positive_count=Sum('positive_count'),
+            ).order_by()),
+            ('graph: points by student', BehaviorDailyRollup.objects.filter(
+                subject_id=classroom.subject_id, **chart_days
+            ).values('student_id', 'student__user__username').annotate(
+                positive=Sum('positive_points'),
+                negative=Sum('negative_points'),
+            ).order_by('student__user__last_name', 'student_id')),
+        ]
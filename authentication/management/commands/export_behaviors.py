@@ -0,0 +1,47 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from authentication.exports import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, export_rows, stream_export
+from authentication.models import ClassRoom
+
+
+class Command(BaseCommand):
+    help = (
+        'Streams behavior records as CSV or JSON lines with constant memory. '
+        'Rows are ordered by id; rerun with --after-id <last id written> to resume.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--subject', type=int, action='append', help='Subject id (repeatable)')
+        parser.add_argument('--classroom', type=int, action='append', help='Classroom id (repeatable)')
+        parser.add_argument('--start', type=date.fromisoformat, help='First day to include (YYYY-MM-DD)')
+        parser.add_argument('--end', type=date.fromisoformat, help='Last day to include (YYYY-MM-DD)')
+        parser.add_argument('--after-id', type=int, help='Only export records with a greater id')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE, help='Rows fetched per database round trip')
+        parser.add_argument('--output', help='File to write (default: stdout)')
+
+    def handle(self, *args, **options):
+        subject_ids = set(options['subject'] or [])
+        if options['classroom']:
+            classrooms = dict(ClassRoom.objects.filter(
+                id__in=options['classroom']
+            ).values_list('id', 'subject_id'))
+            missing = set(options['classroom']) - set(classrooms)
+            if missing:
+                raise CommandError(f'Unknown classroom ids: {", ".join(map(str, sorted(missing)))}')
+            subject_ids.update(classrooms.values())
+
+        rows = export_rows(
+            subject_ids or None, options['start'], options['end'], options['after_id'],
+            chunk_size=options['chunk_size'],
+        )
+        lines = stream_export(rows, options['format'])
+        if options['output']:
+            with open(options['output'], 'w', newline='') as output:
+                output.writelines(lines)
+            self.stderr.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
@@ -0,0 +1,53 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from authentication.roster import ROSTER_BATCH_SIZE, import_roster
+
+
+class Command(BaseCommand):
+    help = (
+        'Imports (or updates) students, subjects and enrolments from a roster CSV with columns '
+        'username, first_name, last_name, email, subject, grade, teacher (only username is required)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', help='Roster CSV with a header row')
+        parser.add_argument('--batch-size', type=int, default=ROSTER_BATCH_SIZE, help='Rows written per transaction')
+        parser.add_argument('--password', help='Initial password for new users (default: unusable, set via reset)')
+        parser.add_argument('--dry-run', action='store_true', help='Only validate the roster')
+
+    def handle(self, *args, **options):
+        try:
+            roster = open(options['csv_file'], newline='', encoding='utf-8-sig')
+        except OSError as e:
+            raise CommandError(f'Cannot read {options["csv_file"]}: {e}')
+
+        with roster:
+            reader = csv.DictReader(roster)
+            try:
+                report = import_roster(
+                    reader, reader.fieldnames or [], batch_size=options['batch_size'],
+                    password=options['password'], dry_run=options['dry_run'],
+                )
+            except ValueError as e:
+                raise CommandError(str(e))
+
+        for line_number, error in report.errors[:50]:
+            self.stderr.write(self.style.WARNING(f'Line {line_number}: {error}'))
+        if len(report.errors) > 50:
+            self.stderr.write(self.style.WARNING(f'... and {len(report.errors) - 50} more invalid rows'))
+
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {report.imported} of {report.rows} rows in {report.elapsed:.2f}s '
+            f'({report.rows_per_second:,.0f} rows/s, {report.batches} batches)'
+        ))
+        if not options['dry_run']:
+            self.stdout.write(
+                f'Users: {report.users_created} created, {report.users_updated} updated; '
+                f'students created: {report.students_created}; subjects created: {report.subjects_created}; '
+                f'enrolments upserted: {report.enrollments}'
+            )
+        if report.errors:
+            raise CommandError(f'{len(report.errors)} invalid rows were skipped')
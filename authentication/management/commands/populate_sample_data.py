@@ -1,8 +1,11 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth.models import User, Group
 from django.db import transaction
+from authentication.ledger import refresh_students
 from authentication.models import Student, Subject, StudentSubject, Behavior, ClassRoom, SeatingPlan, SeatAssignment
+from authentication.synthetic import build_school
 import random
+import time
 from datetime import datetime, timedelta
 import string
 
@@ -15,8 +18,19 @@ class Command(BaseCommand):
         parser.add_argument('--subjects', type=int, default=5, help='Number of subjects to create')
         parser.add_argument('--classrooms', type=int, default=4, help='Number of classrooms to create')
         parser.add_argument('--behaviors', type=int, default=100, help='Number of behavior records to create')
+        parser.add_argument('--bulk', action='store_true',
+                            help='Create everything with batched bulk inserts (for load testing at large scale)')
+        parser.add_argument('--subjects-per-student', type=int, default=4, help='Enrollments per student (--bulk only)')
+        parser.add_argument('--history-days', type=int, default=365,
+                            help='Days of behavior history to spread records over (--bulk only)')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed (--bulk only)')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per insert (--bulk only)')
+        parser.add_argument('--prefix', default='bulk_', help='Username prefix, e.g. bulk_teacher1 (--bulk only)')
 
     def handle(self, *args, **options):
+        if options['bulk']:
+            return self._handle_bulk(options)
+
         num_teachers = options['teachers']
         num_students = options['students']
         num_subjects = options['subjects']
@@ -55,6 +69,7 @@ class Command(BaseCommand):
             
             # Create behavior records
             self._create_behaviors(num_behaviors, students, subjects, teachers)
+            refresh_students([student.id for student in students])
 
         self.stdout.write(self.style.SUCCESS('Successfully populated sample data!'))
         self.stdout.write(self.style.SUCCESS(f'Created {num_teachers} teachers, {num_students} students, {num_subjects} subjects, {num_classrooms} classrooms'))
@@ -62,6 +77,39 @@ class Command(BaseCommand):
         self.stdout.write(self.style.SUCCESS('Teacher logins: teacher1/password123, teacher2/password123, etc.'))
         self.stdout.write(self.style.SUCCESS('Student logins: student1/password123, student2/password123, etc.'))
 
+    def _handle_bulk(self, options):
+        # Bulk mode inserts without checking for existing rows, so refuse to collide with them
+        prefix = options['prefix']
+        if User.objects.filter(username__in=[f'{prefix}teacher1', f'{prefix}student1']).exists():
+            raise CommandError(f'Users prefixed {prefix!r} already exist; pass a different --prefix')
+
+        started = time.perf_counter()
+        try:
+            created = build_school(
+                teachers=options['teachers'],
+                students=options['students'],
+                behaviors=options['behaviors'],
+                classrooms=options['classrooms'],
+                subjects=options['subjects'],
+                subjects_per_student=options['subjects_per_student'],
+                history_days=options['history_days'],
+                seed=options['seed'],
+                prefix=prefix,
+                batch_size=options['batch_size'],
+                log=self.stdout.write,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(f'Successfully populated sample data in {elapsed:.1f}s!'))
+        self.stdout.write(self.style.SUCCESS(', '.join(f'{count} {name}' for name, count in created.items())))
+        self.stdout.write(self.style.SUCCESS(
+            f"{(created['behaviors'] + created['enrolments'] + created['seat_assignments']) / elapsed:,.0f} rows/s"
+        ))
+        self.stdout.write(self.style.SUCCESS(f'Teacher logins: {prefix}teacher1/password123, {prefix}teacher2/password123, etc.'))
+        self.stdout.write(self.style.SUCCESS(f'Student logins: {prefix}student1/password123, {prefix}student2/password123, etc.'))
+
     def _create_teachers(self, num_teachers, teacher_group):
         teachers = []
         for i in range(1, num_teachers + 1):
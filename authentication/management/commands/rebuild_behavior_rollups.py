@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from authentication.rollups import find_drift, rebuild_all, refresh
+
+
+class Command(BaseCommand):
+    help = 'Backfills, repairs or verifies the daily behavior rollups from the raw Behavior rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true', help='Only report students whose rollups have drifted')
+        parser.add_argument('--repair', action='store_true', help='Rebuild only the students whose rollups have drifted')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Number of students processed per query')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+
+        if options['verify'] or options['repair']:
+            drifted = find_drift(chunk_size=chunk_size)
+            if not drifted:
+                self.stdout.write(self.style.SUCCESS('All daily rollups match their behavior records'))
+                return
+            if options['verify']:
+                preview = ', '.join(str(student_id) for student_id in drifted[:20])
+                raise CommandError(f'{len(drifted)} students have drifted rollups (ids: {preview})')
+            for start in range(0, len(drifted), chunk_size):
+                with transaction.atomic():
+                    refresh(drifted[start:start + chunk_size])
+            self.stdout.write(self.style.SUCCESS(f'Repaired daily rollups for {len(drifted)} students'))
+            return
+
+        rebuilt = rebuild_all(chunk_size=chunk_size)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rebuilt} daily rollups'))
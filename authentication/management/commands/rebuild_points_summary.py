@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from authentication.ledger import find_drift, rebuild_all
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds (or verifies) the per-student points summary from the raw Behavior rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true', help='Only report students whose summary has drifted')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Number of students processed per query')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+
+        if options['verify']:
+            drifted = find_drift(chunk_size=chunk_size)
+            if drifted:
+                preview = ', '.join(str(student_id) for student_id in drifted[:20])
+                raise CommandError(f'{len(drifted)} student summaries have drifted (ids: {preview})')
+            self.stdout.write(self.style.SUCCESS('All student points summaries match their behavior records'))
+            return
+
+        with transaction.atomic():
+            rebuilt = rebuild_all(chunk_size=chunk_size)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt points summaries for {rebuilt} students'))
@@ -0,0 +1,7 @@
+"""Summary statistics shared by the benchmark commands."""
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, round(percent / 100 * len(ordered)) - 1))]
@@ -0,0 +1,134 @@
+"""
+Sync baseline of the async seating endpoints, for bench_concurrency.
+
+award_points, deduct_points and get_student_profile (authentication/views.py)
+are async views. Served through the WSGI handler they still run on
+async_to_sync, so a WSGI run of them says nothing about the sync views they
+replaced. These are the same endpoints written against the sync ORM, one
+blocking query after another, as they were before. Pointing ROOT_URLCONF
+at this module routes their URLs here and leaves every other URL as is.
+
+Not part of the site; keep the responses in step with the async views so
+the benchmark compares like with like.
+"""
+import logging
+
+from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.http import JsonResponse
+from django.urls import path
+from django.views.decorators.http import require_POST
+
+from backend.urls import urlpatterns as site_urlpatterns
+
+from ..banding import classroom_bands, student_category
+from ..ledger import record_behaviors, totals_for
+from ..live import publish_points
+from ..models import Behavior, ClassRoom, Student
+
+logger = logging.getLogger(__name__)
+
+
+def _record_behavior(**fields):
+    with transaction.atomic():
+        behavior = Behavior.objects.create(**fields)
+        record_behaviors([behavior])
+        publish_points([behavior.student_id], behavior.description)
+    return behavior
+
+
+@login_required
+@require_POST
+def award_points(request):
+    try:
+        points = int(request.POST.get('points', 1))
+        reason = request.POST.get('reason')
+        if reason == 'Other' and request.POST.get('custom_reason'):
+            reason = request.POST['custom_reason']
+
+        student = Student.objects.select_related('user').get(id=request.POST.get('student_id'))
+        classroom = ClassRoom.objects.get(id=request.POST.get('classroom_id'))
+        behavior = _record_behavior(
+            student=student, subject_id=classroom.subject_id, classroom=classroom, teacher=request.user,
+            behavior_type='positive', description=reason, points=points,
+            recorded_by=request.user.get_full_name() or request.user.username,
+        )
+
+        total_points = totals_for([student.id])[student.id]
+        bands = classroom_bands(classroom)
+        return JsonResponse({
+            'success': True,
+            'message': f'Awarded {points} points to {student.user.get_full_name()}',
+            'behavior_id': behavior.id,
+            'total_points': total_points,
+            'category': student_category(bands, total_points),
+            'green_threshold': bands['green_threshold'],
+            'orange_threshold': bands['orange_threshold'],
+        })
+    except Exception as e:
+        logger.error(f"Error awarding points: {str(e)}")
+        return JsonResponse({'success': False, 'error': str(e)})
+
+
+@login_required
+@require_POST
+def deduct_points(request):
+    try:
+        points = -abs(int(request.POST.get('points', 0)))
+        reason = request.POST.get('custom_reason', request.POST.get('reason', 'Unspecified'))
+
+        student = Student.objects.select_related('user').get(id=request.POST.get('student_id'))
+        classroom = ClassRoom.objects.filter(id=request.POST.get('classroom_id') or None).first()
+        _record_behavior(
+            student=student, subject_id=classroom.subject_id if classroom else None, classroom=classroom,
+            teacher=request.user, behavior_type='negative', description=reason, points=points,
+            recorded_by=request.user.get_full_name() or request.user.username,
+        )
+
+        total_points = totals_for([student.id])[student.id]
+        response = {
+            'success': True,
+            'message': f'Deducted {abs(points)} points from {student.user.get_full_name() or student.user.username}',
+            'total_points': total_points,
+        }
+        if classroom:
+            bands = classroom_bands(classroom)
+            response.update({
+                'category': student_category(bands, total_points),
+                'green_threshold': bands['green_threshold'],
+                'orange_threshold': bands['orange_threshold'],
+            })
+        return JsonResponse(response)
+    except Exception as e:
+        logger.error(f"Error deducting points: {str(e)}")
+        return JsonResponse({'success': False, 'error': str(e)})
+
+
+@login_required
+def get_student_profile(request):
+    try:
+        student = Student.objects.get(id=request.GET.get('student_id'))
+        behaviors = Behavior.objects.filter(student=student).order_by('-recorded_at')[:10]
+        return JsonResponse({
+            'success': True,
+            'total_points': totals_for([student.id])[student.id],
+            'activities': [
+                {
+                    'points': behavior.points,
+                    'description': behavior.description,
+                    'date': behavior.recorded_at.strftime('%b %d, %Y %I:%M %p'),
+                }
+                for behavior in behaviors
+            ],
+        })
+    except Exception as e:
+        logger.error(f"Error getting student profile: {str(e)}")
+        return JsonResponse({'success': False, 'error': str(e)})
+
+
+# Same paths and names as authentication/urls.py, matched before the site's own
+urlpatterns = [
+    path('award-points/', award_points, name='award_points'),
+    path('deduct-points/', deduct_points, name='deduct_points'),
+    path('get-student-profile/', get_student_profile, name='get_student_profile'),
+] + site_urlpatterns
@@ -0,0 +1,140 @@
+"""
+Per-request middleware.
+
+RoleMiddleware exposes the user's cached roles as request.roles (see
+roles.py).
+
+RequestMetricsMiddleware counts the SQL queries a request runs and how
+long they take, adds the numbers to a Server-Timing header (visible in
+the browser's network panel), and logs one JSON line per request to the
+'authentication.requests' logger.
+
+settings.QUERY_BUDGETS maps URL names to the most queries that view may
+run. Going over logs a warning, or raises QueryBudgetExceeded when
+settings.QUERY_BUDGET_STRICT is on (it is under `manage.py test`), so an
+N+1 regression fails the suite instead of reaching a classroom.
+"""
+import json
+import logging
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.utils.functional import SimpleLazyObject
+
+from .roles import get_roles
+
+logger = logging.getLogger('authentication.requests')
+
+
+class RoleMiddleware:
+    """Sets request.roles, resolved lazily so requests that never check a role pay nothing."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        # Async views must not touch request.roles; resolving it may query the database
+        request.roles = SimpleLazyObject(lambda: get_roles(request))
+        return self.get_response(request)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryCounter:
+    """Database execute wrapper that counts queries and the time spent in them."""
+
+    def __init__(self):
+        self.queries = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.queries += 1
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        counter = QueryCounter()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            self.wrap_connections(stack, counter)
+            response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - started, counter)
+        return response
+
+    async def __acall__(self, request):
+        # Under ASGI every ORM call of a request, from sync views and from
+        # async views alike, runs on the request's thread-sensitive worker
+        # thread, so the counter is installed on that thread's connections
+        counter = QueryCounter()
+        stack = ExitStack()
+        await sync_to_async(self.wrap_connections)(stack, counter)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            elapsed = time.perf_counter() - started
+            await sync_to_async(stack.close)()
+        self.record(request, response, elapsed, counter)
+        return response
+
+    def wrap_connections(self, stack, counter):
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(counter))
+
+    def record(self, request, response, elapsed, counter):
+        match = request.resolver_match
+        view = match.view_name if match else None
+        size = None if response.streaming else len(response.content)
+
+        metrics = [f'total;dur={elapsed * 1000:.1f}']
+        if counter is not None:
+            metrics += [
+                f'db;dur={counter.duration * 1000:.1f};desc="{counter.queries} queries"',
+                f'app;dur={(elapsed - counter.duration) * 1000:.1f}',
+            ]
+        response['Server-Timing'] = ', '.join(metrics)
+
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': view,
+            'status': response.status_code,
+            'queries': counter.queries if counter else None,
+            'db_ms': round(counter.duration * 1000, 1) if counter else None,
+            'python_ms': round((elapsed - counter.duration) * 1000, 1) if counter else None,
+            'total_ms': round(elapsed * 1000, 1),
+            'bytes': size,
+        }))
+
+        budget = getattr(settings, 'QUERY_BUDGETS', {}).get(view)
+        if counter is not None and budget is not None and counter.queries > budget:
+            message = f'{view} ran {counter.queries} queries, over its budget of {budget} ({request.method} {request.path})'
+            if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
@@ -0,0 +1,77 @@
+# Generated by Django 5.1.5 on 2026-10-18 17:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Q, Sum
+
+
+def backfill_points_summary(apps, schema_editor):
+    Behavior = apps.get_model('authentication', 'Behavior')
+    StudentPointsSummary = apps.get_model('authentication', 'StudentPointsSummary')
+
+    rows = Behavior.objects.values('student_id').annotate(
+        total=Sum('points'),
+        positive_count=Count('id', filter=Q(behavior_type='positive')),
+        negative_count=Count('id', filter=Q(behavior_type='negative')),
+        last_behavior_at=Max('recorded_at'),
+    )
+    summaries = []
+    for row in rows:
+        latest = Behavior.objects.filter(student_id=row['student_id']).order_by('-recorded_at', '-id').first()
+        summaries.append(StudentPointsSummary(
+            student_id=row['student_id'],
+            total=row['total'] or 0,
+            positive_count=row['positive_count'],
+            negative_count=row['negative_count'],
+            last_behavior_at=row['last_behavior_at'],
+            last_description=latest.description if latest else '',
+        ))
+    StudentPointsSummary.objects.bulk_create(summaries, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_populate_initial_data'),
+        ('authentication', '0005_teacher'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Assignment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True)),
+                ('points_possible', models.IntegerField(default=100)),
+                ('due_date', models.DateTimeField()),
+                ('is_active', models.BooleanField(default=True)),
+                ('classroom', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assignments', to='authentication.classroom')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BehaviorRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('points', models.IntegerField()),
+                ('description', models.TextField()),
+                ('recorded_at', models.DateTimeField(auto_now_add=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='behavior_records', to='authentication.student')),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='authentication.teacher')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StudentPointsSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total', models.IntegerField(default=0)),
+                ('positive_count', models.IntegerField(default=0)),
+                ('negative_count', models.IntegerField(default=0)),
+                ('last_behavior_at', models.DateTimeField(blank=True, null=True)),
+                ('last_description', models.TextField(blank=True, default='')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='points_summary', to='authentication.student')),
+            ],
+        ),
+        migrations.RunPython(backfill_points_summary, migrations.RunPython.noop),
+    ]
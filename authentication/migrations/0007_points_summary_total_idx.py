@@ -0,0 +1,17 @@
+# Generated by Django 5.1.5 on 2026-10-18 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0006_studentpointssummary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='studentpointssummary',
+            index=models.Index(fields=['total'], name='points_summary_total_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.1.5 on 2026-10-18 17:43
+
+from django.db import migrations, models
+
+
+def deactivate_duplicate_active_plans(apps, schema_editor):
+    """Keep only the most recently updated active plan per classroom."""
+    SeatingPlan = apps.get_model('authentication', 'SeatingPlan')
+    seen = set()
+    duplicates = []
+    for plan_id, classroom_id in SeatingPlan.objects.filter(is_active=True).order_by(
+        'classroom_id', '-updated_at', '-id'
+    ).values_list('id', 'classroom_id'):
+        if classroom_id in seen:
+            duplicates.append(plan_id)
+        seen.add(classroom_id)
+    SeatingPlan.objects.filter(id__in=duplicates).update(is_active=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0007_points_summary_total_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='behavior',
+            index=models.Index(fields=['student', '-recorded_at'], name='behavior_student_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='behavior',
+            index=models.Index(fields=['student', 'behavior_type'], name='behavior_student_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='behavior',
+            index=models.Index(fields=['subject', 'recorded_at'], name='behavior_subject_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='seatassignment',
+            index=models.Index(fields=['seating_plan', 'row', 'column'], name='seatassignment_position_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='seatingplan',
+            index=models.Index(fields=['classroom', 'is_active'], name='seatingplan_classroom_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentsubject',
+            index=models.Index(fields=['subject', 'student'], name='studentsubject_subject_idx'),
+        ),
+        migrations.RunPython(deactivate_duplicate_active_plans, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='seatingplan',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('classroom',), name='one_active_plan_per_classroom'),
+        ),
+    ]
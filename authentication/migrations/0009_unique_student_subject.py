@@ -0,0 +1,32 @@
+# Generated by Django 5.1.5 on 2026-10-18 18:40
+
+from django.db import migrations, models
+
+
+def remove_duplicate_enrollments(apps, schema_editor):
+    """Keep the earliest enrolment per student and subject."""
+    StudentSubject = apps.get_model('authentication', 'StudentSubject')
+    seen = set()
+    duplicates = []
+    for enrollment_id, student_id, subject_id in StudentSubject.objects.order_by(
+        'student_id', 'subject_id', 'id'
+    ).values_list('id', 'student_id', 'subject_id'):
+        if (student_id, subject_id) in seen:
+            duplicates.append(enrollment_id)
+        seen.add((student_id, subject_id))
+    StudentSubject.objects.filter(id__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0008_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_enrollments, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='studentsubject',
+            constraint=models.UniqueConstraint(fields=('student', 'subject'), name='unique_student_subject'),
+        ),
+    ]
@@ -0,0 +1,145 @@
+# Generated by Django 5.1.5 on 2026-10-18 19:10
+
+import authentication.models
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Q, Sum
+
+BATCH_SIZE = 1000
+
+
+def _display_name(user):
+    return f'{user.first_name} {user.last_name}'.strip() or user.username
+
+
+def backfill_legacy_behaviors(apps, schema_editor):
+    """
+    Copy BehaviorRecord and behaviorpoints.BehaviorPoint rows into Behavior,
+    keeping their timestamps, then rebuild the points summaries of every
+    student they belong to.
+    """
+    Behavior = apps.get_model('authentication', 'Behavior')
+    BehaviorRecord = apps.get_model('authentication', 'BehaviorRecord')
+    BehaviorPoint = apps.get_model('behaviorpoints', 'BehaviorPoint')
+    ClassRoom = apps.get_model('authentication', 'ClassRoom')
+    Student = apps.get_model('authentication', 'Student')
+
+    touched = set()
+    pending = []
+
+    def flush():
+        # recorded_at is auto_now_add, so insert first and then restore the original times
+        created = Behavior.objects.bulk_create([behavior for behavior, _ in pending])
+        for behavior, (_, recorded_at) in zip(created, pending):
+            behavior.recorded_at = recorded_at
+        Behavior.objects.bulk_update(created, ['recorded_at'])
+        touched.update(behavior.student_id for behavior in created)
+        pending.clear()
+
+    def add(behavior, recorded_at):
+        behavior.behavior_type = 'positive' if behavior.points >= 0 else 'negative'
+        pending.append((behavior, recorded_at))
+        if len(pending) >= BATCH_SIZE:
+            flush()
+
+    for record in BehaviorRecord.objects.select_related('teacher__user').order_by('id').iterator():
+        add(Behavior(
+            student_id=record.student_id,
+            teacher_id=record.teacher.user_id,
+            description=record.description,
+            points=record.points,
+            recorded_by=_display_name(record.teacher.user),
+        ), record.recorded_at)
+
+    # BehaviorPoint keyed students by User and classrooms by name
+    students = dict(Student.objects.values_list('user_id', 'id'))
+    classrooms = {}
+    for classroom in ClassRoom.objects.order_by('-id'):
+        classrooms[classroom.name, classroom.teacher_id] = classroom
+        classrooms[classroom.name, None] = classroom
+    for point in BehaviorPoint.objects.select_related('teacher').order_by('id').iterator():
+        if point.student_id not in students:
+            students[point.student_id] = Student.objects.create(user_id=point.student_id).id
+        classroom = classrooms.get((point.classroom, point.teacher_id)) or classrooms.get((point.classroom, None))
+        add(Behavior(
+            student_id=students[point.student_id],
+            subject_id=classroom.subject_id if classroom else None,
+            classroom_id=classroom.id if classroom else None,
+            teacher_id=point.teacher_id,
+            description=point.reason,
+            points=point.points,
+            recorded_by=_display_name(point.teacher),
+        ), point.timestamp)
+
+    if pending:
+        flush()
+    _refresh_summaries(apps, sorted(touched))
+
+
+def _refresh_summaries(apps, student_ids):
+    Behavior = apps.get_model('authentication', 'Behavior')
+    StudentPointsSummary = apps.get_model('authentication', 'StudentPointsSummary')
+    for start in range(0, len(student_ids), BATCH_SIZE):
+        chunk = student_ids[start:start + BATCH_SIZE]
+        rows = Behavior.objects.filter(student_id__in=chunk).values('student_id').annotate(
+            total=Sum('points'),
+            positive_count=Count('id', filter=Q(behavior_type='positive')),
+            negative_count=Count('id', filter=Q(behavior_type='negative')),
+            last_behavior_at=Max('recorded_at'),
+        ).order_by()
+        for row in rows:
+            student_id = row.pop('student_id')
+            row['last_description'] = Behavior.objects.filter(student_id=student_id).order_by(
+                '-recorded_at', '-id'
+            ).values_list('description', flat=True).first() or ''
+            StudentPointsSummary.objects.update_or_create(student_id=student_id, defaults=row)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0009_unique_student_subject'),
+        ('behaviorpoints', '0002_alter_behaviorpoint_student_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='behavior',
+            name='classroom',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='behaviors', to='authentication.classroom'),
+        ),
+        migrations.AddField(
+            model_name='behavior',
+            name='teacher',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='recorded_behaviors', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='behavior',
+            index=models.Index(fields=['classroom', 'recorded_at'], name='behavior_classroom_recent_idx'),
+        ),
+        migrations.RunPython(backfill_legacy_behaviors, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='behaviorrecord',
+            name='student',
+        ),
+        migrations.RemoveField(
+            model_name='behaviorrecord',
+            name='teacher',
+        ),
+        migrations.DeleteModel(
+            name='BehaviorRecord',
+        ),
+        migrations.CreateModel(
+            name='BehaviorRecord',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=(authentication.models.LegacyBehaviorMixin, 'authentication.behavior'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.1.5 on 2026-10-18 18:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def backfill_daily_rollups(apps, schema_editor):
+    Behavior = apps.get_model('authentication', 'Behavior')
+    BehaviorDailyRollup = apps.get_model('authentication', 'BehaviorDailyRollup')
+
+    student_ids = list(Behavior.objects.order_by('student_id').values_list('student_id', flat=True).distinct())
+    for start in range(0, len(student_ids), 1000):
+        rows = Behavior.objects.filter(student_id__in=student_ids[start:start + 1000]).annotate(
+            day=TruncDate('recorded_at', tzinfo=timezone.get_default_timezone()),
+        ).values('student_id', 'subject_id', 'day').annotate(
+            positive_points=Sum('points', filter=Q(behavior_type='positive'), default=0),
+            negative_points=Sum('points', filter=Q(behavior_type='negative'), default=0),
+            positive_count=Count('id', filter=Q(behavior_type='positive')),
+            negative_count=Count('id', filter=Q(behavior_type='negative')),
+        ).order_by()
+        BehaviorDailyRollup.objects.bulk_create([BehaviorDailyRollup(**row) for row in rows], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0010_behavior_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BehaviorDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('positive_points', models.IntegerField(default=0)),
+                ('negative_points', models.IntegerField(default=0)),
+                ('positive_count', models.IntegerField(default=0)),
+                ('negative_count', models.IntegerField(default=0)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='authentication.student')),
+                ('subject', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='authentication.subject')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['subject', 'day'], name='rollup_subject_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('student', 'subject', 'day'), name='unique_student_subject_day')],
+            },
+        ),
+        migrations.RunPython(backfill_daily_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.5 on 2026-10-18 18:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0011_behavior_daily_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='behavior',
+            name='client_id',
+            field=models.UUIDField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='behavior',
+            constraint=models.UniqueConstraint(condition=models.Q(('client_id__isnull', False)), fields=('client_id',), name='unique_behavior_client_id'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.5 on 2026-10-18 18:46
+
+from django.db import migrations, models
+from django.db.models import Count
+
+ROLLUP_FIELDS = ('positive_points', 'negative_points', 'positive_count', 'negative_count')
+
+
+def merge_duplicate_rollups(apps, schema_editor):
+    """Fold subject-less rollups of the same student and day into one row."""
+    BehaviorDailyRollup = apps.get_model('authentication', 'BehaviorDailyRollup')
+    duplicates = BehaviorDailyRollup.objects.filter(subject__isnull=True).values(
+        'student_id', 'day'
+    ).annotate(rows=Count('id')).filter(rows__gt=1).order_by()
+    for duplicate in duplicates:
+        keep, *extra = BehaviorDailyRollup.objects.filter(
+            subject__isnull=True, student_id=duplicate['student_id'], day=duplicate['day']
+        ).order_by('id')
+        for rollup in extra:
+            for field in ROLLUP_FIELDS:
+                setattr(keep, field, getattr(keep, field) + getattr(rollup, field))
+        keep.save(update_fields=ROLLUP_FIELDS)
+        BehaviorDailyRollup.objects.filter(id__in=[rollup.id for rollup in extra]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0012_behavior_client_id'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_rollups, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='behaviordailyrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('subject__isnull', True)), fields=('student', 'day'), name='unique_student_day_no_subject'),
+        ),
+    ]
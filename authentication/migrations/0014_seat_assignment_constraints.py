@@ -0,0 +1,44 @@
+# Generated by Django 5.1.5 on 2026-10-18 18:49
+
+from django.db import migrations, models
+
+
+def unseat_doubled_up_students(apps, schema_editor):
+    """Keep the earliest assignment of each seat; the other students become unassigned."""
+    SeatAssignment = apps.get_model('authentication', 'SeatAssignment')
+    seen = set()
+    duplicates = []
+    for assignment_id, plan_id, row, column in SeatAssignment.objects.order_by(
+        'seating_plan_id', 'row', 'column', 'id'
+    ).values_list('id', 'seating_plan_id', 'row', 'column'):
+        if (plan_id, row, column) in seen:
+            duplicates.append(assignment_id)
+        seen.add((plan_id, row, column))
+    SeatAssignment.objects.filter(id__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0013_rollup_no_subject_constraint'),
+    ]
+
+    operations = [
+        migrations.RunPython(unseat_doubled_up_students, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='seatassignment',
+            name='seatassignment_position_idx',
+        ),
+        migrations.AlterUniqueTogether(
+            name='seatassignment',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='seatassignment',
+            constraint=models.UniqueConstraint(fields=('seating_plan', 'row', 'column'), name='unique_seat_position'),
+        ),
+        migrations.AddConstraint(
+            model_name='seatassignment',
+            constraint=models.UniqueConstraint(fields=('seating_plan', 'student'), name='unique_student_seat'),
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 
 class Subject(models.Model):
@@ -65,6 +65,15 @@ class StudentSubject(models.Model):
     subject = models.ForeignKey(Subject, on_delete=models.CASCADE)
     grade = models.DecimalField(max_digits=4, decimal_places=1, null=True, blank=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['subject', 'student'], name='studentsubject_subject_idx'),
+        ]
+        constraints = [
+            # One enrolment per student and subject; roster imports upsert against it
+            models.UniqueConstraint(fields=['student', 'subject'], name='unique_student_subject'),
+        ]
+    
     def __str__(self):
         return f"{self.student.user.username} - {self.subject.name}"
 
@@ -82,6 +91,11 @@ class Teacher(models.Model):
 
 
 class Behavior(models.Model):
+    """
+    One behavior event. This is the only table behavior is stored in; every
+    total, chart and export reads it. BehaviorRecord and
+    behaviorpoints.BehaviorPoint are proxies over it for older code.
+    """
     BEHAVIOR_TYPES = [
         ('positive', 'Positive'),
         ('negative', 'Negative')
@@ -89,15 +103,90 @@ class Behavior(models.Model):
     
     student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='behaviors')
     subject = models.ForeignKey(Subject, on_delete=models.CASCADE, null=True, blank=True)
+    classroom = models.ForeignKey(
+        'ClassRoom', on_delete=models.SET_NULL, null=True, blank=True, related_name='behaviors'
+    )
+    teacher = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='recorded_behaviors'
+    )
     behavior_type = models.CharField(max_length=10, choices=BEHAVIOR_TYPES)
     description = models.TextField()
     points = models.IntegerField()
+    # Display name of whoever recorded it, which survives their account being deleted (teacher becomes null)
     recorded_by = models.CharField(max_length=100)
     recorded_at = models.DateTimeField(auto_now_add=True)
+    # Id the seating plan page generated for a queued click, so a retried batch is not applied twice
+    client_id = models.UUIDField(null=True, blank=True, editable=False)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['client_id'], condition=models.Q(client_id__isnull=False), name='unique_behavior_client_id'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['student', '-recorded_at'], name='behavior_student_recent_idx'),
+            models.Index(fields=['student', 'behavior_type'], name='behavior_student_type_idx'),
+            models.Index(fields=['subject', 'recorded_at'], name='behavior_subject_recent_idx'),
+            models.Index(fields=['classroom', 'recorded_at'], name='behavior_classroom_recent_idx'),
+        ]
     
     def __str__(self):
         return f"{self.student.user.username} - {self.behavior_type} - {self.points} points"
-        
+
+
+class StudentPointsSummary(models.Model):
+    """
+    Denormalised running totals of a student's Behavior rows.
+    Maintained by authentication.ledger in the same transaction as each write.
+    """
+    student = models.OneToOneField(Student, on_delete=models.CASCADE, related_name='points_summary')
+    total = models.IntegerField(default=0)
+    positive_count = models.IntegerField(default=0)
+    negative_count = models.IntegerField(default=0)
+    last_behavior_at = models.DateTimeField(null=True, blank=True)
+    last_description = models.TextField(blank=True, default='')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Rank lookups count the students above a given total
+            models.Index(fields=['total'], name='points_summary_total_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student.user.username} - {self.total} points"
+
+class BehaviorDailyRollup(models.Model):
+    """
+    A student's Behavior rows in one subject, summed per school day.
+    Maintained by authentication.rollups alongside the points ledger;
+    negative_points is the (non-positive) sum of negative behaviors.
+    """
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='daily_rollups')
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, null=True, blank=True, related_name='daily_rollups')
+    day = models.DateField()
+    positive_points = models.IntegerField(default=0)
+    negative_points = models.IntegerField(default=0)
+    positive_count = models.IntegerField(default=0)
+    negative_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'subject', 'day'], name='unique_student_subject_day'),
+            # NULLs never conflict in the constraint above, so behaviors without a subject need their own
+            models.UniqueConstraint(
+                fields=['student', 'day'], condition=models.Q(subject__isnull=True), name='unique_student_day_no_subject'
+            ),
+        ]
+        indexes = [
+            # Classroom charts read a subject over a range of days
+            models.Index(fields=['subject', 'day'], name='rollup_subject_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student.user.username} - {self.day} - {self.positive_points + self.negative_points} points"
+
 class ClassRoom(models.Model):
     name = models.CharField(max_length=100)
     subject = models.ForeignKey(Subject, on_delete=models.CASCADE)
@@ -115,6 +204,16 @@ class SeatingPlan(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['classroom', 'is_active'], name='seatingplan_classroom_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['classroom'], condition=models.Q(is_active=True), name='one_active_plan_per_classroom'
+            ),
+        ]
+    
     def __str__(self):
         return f"{self.classroom.name} - {self.name}"
 
@@ -125,19 +224,48 @@ class SeatAssignment(models.Model):
     column = models.IntegerField()
     
     class Meta:
-        unique_together = ('seating_plan', 'row', 'column')
-        unique_together = ('seating_plan', 'student')
+        constraints = [
+            # One student per seat (its index also serves seat lookups), and one seat per student
+            models.UniqueConstraint(fields=['seating_plan', 'row', 'column'], name='unique_seat_position'),
+            models.UniqueConstraint(fields=['seating_plan', 'student'], name='unique_student_seat'),
+        ]
     
     def __str__(self):
         return f"{self.seating_plan.name} - {self.student.user.username} - Row {self.row}, Column {self.column}"
         
         
-class BehaviorRecord(models.Model):
-    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='behavior_records')
-    teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE)
-    points = models.IntegerField()
-    description = models.TextField()
-    recorded_at = models.DateTimeField(auto_now_add=True)
+class LegacyBehaviorMixin:
+    """
+    Save behavior for the proxies standing in for the retired behavior
+    tables. Old callers only set points, so this fills in the type and
+    recorder name and keeps the points ledger in step, as every Behavior
+    write must.
+    """
+    def save(self, *args, **kwargs):
+        from .ledger import record_behaviors, refresh_students
+        
+        adding = self._state.adding
+        if not self.behavior_type:
+            self.behavior_type = 'positive' if self.points >= 0 else 'negative'
+        if not self.recorded_by and self.teacher_id:
+            self.recorded_by = self.teacher.get_full_name() or self.teacher.username
+        if self.classroom_id and not self.subject_id:
+            self.subject_id = self.classroom.subject_id
+        with transaction.atomic():
+            # A change may move the behavior to another student, whose totals drop it
+            previous_student_id = None if adding else Behavior.objects.filter(
+                pk=self.pk
+            ).values_list('student_id', flat=True).first()
+            super().save(*args, **kwargs)
+            if adding:
+                record_behaviors([self])
+            else:
+                refresh_students([self.student_id, previous_student_id])
+
+class BehaviorRecord(LegacyBehaviorMixin, Behavior):
+    """Formerly its own table; now every behavior event. `teacher` is the recording User."""
+    class Meta:
+        proxy = True
     
     def __str__(self):
         return f"{self.student} - {self.points} points - {self.recorded_at.strftime('%Y-%m-%d')}"
@@ -0,0 +1,127 @@
+"""
+Per-user roles (group names) and permissions, resolved once and reused.
+
+RoleMiddleware (middleware.py) exposes request.roles. The first request after login
+resolves the user's groups and permissions and keeps them in the
+session, tagged with the user's 'roles' generation. Later requests only
+compare generations, so checking a role costs no queries. Changing a
+user's groups or permissions, or a group's permissions, bumps the
+generation (see signals.py) and the next request resolves again.
+Resolved roles are also dropped after ROLES_TTL seconds, which bounds
+how long a revoked role survives a missed bump (a change made outside
+the signals, or a worker whose cache is not shared).
+"""
+import logging
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.core.exceptions import PermissionDenied
+from django.shortcuts import redirect
+
+from .caching import bump_generation, get_generations
+
+logger = logging.getLogger(__name__)
+
+SESSION_KEY = '_roles'
+
+TEACHER_ROLES = ('Teacher', 'Staff')
+STUDENT_ROLES = ('Student',)
+
+# Generation shared by every user; bumped when a group itself changes
+ALL_USERS = 'all'
+
+# Seconds resolved roles are trusted before they are read from the database again
+ROLES_TTL = 60
+
+
+class Roles:
+    def __init__(self, groups=(), permissions=(), is_superuser=False):
+        self.groups = frozenset(groups)
+        self.permissions = frozenset(permissions)
+        self.is_superuser = is_superuser
+
+    def __contains__(self, group):
+        return group in self.groups
+
+    def __repr__(self):
+        return f'<Roles {sorted(self.groups)}>'
+
+    def any(self, *groups):
+        return not self.groups.isdisjoint(groups)
+
+    @property
+    def is_teacher(self):
+        return self.any(*TEACHER_ROLES)
+
+    @property
+    def is_student(self):
+        return self.any(*STUDENT_ROLES)
+
+    def has_perm(self, permission):
+        return self.is_superuser or permission in self.permissions
+
+
+def get_roles(request):
+    """Return request.user's Roles, from the session when still current."""
+    user = request.user
+    if not user.is_authenticated:
+        return Roles()
+
+    generations = get_generations('roles', [ALL_USERS, user.pk])
+    generation = [generations[ALL_USERS], generations[user.pk]]
+    stored = request.session.get(SESSION_KEY)
+    now = time.time()
+    if (
+        stored and stored['user'] == user.pk and stored['generation'] == generation
+        and now - stored.get('resolved_at', 0) < ROLES_TTL
+    ):
+        return Roles(stored['groups'], stored['permissions'], stored['is_superuser'])
+
+    roles = Roles(
+        user.groups.values_list('name', flat=True),
+        user.get_all_permissions(),
+        user.is_superuser,
+    )
+    request.session[SESSION_KEY] = {
+        'user': user.pk,
+        'generation': generation,
+        'resolved_at': now,
+        'groups': sorted(roles.groups),
+        'permissions': sorted(roles.permissions),
+        'is_superuser': roles.is_superuser,
+    }
+    return roles
+
+
+def invalidate_users(*user_pks):
+    bump_generation('roles', *user_pks)
+
+
+def invalidate_all_users():
+    bump_generation('roles', ALL_USERS)
+
+
+def role_required(*groups, permission=None, raise_exception=False, redirect_to='login'):
+    """
+    Require a logged-in user in any of `groups` (and holding `permission`,
+    if given). Anonymous users go to the login page. Anyone else is logged
+    and redirected to `redirect_to`, or gets a 403 with raise_exception.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not request.user.is_authenticated:
+                return redirect_to_login(request.get_full_path(), settings.LOGIN_URL)
+            roles = request.roles
+            if (groups and not roles.any(*groups)) or (permission and not roles.has_perm(permission)):
+                logger.warning(
+                    f'Unauthorized access attempt to {view_func.__name__} by {request.user.username}'
+                )
+                if raise_exception:
+                    raise PermissionDenied
+                return redirect(redirect_to)
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
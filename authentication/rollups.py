@@ -0,0 +1,129 @@
+"""
+Maintenance of the daily behavior rollups (BehaviorDailyRollup).
+
+Charts over a date range sum one row per student, subject and school day
+instead of every Behavior in the range, so their cost follows the number
+of days rather than the number of events. The ledger helpers in
+authentication.ledger call record() and refresh() for every Behavior
+write, in the same transaction; rebuild_all() and find_drift() back the
+rebuild_behavior_rollups command.
+"""
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Behavior, BehaviorDailyRollup
+
+ROLLUP_FIELDS = ('positive_points', 'negative_points', 'positive_count', 'negative_count')
+
+
+def record(behaviors):
+    """
+    Add newly created Behavior rows to their daily rollups. Missing rollups
+    are first inserted empty, skipping any that exist (or that a concurrent
+    write has just inserted), and then every rollup is incremented in place,
+    so two first writes on the same day both count. Rollups getting an
+    identical change share a single UPDATE, so a whole-class award costs
+    one INSERT plus one UPDATE.
+    """
+    school_tz = timezone.get_default_timezone()
+    deltas = {}
+    for behavior in behaviors:
+        key = (behavior.student_id, behavior.subject_id, timezone.localdate(behavior.recorded_at, school_tz))
+        delta = deltas.setdefault(key, [0, 0, 0, 0])
+        if behavior.behavior_type == 'positive':
+            delta[0] += behavior.points
+            delta[2] += 1
+        elif behavior.behavior_type == 'negative':
+            delta[1] += behavior.points
+            delta[3] += 1
+    if not deltas:
+        return
+
+    BehaviorDailyRollup.objects.bulk_create([
+        BehaviorDailyRollup(student_id=student_id, subject_id=subject_id, day=day)
+        for student_id, subject_id, day in deltas
+    ], ignore_conflicts=True)
+
+    groups = {}
+    for (student_id, subject_id, day), delta in deltas.items():
+        groups.setdefault((subject_id, day, *delta), []).append(student_id)
+    for (subject_id, day, *delta), group_student_ids in groups.items():
+        BehaviorDailyRollup.objects.filter(
+            student_id__in=group_student_ids, subject_id=subject_id, day=day
+        ).update(**{field: F(field) + value for field, value in zip(ROLLUP_FIELDS, delta)})
+
+
+def refresh(student_ids):
+    """Recompute every daily rollup of the given students from their Behavior rows."""
+    student_ids = [sid for sid in set(student_ids) if sid is not None]
+    if not student_ids:
+        return 0
+    BehaviorDailyRollup.objects.filter(student_id__in=student_ids).delete()
+    rollups = BehaviorDailyRollup.objects.bulk_create(
+        [BehaviorDailyRollup(**row) for row in _computed_rows(student_ids)], batch_size=1000,
+    )
+    return len(rollups)
+
+
+def rebuild_all(chunk_size=1000):
+    """
+    Rebuild the rollups of every student with behaviors. Each chunk of
+    students commits on its own, so an interrupted rebuild keeps its
+    progress and never holds the database for the whole history.
+    """
+    BehaviorDailyRollup.objects.exclude(student_id__in=Behavior.objects.values('student_id')).delete()
+    rebuilt = 0
+    for chunk in _student_id_chunks(chunk_size):
+        with transaction.atomic():
+            rebuilt += refresh(chunk)
+    return rebuilt
+
+
+def find_drift(chunk_size=1000):
+    """Return the ids of students whose stored rollups differ from their Behavior rows."""
+    drifted = set()
+    for chunk in _student_id_chunks(chunk_size):
+        stored = _as_totals(BehaviorDailyRollup.objects.filter(student_id__in=chunk).values(
+            'student_id', 'subject_id', 'day', *ROLLUP_FIELDS
+        ))
+        computed = _as_totals(_computed_rows(chunk))
+        drifted.update(
+            key[0] for key in stored.keys() | computed.keys() if stored.get(key) != computed.get(key)
+        )
+    # Rollups left behind by students whose behaviors are all gone
+    drifted.update(BehaviorDailyRollup.objects.exclude(
+        student_id__in=Behavior.objects.values('student_id')
+    ).values_list('student_id', flat=True).distinct())
+    return sorted(drifted)
+
+
+def _as_totals(rows):
+    return {
+        (row['student_id'], row['subject_id'], row['day']): tuple(row[field] for field in ROLLUP_FIELDS)
+        for row in rows
+    }
+
+
+def _computed_rows(student_ids):
+    return Behavior.objects.filter(student_id__in=student_ids).annotate(
+        day=TruncDate('recorded_at', tzinfo=timezone.get_default_timezone()),
+    ).values('student_id', 'subject_id', 'day').annotate(
+        positive_points=Sum('points', filter=Q(behavior_type='positive'), default=0),
+        negative_points=Sum('points', filter=Q(behavior_type='negative'), default=0),
+        positive_count=Count('id', filter=Q(behavior_type='positive')),
+        negative_count=Count('id', filter=Q(behavior_type='negative')),
+    ).order_by()
+
+
+def _student_id_chunks(chunk_size):
+    chunk = []
+    student_ids = Behavior.objects.order_by('student_id').values_list('student_id', flat=True).distinct()
+    for student_id in student_ids.iterator(chunk_size=chunk_size):
+        chunk.append(student_id)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -0,0 +1,204 @@
+"""
+Bulk roster import: students, subjects and enrolments from CSV rows.
+
+Rows are validated and written in batches, each in its own transaction.
+Users are upserted by username, enrolments by (student, subject), so
+re-importing a corrected roster updates rows instead of duplicating
+them. Every batch costs a fixed number of queries however many rows
+it holds.
+
+Columns: username (required), first_name, last_name, email, subject,
+grade, teacher. A student taking several subjects appears once per
+subject. Subjects are matched by name and created when missing
+(teacher fills in their teacher_name).
+"""
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from .banding import invalidate_subjects
+from .models import Student, StudentSubject, Subject
+from .roles import invalidate_users
+
+ROSTER_BATCH_SIZE = 2000
+
+# Columns copied onto existing users when the roster includes them
+USER_COLUMNS = ['first_name', 'last_name', 'email']
+
+_validate_username = UnicodeUsernameValidator()
+
+
+@dataclass
+class RosterReport:
+    rows: int = 0
+    imported: int = 0
+    users_created: int = 0
+    users_updated: int = 0
+    students_created: int = 0
+    subjects_created: int = 0
+    enrollments: int = 0
+    batches: int = 0
+    errors: list = field(default_factory=list)
+    started: float = field(default_factory=time.perf_counter)
+    finished: float = None
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0
+
+
+def import_roster(rows, columns, batch_size=ROSTER_BATCH_SIZE, password=None, dry_run=False):
+    """
+    Import an iterable of roster dicts (e.g. a csv.DictReader) whose header
+    is `columns`. Invalid rows are skipped and listed in report.errors as
+    (line number, message); everything else is upserted. New users get
+    `password` (hashed once) or an unusable password. With dry_run, rows
+    are only validated.
+    """
+    if 'username' not in columns:
+        raise ValueError('The roster needs a username column')
+
+    report = RosterReport()
+    password_hash = make_password(password)
+    student_group = None if dry_run else Group.objects.get_or_create(name='Student')[0]
+    subject_ids = {}
+    batch = []
+    # Line 1 is the header
+    for line_number, row in enumerate(rows, start=2):
+        report.rows += 1
+        cleaned, error = _clean_row(row)
+        if error:
+            report.errors.append((line_number, error))
+            continue
+        batch.append(cleaned)
+        if len(batch) >= batch_size:
+            _flush(batch, columns, password_hash, student_group, subject_ids, report, dry_run)
+            batch = []
+    if batch:
+        _flush(batch, columns, password_hash, student_group, subject_ids, report, dry_run)
+
+    report.finished = time.perf_counter()
+    return report
+
+
+def _clean_row(row):
+    """Return (cleaned row, None) or (None, error message)."""
+    cleaned = {key: (value or '').strip() for key, value in row.items() if key}
+    username = cleaned.get('username', '')
+    try:
+        if not username:
+            raise ValidationError('username is required')
+        if len(username) > 150:
+            raise ValidationError('username is longer than 150 characters')
+        _validate_username(username)
+        if cleaned.get('email'):
+            validate_email(cleaned['email'])
+        if len(cleaned.get('subject', '')) > 100:
+            raise ValidationError('subject is longer than 100 characters')
+        for column in ('first_name', 'last_name'):
+            if len(cleaned.get(column, '')) > 150:
+                raise ValidationError(f'{column} is longer than 150 characters')
+    except ValidationError as e:
+        return None, f'{username or "?"}: {" ".join(e.messages)}'
+
+    grade = cleaned.get('grade')
+    if grade:
+        try:
+            cleaned['grade'] = Decimal(grade).quantize(Decimal('0.1'))
+        except InvalidOperation:
+            return None, f'{username}: grade {grade!r} is not a number'
+        if not cleaned['grade'].is_finite() or not 0 <= cleaned['grade'] <= 100:
+            return None, f'{username}: grade {grade} is outside 0-100'
+    else:
+        cleaned['grade'] = None
+    return cleaned, None
+
+
+def _flush(batch, columns, password_hash, student_group, subject_ids, report, dry_run):
+    report.batches += 1
+    report.imported += len(batch)
+    if dry_run:
+        return
+
+    # The last row for a username wins
+    users = {row['username']: row for row in batch}
+    update_fields = [column for column in USER_COLUMNS if column in columns]
+
+    with transaction.atomic():
+        existing = set(User.objects.filter(username__in=users).values_list('username', flat=True))
+        User.objects.bulk_create(
+            [
+                User(
+                    username=username, password=password_hash,
+                    **{column: row.get(column, '') for column in USER_COLUMNS},
+                )
+                for username, row in users.items()
+            ],
+            **(
+                {'update_conflicts': True, 'unique_fields': ['username'], 'update_fields': update_fields}
+                if update_fields else {'ignore_conflicts': True}
+            ),
+        )
+        user_ids = dict(User.objects.filter(username__in=users).values_list('username', 'id'))
+        report.users_created += len(users) - len(existing)
+        report.users_updated += len(existing)
+
+        User.groups.through.objects.bulk_create([
+            User.groups.through(user_id=user_id, group_id=student_group.id) for user_id in user_ids.values()
+        ], ignore_conflicts=True)
+        # Existing users may have just joined the Student group
+        invalidate_users(*(user_ids[username] for username in existing))
+
+        known_students = set(Student.objects.filter(user_id__in=user_ids.values()).values_list('user_id', flat=True))
+        Student.objects.bulk_create([
+            Student(user_id=user_id) for user_id in user_ids.values() if user_id not in known_students
+        ])
+        report.students_created += len(user_ids) - len(known_students)
+        student_ids = dict(Student.objects.filter(user_id__in=user_ids.values()).values_list('user_id', 'id'))
+
+        _resolve_subjects(batch, subject_ids, report)
+        enrollments = {}
+        for row in batch:
+            if row.get('subject'):
+                student_id = student_ids[user_ids[row['username']]]
+                enrollments[student_id, subject_ids[row['subject']]] = row['grade']
+        StudentSubject.objects.bulk_create(
+            [
+                StudentSubject(student_id=student_id, subject_id=subject_id, grade=grade)
+                for (student_id, subject_id), grade in enrollments.items()
+            ],
+            **(
+                {'update_conflicts': True, 'unique_fields': ['student', 'subject'], 'update_fields': ['grade']}
+                if 'grade' in columns else {'ignore_conflicts': True}
+            ),
+        )
+        report.enrollments += len(enrollments)
+        invalidate_subjects(*{subject_id for _, subject_id in enrollments})
+
+
+def _resolve_subjects(batch, subject_ids, report):
+    """Fill subject_ids (name -> id) for every subject in the batch, creating missing ones."""
+    teachers = {row['subject']: row.get('teacher', '') for row in batch if row.get('subject')}
+    missing = [name for name in teachers if name not in subject_ids]
+    if not missing:
+        return
+    # Subject names aren't unique; the oldest subject with a name wins
+    for subject_id, name in Subject.objects.filter(name__in=missing).order_by('-id').values_list('id', 'name'):
+        subject_ids[name] = subject_id
+    new_subjects = Subject.objects.bulk_create([
+        Subject(name=name, teacher_name=teachers[name]) for name in missing if name not in subject_ids
+    ])
+    for subject in new_subjects:
+        subject_ids[subject.name] = subject.id
+    report.subjects_created += len(new_subjects)
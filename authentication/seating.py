@@ -0,0 +1,242 @@
+"""
+Helpers for building a classroom's seating plan.
+
+Everything here runs a fixed number of queries regardless of how many
+students are enrolled, so the seating plan page costs the same for a class
+of 10 as for a class of 500.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .banding import classroom_bands, student_category
+from .caching import bump_generation, get_generation
+from .models import SeatAssignment, SeatingPlan, StudentPointsSummary, StudentSubject
+
+FRAGMENT_TIMEOUT = 60 * 60
+SEAT_GRID_TEMPLATE = 'frontend/Pages/SeatingPlan/seat_grid.html'
+UNASSIGNED_STUDENTS_TEMPLATE = 'frontend/Pages/SeatingPlan/unassigned_students.html'
+
+
+def build_seating_context(classroom):
+    """
+    Build the seat grid and unassigned-student list for a classroom.
+    Returns a dict ready to merge into the seating plan template context.
+    """
+    # Get all students enrolled in this subject
+    enrolled_students = list(StudentSubject.objects.filter(
+        subject_id=classroom.subject_id
+    ).select_related('student__user'))
+
+    # Get the active seating plan and its seat assignments
+    active_seating_plan = SeatingPlan.objects.filter(classroom=classroom, is_active=True).first()
+    seat_assignments = []
+    if active_seating_plan:
+        seat_assignments = list(SeatAssignment.objects.filter(
+            seating_plan=active_seating_plan
+        ).select_related('student__user'))
+
+    assigned_student_ids = {assignment.student_id for assignment in seat_assignments}
+    unassigned_students = [
+        enrollment.student for enrollment in enrolled_students
+        if enrollment.student_id not in assigned_student_ids
+    ]
+
+    # Read every displayed student's total and most recent behavior in one query
+    student_ids = [student.id for student in unassigned_students]
+    student_ids.extend(assignment.student_id for assignment in seat_assignments)
+    student_points = dict.fromkeys(student_ids, 0)
+    student_recent_behavior = {}
+    if student_ids:
+        summaries = StudentPointsSummary.objects.filter(
+            student_id__in=student_ids
+        ).values_list('student_id', 'total', 'last_description')
+        for student_id, total_points, last_description in summaries:
+            student_points[student_id] = total_points
+            if last_description:
+                student_recent_behavior[student_id] = last_description
+
+    # Behavior categories (green, orange, red) come from the shared classroom bands
+    bands = classroom_bands(classroom)
+
+    def describe(student):
+        points = student_points.get(student.id, 0)
+        return {
+            'student': student,
+            'points': points,
+            'recent_behavior': student_recent_behavior.get(student.id, ''),
+            'category': student_category(bands, points),
+        }
+
+    # Place students with a dict lookup per cell instead of scanning every assignment
+    seats_by_position = {
+        (assignment.row, assignment.column): assignment.student
+        for assignment in seat_assignments
+    }
+    seat_grid = []
+    for row in range(classroom.rows):
+        seat_row = []
+        for col in range(classroom.columns):
+            student = seats_by_position.get((row, col))
+            seat = describe(student) if student else {
+                'student': None, 'points': 0, 'recent_behavior': '', 'category': '',
+            }
+            seat.update(row=row, column=col)
+            seat_row.append(seat)
+        seat_grid.append(seat_row)
+
+    return {
+        'active_seating_plan': active_seating_plan,
+        'seat_grid': seat_grid,
+        'unassigned_students': [describe(student) for student in unassigned_students],
+        'green_threshold': bands['green_threshold'],
+        'orange_threshold': bands['orange_threshold'],
+    }
+
+
+def copy_assignments(source_plan, target_plan, replace=False):
+    """
+    Copy every seat assignment from one plan to another with a single read
+    and a single bulk insert. With replace=True the target's existing
+    assignments are removed first. Call inside a transaction.
+    """
+    if replace:
+        SeatAssignment.objects.filter(seating_plan=target_plan).delete()
+    rows = SeatAssignment.objects.filter(
+        seating_plan=source_plan
+    ).values_list('student_id', 'row', 'column')
+    return len(SeatAssignment.objects.bulk_create([
+        SeatAssignment(seating_plan=target_plan, student_id=student_id, row=row, column=column)
+        for student_id, row, column in rows
+    ]))
+
+
+def render_seating_fragments(classroom):
+    """
+    Return the rendered seat grid and unassigned-student list for a
+    classroom, with the active plan id and band thresholds the rest of the
+    page needs, as a dict ready to merge into the template context.
+
+    Fragments are cached per (classroom, active plan) under generations
+    that the signals in authentication.signals bump whenever a
+    plan, seat assignment, enrolment, behavior or student name changes, so switching
+    back to a class whose grid has not changed skips the database.
+    """
+    plan_key = f'seating:active_plan:{classroom.id}:{get_generation("classroom", classroom.id)}'
+    plan_id = cache.get(plan_key)
+    if plan_id is None:
+        plan_id = SeatingPlan.objects.filter(
+            classroom=classroom, is_active=True
+        ).values_list('id', flat=True).first() or 0
+        cache.set(plan_key, plan_id, FRAGMENT_TIMEOUT)
+
+    fragments_key = 'seating:fragments:{}:{}:{}:{}:{}'.format(
+        classroom.id,
+        plan_key.rsplit(':', 1)[1],
+        plan_id,
+        get_generation('seatingplan', plan_id),
+        get_generation('subject', classroom.subject_id),
+    )
+    fragments = cache.get(fragments_key)
+    if fragments is None:
+        seating = build_seating_context(classroom)
+        active_seating_plan = seating['active_seating_plan']
+        fragments = {
+            'active_seating_plan_id': active_seating_plan.id if active_seating_plan else '',
+            'green_threshold': seating['green_threshold'],
+            'orange_threshold': seating['orange_threshold'],
+            'seat_grid_html': render_to_string(SEAT_GRID_TEMPLATE, seating),
+            'unassigned_students_html': render_to_string(UNASSIGNED_STUDENTS_TEMPLATE, seating),
+        }
+        cache.set(fragments_key, fragments, FRAGMENT_TIMEOUT)
+    return fragments
+
+
+def invalidate_classrooms(*classroom_ids):
+    bump_generation('classroom', *classroom_ids)
+
+
+def invalidate_plans(*seating_plan_ids):
+    bump_generation('seatingplan', *seating_plan_ids)
+
+
+def student_payload(student, points, recent_behavior, category):
+    """The JSON shape of one student card, as used by seat maps and live updates."""
+    return {
+        'student_id': student.id,
+        'first_name': student.user.first_name,
+        'last_name': student.user.last_name,
+        'points': points,
+        'recent_behavior': recent_behavior,
+        'category': category,
+    }
+
+
+def describe_student(student, classroom):
+    """Build the card payload for a single student (with user loaded) in a classroom."""
+    summary = StudentPointsSummary.objects.filter(
+        student_id=student.id
+    ).values_list('total', 'last_description').first() or (0, '')
+    points, recent_behavior = summary
+    return student_payload(student, points, recent_behavior, student_category(classroom_bands(classroom), points))
+
+
+def serialize_seating(classroom, seating):
+    """Convert a build_seating_context() result into a JSON-friendly seat map."""
+    def describe(entry):
+        return student_payload(entry['student'], entry['points'], entry['recent_behavior'], entry['category'])
+
+    active_seating_plan = seating['active_seating_plan']
+    return {
+        'classroom_id': classroom.id,
+        'seating_plan_id': active_seating_plan.id if active_seating_plan else None,
+        'rows': classroom.rows,
+        'columns': classroom.columns,
+        'green_threshold': seating['green_threshold'],
+        'orange_threshold': seating['orange_threshold'],
+        'seats': [
+            dict(describe(seat), row=seat['row'], column=seat['column'])
+            for seat_row in seating['seat_grid'] for seat in seat_row if seat['student']
+        ],
+        'unassigned': [describe(entry) for entry in seating['unassigned_students']],
+    }
+
+
+def touch_plan(seating_plan_id):
+    """
+    Mark a plan's assignments as changed so cached seat maps and ETags are
+    refreshed. Needed after bulk writes, which send no signals.
+    """
+    SeatingPlan.objects.filter(pk=seating_plan_id).update(updated_at=timezone.now())
+    invalidate_plans(seating_plan_id)
+
+
+def seating_etag(classroom):
+    """
+    Return an ETag for a classroom's seat map that changes whenever its
+    active plan's assignments, its enrolment, or any enrolled student's
+    points or name change, without building the seat map itself.
+
+    Besides the plan's updated_at and the enrolment aggregates it folds in
+    the generations the seat map cache is keyed on, which the signals bump
+    for seat changes made anywhere through the ORM (the admin included)
+    and for student renames, neither of which touches those columns.
+    """
+    plan = SeatingPlan.objects.filter(
+        classroom=classroom, is_active=True
+    ).values_list('id', 'updated_at').first()
+    enrolment = StudentSubject.objects.filter(subject_id=classroom.subject_id).aggregate(
+        count=Count('id'),
+        latest_id=Max('id'),
+        latest_change=Max('student__points_summary__updated_at'),
+    )
+    generations = (
+        get_generation('classroom', classroom.id),
+        get_generation('seatingplan', plan[0]) if plan else None,
+        get_generation('subject', classroom.subject_id),
+    )
+    state = (classroom.id, classroom.rows, classroom.columns, plan, *enrolment.values(), generations)
+    return hashlib.md5(repr(state).encode()).hexdigest()
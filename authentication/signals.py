@@ -2,10 +2,15 @@
 ### @Date: 03-02-2026
 ### @Description: This file contains signals for the backend app.
 
-from django.contrib.auth.models import Group
-from django.db.models.signals import post_migrate
+from django.contrib.auth.models import Group, User
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save
 from django.dispatch import receiver
 
+from .banding import invalidate_students, invalidate_subjects
+from .models import Assignment, Behavior, ClassRoom, SeatAssignment, SeatingPlan, Student, StudentSubject
+from .roles import invalidate_all_users, invalidate_users
+from .seating import invalidate_classrooms, invalidate_plans
+
 @receiver(post_migrate)
 def create_user_groups(sender, **kwargs):
     """ Init default user groups when migrations are applied """
@@ -13,3 +18,67 @@ def create_user_groups(sender, **kwargs):
     for group in groups:
         Group.objects.get_or_create(name=group)
     print("User groups created/updated")
+
+@receiver([post_save, post_delete], sender=StudentSubject)
+def invalidate_enrollment_bands(sender, instance, **kwargs):
+    """ Enrolment changes alter who a classroom's bands are computed over """
+    invalidate_subjects(instance.subject_id)
+
+@receiver([post_save, post_delete], sender=Behavior)
+def invalidate_behavior_caches(sender, instance, **kwargs):
+    """ A behavior changes its student's total in every subject they take """
+    invalidate_students([instance.student_id])
+
+@receiver([post_save, post_delete], sender=SeatAssignment)
+def invalidate_seat_caches(sender, instance, **kwargs):
+    """ Seat moves change the rendered grid of that plan """
+    invalidate_plans(instance.seating_plan_id)
+
+@receiver([post_save, post_delete], sender=SeatingPlan)
+def invalidate_plan_caches(sender, instance, **kwargs):
+    """ Activating, renaming or removing a plan can change which grid a classroom shows """
+    invalidate_classrooms(instance.classroom_id)
+    invalidate_plans(instance.id)
+
+@receiver([post_save, post_delete], sender=ClassRoom)
+def invalidate_classroom_caches(sender, instance, **kwargs):
+    """ Classroom dimensions shape the grid """
+    invalidate_classrooms(instance.id)
+
+@receiver([post_save, post_delete], sender=Assignment)
+def invalidate_assignment_caches(sender, instance, **kwargs):
+    """ Assignments feed the class charts on the teacher profile """
+    invalidate_classrooms(instance.classroom_id)
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidate_user_roles(sender, instance, action, reverse, pk_set, **kwargs):
+    """ Joining or leaving a group (or a direct permission change) alters the cached roles """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        invalidate_users(instance.pk)
+    elif pk_set:
+        invalidate_users(*pk_set)
+    else:
+        # group.user_set.clear() doesn't say who was removed
+        invalidate_all_users()
+
+@receiver(post_save, sender=User)
+def invalidate_superuser_roles(sender, instance, update_fields=None, **kwargs):
+    """ is_superuser grants every permission; the last_login save at each login can't change it """
+    if update_fields is None or 'is_superuser' in update_fields:
+        invalidate_users(instance.pk)
+
+@receiver(post_save, sender=User)
+def invalidate_student_cards(sender, instance, update_fields=None, **kwargs):
+    """ Seat cards show the student's name """
+    if update_fields is None or {'first_name', 'last_name', 'username'} & set(update_fields):
+        invalidate_students(Student.objects.filter(user=instance).values_list('id', flat=True))
+
+@receiver([post_save, post_delete], sender=Group)
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_group_roles(sender, **kwargs):
+    """ Renaming a group or changing its permissions affects every member """
+    if kwargs.get('action', 'post_add') in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_all_users()
@@ -0,0 +1,237 @@
+"""
+Deterministic synthetic school data for benchmarks and bulk sample data.
+
+build_school() creates teachers, students, subjects, classrooms, seating
+plans and behavior history with batched bulk_create calls. It hashes the
+shared password once, and the same seed always produces the same school.
+Behaviors skip the per-row ledger path, and the new students' points
+summaries are rebuilt once at the end.
+"""
+import math
+import random
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .ledger import refresh_students
+from .models import (
+    Behavior, ClassRoom, SeatAssignment, SeatingPlan, Student, StudentSubject, Subject, Teacher,
+)
+
+SUBJECT_NAMES = [
+    'Mathematics', 'English', 'Science', 'History', 'Geography',
+    'Physics', 'Chemistry', 'Biology', 'Computer Science', 'Art',
+    'Music', 'Physical Education', 'Foreign Languages', 'Economics', 'Psychology',
+]
+POSITIVE_REASONS = [
+    'Excellent participation in class', 'Helping other students', 'Outstanding homework submission',
+    'Great teamwork', 'Improved performance', 'Positive attitude', 'Leadership in group activities',
+]
+NEGATIVE_REASONS = [
+    'Disruptive behavior', 'Late assignment submission', 'Unauthorized device use',
+    'Tardiness', 'Incomplete homework', 'Not following instructions', 'Excessive talking',
+]
+
+# Seat columns per classroom; rows grow so every enrolled student has a seat
+CLASSROOM_COLUMNS = 10
+
+# Behaviors are recorded between 08:00 and 16:00
+SCHOOL_DAY_SECONDS = 8 * 60 * 60
+
+
+def build_school(teachers=10, students=1000, behaviors=100000, classes_per_teacher=2, classrooms=None,
+                 subjects=None, subjects_per_student=6, saved_plans=2, history_days=365, seed=0,
+                 prefix='bench_', password='password123', batch_size=5000, log=None):
+    """
+    Create a synthetic school and return a dict of what was created.
+
+    Usernames are f'{prefix}teacher{n}' and f'{prefix}student{n}' (numbered
+    from 1). There are `classrooms` classrooms (teachers * classes_per_teacher
+    by default) shared out evenly among the teachers, and `subjects` subjects
+    (one per classroom by default) taught in turn by the classrooms; with
+    more subjects than classrooms, the rest have no classroom. Behaviors are
+    spread evenly over the last `history_days` days, 70% positive, at random
+    times in the school day. Runs in a single transaction.
+    """
+    classroom_count = teachers * classes_per_teacher if classrooms is None else classrooms
+    subject_count = classroom_count if subjects is None else subjects
+    if min(teachers, students, classroom_count, subject_count, behaviors) < 0:
+        raise ValueError('Counts must not be negative')
+    if classroom_count and not (teachers and subject_count):
+        raise ValueError('Classrooms need at least one teacher and one subject')
+
+    log = log or (lambda message: None)
+    rng = random.Random(seed)
+    password_hash = make_password(password)
+
+    with transaction.atomic():
+        teacher_group, _ = Group.objects.get_or_create(name='Teacher')
+        student_group, _ = Group.objects.get_or_create(name='Student')
+
+        log(f'Creating {teachers} teachers...')
+        teacher_users = _create_users(f'{prefix}teacher', 'Teacher', teachers, password_hash, teacher_group, batch_size)
+        Teacher.objects.bulk_create([
+            Teacher(user=user, department=SUBJECT_NAMES[i % len(SUBJECT_NAMES)], years_experience=rng.randint(1, 30))
+            for i, user in enumerate(teacher_users)
+        ], batch_size=batch_size)
+
+        log(f'Creating {students} students...')
+        student_users = _create_users(f'{prefix}student', 'Student', students, password_hash, student_group, batch_size)
+        student_rows = Student.objects.bulk_create([Student(user=user) for user in student_users], batch_size=batch_size)
+
+        log(f'Creating {subject_count} subjects and {classroom_count} classrooms...')
+        # Classroom n is taught by teacher n * teachers // classrooms and covers subject n % subjects
+        classroom_teachers = [teacher_users[n * teachers // classroom_count] for n in range(classroom_count)]
+        subject_teachers = [
+            classroom_teachers[n] if n < classroom_count else (teacher_users[n % teachers] if teachers else None)
+            for n in range(subject_count)
+        ]
+        subjects = Subject.objects.bulk_create([
+            Subject(
+                name=f'{SUBJECT_NAMES[i % len(SUBJECT_NAMES)]} {i // len(SUBJECT_NAMES) + 1}',
+                teacher_name=f'{teacher.first_name} {teacher.last_name}' if teacher else '',
+            )
+            for i, teacher in enumerate(subject_teachers)
+        ], batch_size=batch_size)
+
+        log('Enrolling students...')
+        enrolled = {subject.id: [] for subject in subjects}
+        enrolments_by_student = {}
+        enrolments = []
+        for student in student_rows:
+            chosen = rng.sample(subjects, min(subjects_per_student, len(subjects)))
+            enrolments_by_student[student.id] = chosen
+            for subject in chosen:
+                enrolled[subject.id].append(student.id)
+                enrolments.append(StudentSubject(
+                    student=student, subject=subject, grade=round(rng.uniform(60.0, 100.0), 1)
+                ))
+        StudentSubject.objects.bulk_create(enrolments, batch_size=batch_size)
+
+        classroom_rows = ClassRoom.objects.bulk_create([
+            ClassRoom(
+                name=f'Room {index + 1}',
+                subject=subjects[index % subject_count],
+                teacher=teacher,
+                rows=max(1, math.ceil(len(enrolled[subjects[index % subject_count].id]) / CLASSROOM_COLUMNS)),
+                columns=CLASSROOM_COLUMNS,
+            )
+            for index, teacher in enumerate(classroom_teachers)
+        ], batch_size=batch_size)
+
+        log(f'Creating seating plans ({saved_plans} saved per classroom)...')
+        plans = SeatingPlan.objects.bulk_create([
+            SeatingPlan(classroom=classroom, name=name, is_active=name == 'Current Plan')
+            for classroom in classroom_rows
+            for name in ['Current Plan'] + [f'Saved Plan {n + 1}' for n in range(saved_plans)]
+        ], batch_size=batch_size)
+        assignments = []
+        for plan in plans:
+            seated = list(enrolled[plan.classroom.subject_id])
+            rng.shuffle(seated)
+            assignments.extend(
+                SeatAssignment(
+                    seating_plan=plan, student_id=student_id,
+                    row=index // CLASSROOM_COLUMNS, column=index % CLASSROOM_COLUMNS,
+                )
+                for index, student_id in enumerate(seated)
+            )
+        SeatAssignment.objects.bulk_create(assignments, batch_size=batch_size)
+
+        log(f'Creating {behaviors} behavior records...')
+        # Subject n's first classroom is classroom n; subjects beyond the classrooms are recorded by their teacher
+        recorders = {
+            subject.id: (
+                classroom_rows[n].id if n < classroom_count else None,
+                teacher.id if teacher else None,
+                f'{teacher.first_name} {teacher.last_name}' if teacher else '',
+            )
+            for n, (subject, teacher) in enumerate(zip(subjects, subject_teachers))
+        }
+        _create_behaviors(
+            rng, behaviors, student_rows, enrolments_by_student, recorders, history_days, batch_size,
+        )
+
+        log('Rebuilding points ledger...')
+        student_ids = [student.id for student in student_rows]
+        for start in range(0, len(student_ids), batch_size):
+            refresh_students(student_ids[start:start + batch_size])
+
+    return {
+        'teachers': len(teacher_users),
+        'students': len(student_rows),
+        'subjects': len(subjects),
+        'classrooms': len(classroom_rows),
+        'seating_plans': len(plans),
+        'seat_assignments': len(assignments),
+        'enrolments': len(enrolments),
+        'behaviors': behaviors,
+    }
+
+
+def _create_users(username_prefix, last_name, count, password_hash, group, batch_size):
+    users = User.objects.bulk_create([
+        User(
+            username=f'{username_prefix}{n}', email=f'{username_prefix}{n}@example.com',
+            first_name=f'{last_name}{n}', last_name=f'Surname{n}', password=password_hash,
+        )
+        for n in range(1, count + 1)
+    ], batch_size=batch_size)
+    User.groups.through.objects.bulk_create([
+        User.groups.through(user_id=user.id, group_id=group.id) for user in users
+    ], batch_size=batch_size)
+    return users
+
+
+def _create_behaviors(rng, count, students, enrolments_by_student, recorders, history_days, batch_size):
+    """
+    Insert behaviors a day at a time with executemany, at random times in
+    the school day. At millions of rows, building a model instance per row
+    is most of bulk_create's cost, and going around it also lets
+    recorded_at (auto_now_add) be set directly.
+    """
+    if not count or not students:
+        return
+    meta = Behavior._meta
+    fields = [meta.get_field(name) for name in (
+        'student', 'subject', 'classroom', 'teacher', 'behavior_type', 'description', 'points',
+        'recorded_by', 'recorded_at',
+    )]
+    quote = connection.ops.quote_name
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(meta.db_table),
+        ', '.join(quote(field.column) for field in fields),
+        ', '.join(['%s'] * len(fields)),
+    )
+    recorded_at_field = fields[-1]
+    student_ids = [student.id for student in students]
+    subject_ids = {
+        student_id: [subject.id for subject in subjects] for student_id, subjects in enrolments_by_student.items()
+    }
+
+    now = timezone.now()
+    today = timezone.localdate(now)
+    per_day, remainder = divmod(count, history_days)
+    with connection.cursor() as cursor:
+        for day in range(history_days):
+            day_count = per_day + (1 if day < remainder else 0)
+            school_day_start = timezone.make_aware(datetime.combine(today - timedelta(days=day), time(8)))
+            rows = []
+            for _ in range(day_count):
+                student_id = rng.choice(student_ids)
+                subject_id = rng.choice(subject_ids[student_id])
+                if rng.random() < 0.7:
+                    behavior_type, points, reason = 'positive', rng.randint(1, 5), rng.choice(POSITIVE_REASONS)
+                else:
+                    behavior_type, points, reason = 'negative', -rng.randint(1, 3), rng.choice(NEGATIVE_REASONS)
+                recorded_at = min(now, school_day_start + timedelta(seconds=rng.randrange(SCHOOL_DAY_SECONDS)))
+                classroom_id, teacher_id, recorded_by = recorders[subject_id]
+                rows.append((
+                    student_id, subject_id, classroom_id, teacher_id, behavior_type, reason, points, recorded_by,
+                    recorded_at_field.get_db_prep_save(recorded_at, connection),
+                ))
+            for start in range(0, len(rows), batch_size):
+                cursor.executemany(sql, rows[start:start + batch_size])
@@ -1,3 +1,1174 @@
-from django.test import TestCase
+import asyncio
+import csv
+import json
+import os
+import re
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from .analytics import (
+    RADAR_AXES, behavior_score, monthly_points, recent_months_range, student_rank, teacher_charts,
+    teacher_dashboard,
+)
+from .banding import classroom_bands
+from .caching import bump_generation, get_generation
+from .exports import aexport_rows
+from .ledger import find_drift, record_behaviors, refresh_students, totals_for
+from . import rollups
+from .live import broadcaster, classroom_channel
+from .middleware import QueryBudgetExceeded
+from .roles import ROLES_TTL
+from .seating import build_seating_context, copy_assignments
+from .synthetic import build_school
+from .models import (
+    Assignment, Behavior, BehaviorDailyRollup, BehaviorRecord, ClassRoom, SeatAssignment, SeatingPlan, Student,
+    StudentPointsSummary, StudentSubject, Subject, Teacher,
+)
+from behaviorpoints.models import BehaviorPoint
+
+
+def create_classroom(name, student_count, rows=25, columns=20, seated=None):
+    """Create a teacher with one classroom, an active plan and `student_count` enrolled students."""
+    teacher = User.objects.create(username=f'{name}_teacher', first_name='Test', last_name='Teacher')
+    teacher.groups.add(Group.objects.get_or_create(name='Teacher')[0])
+    subject = Subject.objects.create(name=f'{name} subject', teacher_name='Test Teacher')
+    classroom = ClassRoom.objects.create(name=name, subject=subject, teacher=teacher, rows=rows, columns=columns)
+    plan = SeatingPlan.objects.create(classroom=classroom, name='Active', is_active=True)
+
+    users = User.objects.bulk_create([
+        User(username=f'{name}_student{i}', first_name='Student', last_name=str(i))
+        for i in range(student_count)
+    ])
+    students = Student.objects.bulk_create([Student(user=user) for user in users])
+    StudentSubject.objects.bulk_create([StudentSubject(student=student, subject=subject) for student in students])
+
+    seated = student_count if seated is None else seated
+    SeatAssignment.objects.bulk_create([
+        SeatAssignment(seating_plan=plan, student=student, row=i // columns, column=i % columns)
+        for i, student in enumerate(students[:seated])
+    ])
+    behaviors = Behavior.objects.bulk_create([
+        Behavior(
+            student=student, subject=subject, behavior_type='positive' if i % 3 else 'negative',
+            description=f'Behavior {i}', points=(i % 7) - 2, recorded_by='Test Teacher',
+        )
+        for i, student in enumerate(students)
+    ])
+    record_behaviors(behaviors)
+    return teacher, classroom
+
+
+class SeatingPlanQueryCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def count_queries(self, teacher, classroom):
+        self.client.force_login(teacher)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('seatingPlan'), {'classroom': classroom.id})
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_query_count_is_flat_from_10_to_500_students(self):
+        small_teacher, small_classroom = create_classroom('small', 10, seated=8)
+        large_teacher, large_classroom = create_classroom('large', 500, seated=480)
+
+        small_queries, small_response = self.count_queries(small_teacher, small_classroom)
+        large_queries, large_response = self.count_queries(large_teacher, large_classroom)
+
+        self.assertEqual(small_queries, large_queries)
+        self.assertEqual(large_response.content.count(b'class="unassigned-student '), 20)
+        self.assertEqual(large_response.content.count(b'class="student-card"'), 480)
+        seating = build_seating_context(large_classroom)
+        self.assertEqual(len(seating['unassigned_students']), 20)
+        seated = [seat for row in seating['seat_grid'] for seat in row if seat['student']]
+        self.assertEqual(len(seated), 480)
+
+    def test_seat_grid_shows_ledger_points_and_recent_behavior(self):
+        teacher, classroom = create_classroom('grid', 4, rows=2, columns=2)
+        _, response = self.count_queries(teacher, classroom)
+
+        first_seat = build_seating_context(classroom)['seat_grid'][0][0]
+        self.assertEqual(first_seat['points'], -2)
+        self.assertEqual(first_seat['recent_behavior'], 'Behavior 0')
+        self.assertEqual(first_seat['category'], 'red')
+        self.assertContains(response, 'Last action: Behavior 0')
+
+    def test_rendered_grid_is_cached_until_something_changes(self):
+        teacher, classroom = create_classroom('fragments', 4, rows=2, columns=2, seated=3)
+        cold_queries, _ = self.count_queries(teacher, classroom)
+        warm_queries, _ = self.count_queries(teacher, classroom)
+        self.assertLess(warm_queries, cold_queries)
+
+        plan = classroom.seating_plans.get(is_active=True)
+        seated = plan.seat_assignments.order_by('row', 'column').first()
+        with self.captureOnCommitCallbacks(execute=True):
+            behavior = Behavior.objects.create(
+                student_id=seated.student_id, subject=classroom.subject, behavior_type='positive',
+                description='Tidied the room', points=1, recorded_by='Test Teacher',
+            )
+            record_behaviors([behavior])
+        _, response = self.count_queries(teacher, classroom)
+        self.assertContains(response, 'Last action: Tidied the room')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            seated.delete()
+        _, response = self.count_queries(teacher, classroom)
+        self.assertEqual(response.content.count(b'class="student-card"'), 2)
+
+
+class PointsLedgerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        create_classroom('ledger', 2, rows=1, columns=2)
+        self.student, self.other = Student.objects.filter(user__username__startswith='ledger_').order_by('id')
+
+    def add(self, student, points, description):
+        behavior = Behavior.objects.create(
+            student=student, behavior_type='positive' if points > 0 else 'negative',
+            description=description, points=points, recorded_by='Test Teacher',
+        )
+        record_behaviors([behavior])
+        return behavior
+
+    def summary(self, student):
+        summary = StudentPointsSummary.objects.get(student=student)
+        return summary.total, summary.positive_count, summary.negative_count, summary.last_description
+
+    def test_award_updates_the_summary(self):
+        total, positive, negative, _ = self.summary(self.student)
+        self.add(self.student, 3, 'Helped out')
+        self.add(self.student, -1, 'Late')
+        self.assertEqual(self.summary(self.student), (total + 2, positive + 1, negative + 1, 'Late'))
+        self.assertEqual(find_drift(), [])
+
+    def test_delete_and_reassign_recompute_the_summary(self):
+        before = self.summary(self.student)
+        other_before = self.summary(self.other)
+        behavior = self.add(self.student, 5, 'Misfiled')
+
+        Behavior.objects.filter(pk=behavior.pk).update(student=self.other)
+        refresh_students([self.student.id, self.other.id])
+        self.assertEqual(self.summary(self.student), before)
+        self.assertEqual(self.summary(self.other)[:3], (other_before[0] + 5, other_before[1] + 1, other_before[2]))
+
+        Behavior.objects.filter(pk=behavior.pk).delete()
+        refresh_students([self.other.id])
+        self.assertEqual(self.summary(self.other), other_before)
+        self.assertEqual(find_drift(), [])
+
+    def test_command_verifies_and_rebuilds(self):
+        StudentPointsSummary.objects.filter(student=self.other).update(total=999)
+
+        with self.assertRaisesMessage(CommandError, f'1 student summaries have drifted (ids: {self.other.id})'):
+            call_command('rebuild_points_summary', '--verify', stdout=StringIO())
+        call_command('rebuild_points_summary', '--chunk-size', '1', stdout=StringIO())
+        self.assertEqual(find_drift(), [])
+        call_command('rebuild_points_summary', '--verify', stdout=StringIO())
+
+
+class ClassroomBandsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_bands_are_cached_until_a_behavior_is_recorded(self):
+        _, classroom = create_classroom('bands', 4, rows=2, columns=2)
+        bands = classroom_bands(classroom)
+        self.assertEqual((bands['green_threshold'], bands['orange_threshold']), (0, -1))
+
+        with self.assertNumQueries(0):
+            classroom_bands(classroom)
+        weakest = min(bands['points'], key=bands['points'].get)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            behavior = Behavior.objects.create(
+                student_id=weakest, subject=classroom.subject, behavior_type='positive',
+                description='Turned it around', points=10, recorded_by='Test Teacher',
+            )
+            record_behaviors([behavior])
+
+        self.assertEqual(classroom_bands(classroom)['categories'][weakest], 'green')
+
+
+class BulkAwardPointsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_awards_everyone_seated_in_a_plan(self):
+        teacher, classroom = create_classroom('bulk', 6, rows=2, columns=3, seated=4)
+        plan = classroom.seating_plans.get(is_active=True)
+        self.client.force_login(teacher)
+
+        response = self.client.post(
+            reverse('bulk_award_points'),
+            {'classroom_id': classroom.id, 'seating_plan_id': plan.id, 'points': 3, 'reason': 'Great teamwork'},
+            content_type='application/json',
+        )
+
+        data = response.json()
+        self.assertTrue(data['success'])
+        self.assertEqual(len(data['students']), 4)
+        self.assertEqual(Behavior.objects.filter(description='Great teamwork', points=3).count(), 4)
+        seated_ids = set(plan.seat_assignments.values_list('student_id', flat=True))
+        for entry in data['students']:
+            self.assertIn(entry['student_id'], seated_ids)
+            summary = Student.objects.get(id=entry['student_id']).points_summary
+            self.assertEqual(entry['total_points'], summary.total)
+            self.assertEqual(summary.last_description, 'Great teamwork')
+        self.assertEqual(
+            Behavior.objects.filter(description='Great teamwork', classroom=classroom, teacher=teacher).count(), 4
+        )
+
+    def test_only_enrolled_students_in_own_classrooms(self):
+        teacher, classroom = create_classroom('bulk_own', 2, rows=1, columns=2)
+        other_teacher, other_classroom = create_classroom('bulk_foreign', 1, rows=1, columns=1)
+        enrolled = list(StudentSubject.objects.filter(
+            subject=classroom.subject
+        ).values_list('student_id', flat=True))
+        outsider = StudentSubject.objects.get(subject=other_classroom.subject).student_id
+        self.client.force_login(teacher)
+
+        def bulk(classroom_id, student_ids):
+            return self.client.post(
+                reverse('bulk_award_points'),
+                {'classroom_id': classroom_id, 'student_ids': student_ids, 'points': 2, 'reason': 'Checked'},
+                content_type='application/json',
+            )
+
+        self.assertEqual(bulk(other_classroom.id, [outsider]).status_code, 404)
+        data = bulk(classroom.id, enrolled + [outsider]).json()
+        self.assertEqual(sorted(entry['student_id'] for entry in data['students']), sorted(enrolled))
+        self.assertFalse(Behavior.objects.filter(student_id=outsider, description='Checked').exists())
+        self.assertFalse(bulk(classroom.id, [outsider]).json()['success'])
+
+        student_user = Student.objects.get(id=enrolled[0]).user
+        self.client.force_login(student_user)
+        self.assertEqual(bulk(classroom.id, enrolled).status_code, 403)
+        self.assertEqual(Behavior.objects.filter(description='Checked').count(), 2)
+
+
+class ApplyBehaviorActionsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher, self.classroom = create_classroom('queued', 3, rows=1, columns=3)
+        self.student_ids = list(StudentSubject.objects.filter(
+            subject=self.classroom.subject
+        ).order_by('student_id').values_list('student_id', flat=True))
+        self.client.force_login(self.teacher)
+
+    def action(self, student_id, points=2, action_type='award', **fields):
+        return {
+            'client_id': str(uuid.uuid4()), 'type': action_type, 'student_id': student_id,
+            'classroom_id': self.classroom.id, 'points': points, 'reason': 'Queued', **fields,
+        }
+
+    def flush(self, actions):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                reverse('apply_behavior_actions'), {'actions': actions}, content_type='application/json',
+            )
+
+    def test_batch_is_applied_once_and_retries_are_duplicates(self):
+        first, second = self.student_ids[:2]
+        actions = [
+            self.action(first), self.action(first, 3), self.action(second, 4, 'deduct'),
+        ]
+        before = totals_for([first, second])
+
+        data = self.flush(actions).json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['applied'], 3)
+        self.assertEqual([result['status'] for result in data['results']], ['applied'] * 3)
+        self.assertEqual(data['results'][1]['total_points'], before[first] + 5)
+        self.assertEqual(data['results'][2]['total_points'], before[second] - 4)
+        queued = Behavior.objects.filter(description='Queued', classroom=self.classroom, teacher=self.teacher)
+        self.assertEqual(sorted(queued.values_list('points', flat=True)), [-4, 2, 3])
+        self.assertEqual(queued.filter(behavior_type='negative').count(), 1)
+
+        retry = self.flush(actions + [actions[0]]).json()
+        self.assertEqual(retry['applied'], 0)
+        self.assertEqual([result['status'] for result in retry['results']], ['duplicate'] * 4)
+        self.assertEqual(retry['results'][1]['total_points'], before[first] + 5)
+        self.assertEqual(queued.count(), 3)
+        self.assertEqual(find_drift(), [])
+
+    def test_invalid_actions_are_rejected_without_blocking_the_rest(self):
+        other_teacher, other_classroom = create_classroom('queued_other', 1)
+        outsider = StudentSubject.objects.get(subject=other_classroom.subject).student_id
+        actions = [
+            self.action(self.student_ids[0]),
+            self.action(self.student_ids[0], classroom_id=other_classroom.id),
+            self.action(outsider),
+            self.action(self.student_ids[0], client_id='not-a-uuid'),
+            self.action(self.student_ids[0], points=0),
+            self.action(self.student_ids[0], action_type='pardon'),
+        ]
+
+        data = self.flush(actions).json()
+        self.assertEqual(
+            [result['status'] for result in data['results']], ['applied'] + ['rejected'] * 5,
+        )
+        self.assertEqual(data['results'][3]['client_id'], 'not-a-uuid')
+        self.assertEqual(Behavior.objects.filter(description='Queued').count(), 1)
+
+        self.assertEqual(self.flush([]).status_code, 400)
+        self.client.force_login(other_teacher)
+        self.assertEqual(self.flush([self.action(self.student_ids[0])]).json()['results'][0]['error'], 'Classroom not found')
+
+
+class RandomizeSeatingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_reseats_everyone_and_returns_the_seat_map(self):
+        teacher, classroom = create_classroom('shuffle', 7, rows=2, columns=3, seated=2)
+        self.client.force_login(teacher)
+
+        response = self.client.post(
+            reverse('randomize_seating'), {'classroom_id': classroom.id}, content_type='application/json',
+        )
+
+        seating = response.json()['seating']
+        plan = classroom.seating_plans.get(is_active=True)
+        self.assertEqual(seating['seating_plan_id'], plan.id)
+        self.assertEqual(len(seating['seats']), 6)
+        self.assertEqual(len(seating['unassigned']), 1)
+        self.assertEqual(plan.seat_assignments.count(), 6)
+        positions = {(seat['row'], seat['column']) for seat in seating['seats']}
+        self.assertEqual(positions, {(row, column) for row in range(2) for column in range(3)})
+
+
+class SeatAssignmentTests(TestCase):
+    def test_two_students_cannot_share_a_seat(self):
+        _, classroom = create_classroom('shared_seat', 2, rows=1, columns=2, seated=1)
+        plan = classroom.seating_plans.get(is_active=True)
+        seated = plan.seat_assignments.get()
+        unseated = Student.objects.exclude(id=seated.student_id).get(subjects__subject=classroom.subject)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            SeatAssignment.objects.create(seating_plan=plan, student=unseated, row=seated.row, column=seated.column)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            SeatAssignment.objects.create(seating_plan=plan, student=seated.student, row=0, column=1)
+        SeatAssignment.objects.create(seating_plan=plan, student=unseated, row=0, column=1)
+
+
+class SavedSeatingPlanTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_save_then_restore_round_trips_the_layout(self):
+        teacher, classroom = create_classroom('saved', 6, rows=2, columns=3, seated=4)
+        active_plan = classroom.seating_plans.get(is_active=True)
+        original = set(active_plan.seat_assignments.values_list('student_id', 'row', 'column'))
+        self.client.force_login(teacher)
+
+        saved = self.client.post(
+            reverse('save_seating_plan'), {'classroom_id': classroom.id, 'plan_name': 'Exams'},
+            content_type='application/json',
+        ).json()
+        saved_plan = SeatingPlan.objects.get(id=saved['seating_plan_id'])
+        self.assertEqual(set(saved_plan.seat_assignments.values_list('student_id', 'row', 'column')), original)
+
+        active_plan.seat_assignments.all().delete()
+        restored = self.client.post(
+            reverse('restore_seating_plan'), {'classroom_id': classroom.id, 'seating_plan_id': saved_plan.id},
+            content_type='application/json',
+        ).json()
+
+        self.assertTrue(restored['success'])
+        self.assertEqual(len(restored['seating']['seats']), 4)
+        self.assertEqual(set(active_plan.seat_assignments.values_list('student_id', 'row', 'column')), original)
+        self.assertEqual(saved_plan.seat_assignments.count(), 4)
+
+    def test_only_the_owning_teacher_can_restore(self):
+        teacher, classroom = create_classroom('restore_own', 2, rows=1, columns=2)
+        other_teacher, _ = create_classroom('restore_foreign', 1, rows=1, columns=1)
+        active_plan = classroom.seating_plans.get(is_active=True)
+        saved_plan = SeatingPlan.objects.create(classroom=classroom, name='Empty')
+
+        def restore():
+            return self.client.post(
+                reverse('restore_seating_plan'), {'classroom_id': classroom.id, 'seating_plan_id': saved_plan.id},
+                content_type='application/json',
+            )
+
+        self.client.force_login(active_plan.seat_assignments.first().student.user)
+        self.assertEqual(restore().status_code, 403)
+        self.client.force_login(other_teacher)
+        self.assertEqual(restore().status_code, 404)
+        self.assertEqual(active_plan.seat_assignments.count(), 2)
+
+        self.client.force_login(teacher)
+        self.assertTrue(restore().json()['success'])
+        self.assertEqual(active_plan.seat_assignments.count(), 0)
+
+    def test_copy_is_one_read_and_one_insert(self):
+        _, classroom = create_classroom('copy', 40, rows=5, columns=8)
+        source = classroom.seating_plans.get(is_active=True)
+        target = SeatingPlan.objects.create(classroom=classroom, name='Snapshot')
+
+        with self.assertNumQueries(2):
+            copied = copy_assignments(source, target)
+
+        self.assertEqual(copied, 40)
+
+
+@override_settings(TIME_ZONE='America/New_York')
+class MonthlyPointsTests(TestCase):
+    def test_groups_by_school_calendar_month_in_one_query(self):
+        _, classroom = create_classroom('monthly', 3, rows=1, columns=3)
+        behaviors = Behavior.objects.filter(subject=classroom.subject)
+        # 03:00 UTC on 1 March is still February in New York
+        behaviors.filter(behavior_type='negative').update(recorded_at=datetime(2025, 3, 1, 3, tzinfo=dt_timezone.utc))
+        behaviors.filter(behavior_type='positive').update(recorded_at=datetime(2025, 3, 15, 12, tzinfo=dt_timezone.utc))
+        refresh_students(behaviors.values_list('student_id', flat=True))
+
+        start, end = recent_months_range(3, now=datetime(2025, 4, 10, tzinfo=dt_timezone.utc))
+        with self.assertNumQueries(1):
+            series = monthly_points(BehaviorDailyRollup.objects.filter(subject=classroom.subject), start, end)
+
+        self.assertEqual([month['month'] for month in series], ['Feb', 'Mar', 'Apr'])
+        self.assertEqual((series[0]['negative'], series[0]['negative_count']), (2, 1))
+        self.assertEqual((series[1]['positive_count'], series[1]['net']), (2, -1))
+        self.assertEqual(series[2]['net'], 0)
+        self.assertEqual(timezone.localtime(start).hour, 0)
+
+
+class StudentRankTests(TestCase):
+    def test_rank_counts_students_ahead_within_a_scope(self):
+        # Points per student cycle through -2, -1, 0, 1, 2, 3, 4
+        _, classroom = create_classroom('rank', 7, rows=1, columns=7)
+        create_classroom('other', 3, rows=1, columns=3)
+        students = list(StudentSubject.objects.filter(
+            subject=classroom.subject
+        ).order_by('student_id').values_list('student_id', flat=True))
+        # A student with no behaviors yet has no summary row and counts as 0 points
+        Student.objects.create(user=User.objects.create(username='newcomer'))
+
+        self.assertEqual(student_rank(students[6], classroom.subject_id), (1, 7))
+        self.assertEqual(student_rank(students[2], classroom.subject_id), (5, 7))
+        self.assertEqual(student_rank(students[0], classroom.subject_id), (7, 7))
+        # School-wide, including students from other classes and the newcomer
+        totals = totals_for(Student.objects.values_list('id', flat=True))
+        for student_id in students + [max(totals)]:
+            expected = sum(1 for total in totals.values() if total > totals[student_id]) + 1
+            self.assertEqual(student_rank(student_id), (expected, len(totals)))
+        with self.assertNumQueries(3):
+            student_rank(students[1])
+
+
+class TeacherDashboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_dashboard_is_grouped_cached_and_invalidated_by_behaviors(self):
+        teacher, first = create_classroom('dash_a', 10, rows=2, columns=5)
+        _, second = create_classroom('dash_b', 30, rows=5, columns=6)
+        ClassRoom.objects.filter(id=second.id).update(teacher=teacher)
+        classrooms = list(ClassRoom.objects.filter(teacher=teacher).order_by('id'))
+
+        with self.assertNumQueries(2):
+            dashboard = teacher_dashboard(teacher, classrooms)
+        self.assertEqual(dashboard['total_students'], 40)
+        self.assertEqual(set(dashboard['class_behavior_scores']), {'dash_a', 'dash_b'})
+        self.assertEqual(dashboard['students_requiring_attention'], [])
+
+        with self.assertNumQueries(0):
+            teacher_dashboard(teacher, classrooms)
+
+        student_id = second.subject.studentsubject_set.values_list('student_id', flat=True).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            behavior = Behavior.objects.create(
+                student_id=student_id, subject=second.subject, behavior_type='negative',
+                description='Refused to work', points=-10, recorded_by='Test Teacher',
+            )
+            record_behaviors([behavior])
+
+        attention = teacher_dashboard(teacher, classrooms)['students_requiring_attention']
+        self.assertEqual([(row['id'], row['class'], row['points']) for row in attention],
+                         [(student_id, 'dash_b', -12)])
+
+    def test_teacher_profile_renders_dashboard(self):
+        teacher, classroom = create_classroom('dash_view', 5, rows=1, columns=5)
+        Teacher.objects.create(user=teacher)
+        self.client.force_login(teacher)
+
+        response = self.client.get(reverse('teacher_profile'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_students'], 5)
+        self.assertIn(classroom.name, response.context['class_behavior_scores'])
+        self.assertEqual(len(response.context['chart_data'][0]['data']), 10)
+        self.assertEqual(len(response.context['radar_data'][0]['data']), len(RADAR_AXES))
+
+    def test_charts_come_from_one_cached_pass(self):
+        teacher, classroom = create_classroom('charts', 4, rows=1, columns=4)
+        StudentSubject.objects.filter(subject=classroom.subject).update(grade=Decimal('80'))
+        now = timezone.now()
+        Assignment.objects.bulk_create([
+            Assignment(classroom=classroom, title='Past, closed', due_date=now - timedelta(days=2), is_active=False),
+            Assignment(classroom=classroom, title='Past, open', due_date=now - timedelta(days=1)),
+            Assignment(classroom=classroom, title='Upcoming', due_date=now + timedelta(days=3)),
+        ])
+
+        with self.assertNumQueries(3):
+            charts = teacher_charts(teacher, [classroom], months=3)
+        behaviors = Behavior.objects.filter(subject=classroom.subject)
+        net = sum(behaviors.values_list('points', flat=True))
+        positive = behaviors.filter(behavior_type='positive').count()
+        self.assertEqual(len(charts['months']), 3)
+        self.assertEqual(charts['trend'][classroom.id][-1], round(behavior_score(net / 4)))
+        self.assertEqual(charts['radar'][classroom.id], [
+            round(behavior_score(net / 4)), round(100 * positive / behaviors.count()), 80, 50,
+        ])
+        self.assertEqual(charts['pending_assessments'], 1)
+
+        with self.assertNumQueries(0):
+            teacher_charts(teacher, [classroom], months=3)
+        with self.captureOnCommitCallbacks(execute=True):
+            Assignment.objects.filter(title='Past, open').update(is_active=False)
+            Assignment.objects.get(title='Past, open').save()
+        self.assertEqual(teacher_charts(teacher, [classroom], months=3)['radar'][classroom.id][3], 100)
+
+
+class IndexTests(TestCase):
+    def test_hot_queries_avoid_full_table_scans(self):
+        create_classroom('explain', 5, rows=1, columns=5)
+        out = StringIO()
+        call_command('explain_queries', '--fail-on-scan', stdout=out)
+        self.assertIn('No full table scans', out.getvalue())
+
+    def test_only_one_active_plan_per_classroom(self):
+        _, classroom = create_classroom('active', 1, rows=1, columns=1)
+        SeatingPlan.objects.create(classroom=classroom, name='Saved', is_active=False)
+        with self.assertRaises(IntegrityError):
+            SeatingPlan.objects.create(classroom=classroom, name='Second', is_active=True)
+
+
+class LiveUpdatesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+    def subscribe(self, classroom):
+        subscription = broadcaster.subscribe(classroom_channel(classroom.id), loop=self.loop)
+        self.addCleanup(broadcaster.unsubscribe, subscription)
+        return subscription
+
+    def next_event(self, subscription):
+        return self.loop.run_until_complete(asyncio.wait_for(subscription.get(), 1))
+
+    def test_award_pushes_new_total_to_open_classroom(self):
+        teacher, classroom = create_classroom('live_points', 4, rows=2, columns=2)
+        student_id = classroom.subject.studentsubject_set.values_list('student_id', flat=True).first()
+        subscription = self.subscribe(classroom)
+        self.client.force_login(teacher)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('award_points'), {
+                'student_id': student_id, 'classroom_id': classroom.id, 'points': 5, 'reason': 'Helpful',
+            })
+
+        event = self.next_event(subscription)
+        self.assertEqual(event['type'], 'points')
+        self.assertEqual(event['description'], 'Helpful')
+        self.assertEqual(event['students'], [{'student_id': student_id, 'total_points': 3, 'category': 'green'}])
+
+    def test_unassign_pushes_the_student_card(self):
+        teacher, classroom = create_classroom('live_seat', 2, rows=1, columns=2)
+        plan = classroom.seating_plans.get(is_active=True)
+        student_id = plan.seat_assignments.values_list('student_id', flat=True).first()
+        subscription = self.subscribe(classroom)
+        self.client.force_login(teacher)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('unassign_student'), {'student_id': student_id, 'seating_plan_id': plan.id},
+                content_type='application/json',
+            )
+
+        event = self.next_event(subscription)
+        self.assertEqual(event['type'], 'unassign')
+        self.assertEqual(event['student'], response.json()['student'])
+        self.assertEqual(event['student']['student_id'], student_id)
+
+    def test_stream_needs_an_asgi_server(self):
+        teacher, classroom = create_classroom('live_wsgi', 1, rows=1, columns=1)
+        self.client.force_login(teacher)
+        response = self.client.get(reverse('seating_events'), {'classroom': classroom.id})
+        self.assertEqual(response.status_code, 204)
+
+
+class ClassroomSeatingApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def get(self, classroom, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(reverse('classroom_seating', args=[classroom.id]), **headers)
+
+    def test_conditional_get_until_points_or_seats_change(self):
+        teacher, classroom = create_classroom('api', 3, rows=1, columns=3, seated=2)
+        plan = classroom.seating_plans.get(is_active=True)
+        self.client.force_login(teacher)
+
+        response = self.get(classroom)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()['rows'], response.json()['columns']), (1, 3))
+        self.assertEqual(len(response.json()['seats']), 2)
+        etag = response['ETag']
+        self.assertEqual(self.get(classroom, etag).status_code, 304)
+
+        student_id = plan.seat_assignments.values_list('student_id', flat=True).first()
+        self.client.post(reverse('award_points'), {
+            'student_id': student_id, 'classroom_id': classroom.id, 'points': 2, 'reason': 'Kind',
+        })
+        response = self.get(classroom, etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        self.client.post(
+            reverse('unassign_student'), {'student_id': student_id, 'seating_plan_id': plan.id},
+            content_type='application/json',
+        )
+        response = self.get(classroom, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['seats']), 1)
+
+    def test_seat_and_name_changes_made_outside_the_views_change_the_etag(self):
+        teacher, classroom = create_classroom('api_orm', 2, rows=1, columns=3, seated=1)
+        seat = classroom.seating_plans.get(is_active=True).seat_assignments.get()
+        self.client.force_login(teacher)
+        etag = self.get(classroom)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            seat.column = 2
+            seat.save()
+        response = self.get(classroom, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['seats'][0]['column'], 2)
+        etag = response['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            seat.student.user.first_name = 'Renamed'
+            seat.student.user.save()
+        response = self.get(classroom, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Renamed', json.dumps(response.json()['seats']))
+
+    def test_other_teachers_classrooms_are_hidden(self):
+        _, classroom = create_classroom('api_private', 1, rows=1, columns=1)
+        intruder, _ = create_classroom('api_intruder', 1, rows=1, columns=1)
+        self.client.force_login(intruder)
+        self.assertEqual(self.get(classroom).status_code, 404)
+
+
+class SyntheticSchoolTests(TestCase):
+    def build(self, prefix):
+        return build_school(
+            teachers=2, students=12, behaviors=90, subjects_per_student=2, saved_plans=1,
+            history_days=30, prefix=prefix, seed=7,
+        )
+
+    def test_builds_requested_scale_with_a_consistent_ledger(self):
+        counts = self.build('synth_')
+
+        self.assertEqual((counts['teachers'], counts['students'], counts['classrooms']), (2, 12, 4))
+        self.assertEqual(Behavior.objects.filter(student__user__username__startswith='synth_').count(), 90)
+        self.assertEqual(find_drift(), [])
+        classroom = ClassRoom.objects.filter(teacher__username='synth_teacher1').first()
+        self.assertEqual(len(build_seating_context(classroom)['unassigned_students']), 0)
+        self.assertTrue(User.objects.get(username='synth_student1').check_password('password123'))
+
+    def test_builds_exact_classroom_and_subject_counts(self):
+        counts = build_school(
+            teachers=2, students=10, behaviors=40, classrooms=5, subjects=2, subjects_per_student=2,
+            saved_plans=0, prefix='exact_',
+        )
+        self.assertEqual((counts['classrooms'], counts['subjects']), (5, 2))
+        classrooms = ClassRoom.objects.filter(teacher__username__startswith='exact_')
+        self.assertEqual(
+            sorted(classrooms.values_list('teacher__username', flat=True)),
+            ['exact_teacher1'] * 3 + ['exact_teacher2'] * 2,
+        )
+        self.assertEqual(classrooms.values('subject').distinct().count(), 2)
+        self.assertEqual(find_drift(), [])
+
+        with self.assertRaises(ValueError):
+            build_school(teachers=1, students=1, behaviors=0, classrooms=1, subjects=0, prefix='none_')
+
+    def test_same_seed_builds_the_same_school(self):
+        def snapshot(prefix):
+            return sorted(
+                (username[len(prefix):], points)
+                for username, points in Behavior.objects.filter(
+                    student__user__username__startswith=prefix
+                ).values_list('student__user__username', 'points')
+            )
+
+        self.build('first_')
+        self.build('second_')
+        self.assertEqual(snapshot('first_'), snapshot('second_'))
+
+    def test_populate_sample_data_bulk_mode(self):
+        out = StringIO()
+        call_command(
+            'populate_sample_data', '--bulk', '--teachers', '2', '--classrooms', '3', '--students', '20',
+            '--behaviors', '200', '--prefix', 'load_', stdout=out,
+        )
+
+        classrooms = ClassRoom.objects.filter(teacher__username__startswith='load_')
+        self.assertEqual(classrooms.count(), 3)
+        self.assertEqual(classrooms.values('subject').distinct().count(), 3)
+        self.assertIn('5 subjects, 3 classrooms', out.getvalue())
+        self.assertEqual(Behavior.objects.filter(student__user__username__startswith='load_').count(), 200)
+        self.assertEqual(find_drift(), [])
+        self.assertIn('load_teacher1/password123', out.getvalue())
+
+
+class RequestMetricsMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher, self.classroom = create_classroom('metrics', 3, rows=1, columns=3)
+        self.client.force_login(self.teacher)
+
+    def test_reports_queries_and_timing(self):
+        with self.assertLogs('authentication.requests', 'INFO') as logs:
+            response = self.client.get(reverse('classroom_seating', args=[self.classroom.id]))
+
+        self.assertRegex(response['Server-Timing'], r'total;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries", app;dur=')
+        line = json.loads(logs.records[-1].getMessage())
+        self.assertEqual((line['view'], line['status']), ('classroom_seating', 200))
+        self.assertGreater(line['queries'], 0)
+        self.assertEqual(line['bytes'], len(response.content))
+
+    def test_query_budget(self):
+        url = reverse('classroom_seating', args=[self.classroom.id])
+        with override_settings(QUERY_BUDGETS={'classroom_seating': 1}):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(url)
+            with override_settings(QUERY_BUDGET_STRICT=False), \
+                    self.assertLogs('authentication.requests', 'WARNING') as logs:
+                self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertIn('over its budget of 1', logs.output[0])
+
+    def test_cold_requests_fit_their_budgets(self):
+        student = Student.objects.filter(subjects__subject=self.classroom.subject).first()
+        student.user.groups.add(Group.objects.get_or_create(name='Student')[0])
+        requests = [
+            (student.user, reverse('student_behavior_history'), {}),
+            (self.teacher, reverse('teacher_profile'), {}),
+            (self.teacher, reverse('graph_dataset'), {'classroom': self.classroom.id}),
+        ]
+        for user, url, params in requests:
+            # A fresh session resolves roles again, like the first request after ROLES_TTL
+            cache.clear()
+            self.client.force_login(user)
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url, params).status_code, 200)
+
+    async def test_counts_queries_under_asgi(self):
+        await self.async_client.aforce_login(self.teacher)
+        # Both a sync view and an async view, each through the ASGI handler
+        for url in (
+            reverse('classroom_seating', args=[self.classroom.id]),
+            reverse('get_student_profile') + f'?student_id={await self.first_student_id()}',
+        ):
+            response = await self.async_client.get(url)
+            self.assertEqual(response.status_code, 200)
+            queries = int(re.search(r'desc="(\d+) queries"', response['Server-Timing']).group(1))
+            self.assertGreater(queries, 0)
+
+        with override_settings(QUERY_BUDGETS={'get_student_profile': 1}):
+            with self.assertRaises(QueryBudgetExceeded):
+                await self.async_client.get(url)
+
+    @sync_to_async
+    def first_student_id(self):
+        return StudentSubject.objects.filter(subject=self.classroom.subject).values_list('student_id', flat=True)[0]
+
+
+class GenerationTests(TestCase):
+    def test_bumps_write_new_generations_on_the_file_cache(self):
+        with tempfile.TemporaryDirectory() as location, override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location},
+        }):
+            seen = {get_generation('subject', 1)}
+            for _ in range(3):
+                with self.captureOnCommitCallbacks(execute=True):
+                    bump_generation('subject', 1, 2)
+                seen.add(get_generation('subject', 1))
+            self.assertEqual(len(seen), 4)
+            self.assertNotIn(get_generation('subject', 2), seen)
+
+
+class RoleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher, _ = create_classroom('roles', 1, rows=1, columns=1)
+        self.client.force_login(self.teacher)
+
+    def group_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        return response, [query['sql'] for query in queries if 'auth_group' in query['sql']]
+
+    def test_roles_are_resolved_once_per_session(self):
+        response, first = self.group_queries(reverse('teacher_faq'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(first)
+
+        response, second = self.group_queries(reverse('teacher_faq'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(second, [])
+
+    def test_group_changes_invalidate_cached_roles(self):
+        self.assertEqual(self.client.get(reverse('teacher_faq')).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.teacher.groups.clear()
+        self.assertRedirects(
+            self.client.get(reverse('teacher_faq')), reverse('login'), fetch_redirect_response=False,
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Group.objects.get(name='Student').user_set.add(self.teacher)
+        self.assertEqual(self.client.get(reverse('student_profile')).status_code, 200)
+
+    def test_roles_expire_without_a_generation_bump(self):
+        self.assertEqual(self.client.get(reverse('teacher_faq')).status_code, 200)
+
+        # A bulk delete sends no signal, like a change another worker's cache never heard of
+        User.groups.through.objects.filter(user=self.teacher).delete()
+        self.assertEqual(self.client.get(reverse('teacher_faq')).status_code, 200)
+        with patch('authentication.roles.time.time', return_value=time.time() + ROLES_TTL):
+            self.assertRedirects(
+                self.client.get(reverse('teacher_faq')), reverse('login'), fetch_redirect_response=False,
+            )
+
+    def test_login_redirects_by_role(self):
+        self.teacher.set_password('secret-pass-1')
+        self.teacher.save()
+        self.client.logout()
+        response = self.client.post(reverse('login'), {'username': 'roles_teacher', 'password': 'secret-pass-1'})
+        self.assertRedirects(response, reverse('teacher_profile'), fetch_redirect_response=False)
+
+
+class BehaviorExportTests(TestCase):
+    def setUp(self):
+        self.teacher, self.classroom = create_classroom('export', 3, rows=1, columns=3)
+        students = list(Student.objects.filter(subjects__subject=self.classroom.subject_id).order_by('id'))
+        self.behaviors = Behavior.objects.bulk_create([
+            Behavior(student=student, subject_id=self.classroom.subject_id, behavior_type='positive',
+                     description=f'Helpful, "kind" #{n}', points=n + 1, recorded_by='Test Teacher')
+            for n, student in enumerate(students * 2)
+        ])
+        self.expected_ids = list(Behavior.objects.filter(
+            subject_id=self.classroom.subject_id
+        ).order_by('id').values_list('id', flat=True))
+        self.client.force_login(self.teacher)
+
+    def export(self, **params):
+        response = self.client.get(reverse('export_behaviors'), params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_export_resumes_after_last_id(self):
+        rows = list(csv.DictReader(self.export(classroom=self.classroom.id).splitlines()))
+        self.assertEqual([int(row['id']) for row in rows], self.expected_ids)
+        self.assertEqual(rows[3]['description'], 'Helpful, "kind" #0')
+        self.assertEqual(rows[3]['username'], 'export_student0')
+
+        resumed = list(csv.DictReader(self.export(classroom=self.classroom.id, after_id=rows[3]['id']).splitlines()))
+        self.assertEqual([row['id'] for row in resumed], [row['id'] for row in rows[4:]])
+
+    def test_jsonl_export_and_filters(self):
+        lines = self.export(format='jsonl', subject=self.classroom.subject_id, start=timezone.localdate().isoformat())
+        records = [json.loads(line) for line in lines.splitlines()]
+        self.assertEqual(len(records), 9)
+        self.assertEqual(records[-1]['points'], 6)
+
+        self.assertEqual(self.export(classroom=self.classroom.id, end='2000-01-01').splitlines()[1:], [])
+
+    async def test_streams_asynchronously_under_asgi(self):
+        await self.async_client.aforce_login(self.teacher)
+        response = await self.async_client.get(
+            reverse('export_behaviors'), {'classroom': self.classroom.id, 'format': 'jsonl'},
+        )
+        self.assertTrue(response.is_async)
+        lines = [line async for line in response.streaming_content]
+        self.assertEqual([json.loads(line)['id'] for line in lines], self.expected_ids)
+
+        # Chunks continue from the last id of the previous one
+        rows = aexport_rows({self.classroom.subject_id}, after_id=self.expected_ids[0], chunk_size=2)
+        self.assertEqual([row[0] async for row in rows], self.expected_ids[1:])
+
+    def test_teachers_only_export_their_own_subjects(self):
+        _, other = create_classroom('export_other', 1, rows=1, columns=1)
+        response = self.client.get(reverse('export_behaviors'), {'classroom': other.id})
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('export_behaviors'), {'subject': other.subject_id})
+        self.assertEqual(response.status_code, 404)
+
+    def test_export_command(self):
+        out = StringIO()
+        call_command('export_behaviors', '--format', 'jsonl', '--classroom', str(self.classroom.id), stdout=out)
+        self.assertEqual(
+            [json.loads(line)['id'] for line in out.getvalue().splitlines()],
+            self.expected_ids,
+        )
+
+
+class ImportRosterTests(TestCase):
+    def import_csv(self, text, *args):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as roster:
+            roster.write(text)
+        self.addCleanup(os.remove, roster.name)
+        out = StringIO()
+        call_command('import_roster', roster.name, *args, stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def test_import_then_reimport_upserts(self):
+        roster = (
+            'username,first_name,last_name,email,subject,grade\n'
+            'roster_amy,Amy,Adams,amy@example.com,Roster Maths,71.5\n'
+            'roster_amy,Amy,Adams,amy@example.com,Roster Art,\n'
+            'roster_ben,Ben,Brown,,Roster Maths,88\n'
+        )
+        output = self.import_csv(roster, '--batch-size', '2', '--password', 'roster-pass-1')
+        self.assertIn('Users: 2 created, 0 updated', output)
+
+        amy = Student.objects.get(user__username='roster_amy')
+        self.assertEqual(
+            sorted(amy.subjects.values_list('subject__name', 'grade')),
+            [('Roster Art', None), ('Roster Maths', Decimal('71.5'))],
+        )
+        self.assertTrue(amy.user.check_password('roster-pass-1'))
+        self.assertTrue(amy.user.groups.filter(name='Student').exists())
+
+        output = self.import_csv(roster.replace('71.5', '90').replace('Amy,Adams', 'Amy,Archer'))
+        self.assertIn('Users: 0 created, 2 updated', output)
+        amy.refresh_from_db()
+        self.assertEqual(amy.user.last_name, 'Archer')
+        self.assertEqual(StudentSubject.objects.filter(student__user__username__startswith='roster_').count(), 3)
+        self.assertEqual(amy.subjects.get(subject__name='Roster Maths').grade, Decimal('90'))
+        self.assertEqual(Subject.objects.filter(name='Roster Maths').count(), 1)
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        with self.assertRaisesMessage(CommandError, '2 invalid rows were skipped'):
+            self.import_csv(
+                'username,email,grade\n'
+                'roster_ok,ok@example.com,50\n'
+                'bad name,,\n'
+                'roster_grade,,150\n'
+            )
+        self.assertEqual(list(User.objects.filter(username__startswith='roster_').values_list('username', flat=True)), ['roster_ok'])
+
+
+class CanonicalBehaviorTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher_user, self.classroom = create_classroom('canon', 2)
+        self.student = Student.objects.filter(user__username='canon_student0').get()
+        self.start_total = totals_for([self.student.id])[self.student.id]
+
+    def test_behavior_record_writes_canonical_event_and_ledger(self):
+        record = BehaviorRecord.objects.create(
+            student=self.student, teacher=self.teacher_user, classroom=self.classroom,
+            description='Helped a classmate', points=4,
+        )
+
+        behavior = Behavior.objects.get(pk=record.pk)
+        self.assertEqual(behavior.behavior_type, 'positive')
+        self.assertEqual(behavior.subject, self.classroom.subject)
+        self.assertEqual(behavior.recorded_by, 'Test Teacher')
+        self.assertEqual(totals_for([self.student.id])[self.student.id], self.start_total + 4)
+        self.assertEqual(find_drift(), [])
+
+    def test_behavior_point_accepts_legacy_fields(self):
+        point = BehaviorPoint.objects.create(
+            student=self.student.user, teacher=self.teacher_user, classroom='canon',
+            reason='Talking', points=-2,
+        )
+
+        behavior = Behavior.objects.get(pk=point.pk)
+        self.assertEqual(behavior.student, self.student)
+        self.assertEqual(behavior.classroom, self.classroom)
+        self.assertEqual((behavior.behavior_type, behavior.description), ('negative', 'Talking'))
+        self.assertEqual(point.reason, 'Talking')
+        self.student.points_summary.refresh_from_db()
+        self.assertEqual(self.student.points_summary.last_description, 'Talking')
+        self.assertEqual(totals_for([self.student.id])[self.student.id], self.start_total - 2)
+
+    def test_behavior_point_rejects_users_who_are_not_students(self):
+        with self.assertRaisesMessage(ValueError, f'User {self.teacher_user.pk} is not a student'):
+            BehaviorPoint.objects.create(student=self.teacher_user, teacher=self.teacher_user, reason='Talking', points=-2)
+        self.assertFalse(Student.objects.filter(user=self.teacher_user).exists())
+
+    def test_admin_reassignment_refreshes_both_students(self):
+        other = Student.objects.get(user__username='canon_student1')
+        other_total = totals_for([other.id])[other.id]
+        point = BehaviorPoint.objects.create(
+            student=self.student, teacher=self.teacher_user, classroom=self.classroom,
+            description='Misfiled', points=5,
+        )
+        admin_user = User.objects.create_superuser('canon_admin', 'admin@example.com', 'secret-pass-1')
+        self.client.force_login(admin_user)
+
+        response = self.client.post(reverse('admin:behaviorpoints_behaviorpoint_change', args=[point.pk]), {
+            'student': other.id, 'subject': self.classroom.subject_id, 'classroom': self.classroom.id,
+            'behavior_type': 'positive', 'description': 'Misfiled', 'points': 5,
+        })
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Behavior.objects.get(pk=point.pk).student, other)
+        self.assertEqual(
+            totals_for([self.student.id, other.id]),
+            {self.student.id: self.start_total, other.id: other_total + 5},
+        )
+        self.assertEqual(find_drift(), [])
+        self.assertEqual(rollups.find_drift(), [])
+
+
+class BehaviorRollupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_incremental_rollups_match_a_rebuild(self):
+        teacher, classroom = create_classroom('rollup', 4, rows=2, columns=2)
+        plan = classroom.seating_plans.get(is_active=True)
+        self.client.force_login(teacher)
+        for _ in range(2):
+            self.client.post(
+                reverse('bulk_award_points'),
+                {'classroom_id': classroom.id, 'seating_plan_id': plan.id, 'points': 2, 'reason': 'Focus'},
+                content_type='application/json',
+            )
+        student = plan.seat_assignments.first().student
+        rollup = BehaviorDailyRollup.objects.get(student=student, subject=classroom.subject, day=timezone.localdate())
+        before = (rollup.positive_points, rollup.negative_points, rollup.negative_count)
+        self.client.post(reverse('deduct_points'), {
+            'student_id': student.id, 'points': 3, 'reason': 'Talking', 'classroom_id': classroom.id,
+        })
+
+        rollup.refresh_from_db()
+        self.assertEqual(
+            (rollup.positive_points, rollup.negative_points, rollup.negative_count),
+            (before[0], before[1] - 3, before[2] + 1),
+        )
+        self.assertEqual(rollups.find_drift(), [])
+
+        Behavior.objects.filter(student=student, description='Talking').delete()
+        refresh_students([student.id])
+        rollup = BehaviorDailyRollup.objects.get(student=student, subject=classroom.subject, day=rollup.day)
+        self.assertEqual((rollup.positive_points, rollup.negative_points, rollup.negative_count), before)
+        self.assertEqual(rollups.find_drift(), [])
+
+    def test_first_writes_of_a_day_share_one_rollup(self):
+        student = Student.objects.create(user=User.objects.create(username='rollup_first'))
+        # An empty rollup a concurrent first write just inserted is added to, not inserted again
+        BehaviorDailyRollup.objects.create(student=student, day=timezone.localdate())
+        for points in (2, 3):
+            rollups.record([Behavior.objects.create(
+                student=student, behavior_type='positive', description='First', points=points, recorded_by='Test',
+            )])
+
+        rollup = BehaviorDailyRollup.objects.get(student=student)
+        self.assertEqual((rollup.subject, rollup.positive_points, rollup.positive_count), (None, 5, 2))
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            BehaviorDailyRollup.objects.create(student=student, day=rollup.day)
+
+    def test_command_verifies_and_repairs_drift(self):
+        create_classroom('rollup_cmd', 3)
+        drifted = BehaviorDailyRollup.objects.filter(student__user__username='rollup_cmd_student1')
+        drifted.update(positive_points=99)
+
+        with self.assertRaisesMessage(CommandError, '1 students have drifted rollups'):
+            call_command('rebuild_behavior_rollups', '--verify', stdout=StringIO())
+        call_command('rebuild_behavior_rollups', '--repair', stdout=StringIO())
+        self.assertEqual(rollups.find_drift(), [])
+
+        BehaviorDailyRollup.objects.all().delete()
+        call_command('rebuild_behavior_rollups', '--chunk-size', '2', stdout=StringIO())
+        self.assertEqual(rollups.find_drift(), [])
+        self.assertTrue(drifted.exists())
+
+
+class AsyncEndpointTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher, self.classroom = create_classroom('async', 2, rows=1, columns=2, seated=1)
+        self.plan = self.classroom.seating_plans.get(is_active=True)
+        self.student = Student.objects.get(user__username='async_student1')
+        self.start_total = totals_for([self.student.id])[self.student.id]
+
+    async def test_json_endpoints_under_asgi(self):
+        await self.async_client.aforce_login(self.teacher)
+
+        response = await self.async_client.post(reverse('award_points'), {
+            'student_id': self.student.id, 'classroom_id': self.classroom.id, 'points': 5, 'reason': 'Kindness',
+        })
+        self.assertEqual(response.json()['total_points'], self.start_total + 5)
+        behavior = await Behavior.objects.aget(id=response.json()['behavior_id'])
+        self.assertEqual((behavior.teacher_id, behavior.classroom_id), (self.teacher.id, self.classroom.id))
+
+        response = await self.async_client.post(reverse('deduct_points'), {
+            'student_id': self.student.id, 'classroom_id': self.classroom.id, 'points': 2, 'reason': 'Late',
+        })
+        self.assertEqual(response.json()['total_points'], self.start_total + 3)
+
+        response = await self.async_client.get(reverse('get_student_profile'), {'student_id': self.student.id})
+        self.assertEqual(
+            [activity['description'] for activity in response.json()['activities'][:2]], ['Late', 'Kindness']
+        )
+
+        seat = {'student_id': self.student.id, 'seating_plan_id': self.plan.id, 'row': 0, 'column': 1}
+        response = await self.async_client.post(
+            reverse('update_seat_assignment'), seat, content_type='application/json'
+        )
+        self.assertTrue(response.json()['success'])
+        response = await self.async_client.post(
+            reverse('update_seat_assignment'), seat, content_type='application/json'
+        )
+        self.assertEqual(response.json()['error'], 'This seat is already occupied')
+
+        response = await self.async_client.post(reverse('unassign_student'), {
+            'student_id': self.student.id, 'seating_plan_id': self.plan.id,
+        }, content_type='application/json')
+        self.assertEqual(response.json()['student']['points'], self.start_total + 3)
+        self.assertFalse(await SeatAssignment.objects.filter(student=self.student).aexists())
+        self.assertEqual(await sync_to_async(find_drift)(), [])
+
+    @override_settings(ROOT_URLCONF='authentication.management.sync_views')
+    def test_sync_baseline_answers_like_the_async_views(self):
+        self.client.force_login(self.teacher)
+        self.assertFalse(iscoroutinefunction(resolve(reverse('award_points')).func))
+
+        fields = {'student_id': self.student.id, 'classroom_id': self.classroom.id, 'points': 5, 'reason': 'Kindness'}
+        awarded = self.client.post(reverse('award_points'), fields).json()
+        self.assertEqual(awarded['total_points'], self.start_total + 5)
+        self.assertEqual(set(awarded), {
+            'success', 'message', 'behavior_id', 'total_points', 'category', 'green_threshold', 'orange_threshold',
+        })
+        deducted = self.client.post(reverse('deduct_points'), {**fields, 'points': 2, 'reason': 'Late'}).json()
+        self.assertEqual(deducted['total_points'], self.start_total + 3)
+        profile = self.client.get(reverse('get_student_profile'), {'student_id': self.student.id}).json()
+        self.assertEqual([activity['description'] for activity in profile['activities'][:2]], ['Late', 'Kindness'])
+        self.assertEqual(find_drift(), [])
@@ -5,9 +5,10 @@ from .views import (
     student_dash, student_settings, login_faq, teacher_faq,
     student_behavior_history,
     # Make sure these are imported
-    award_points, deduct_points, update_seat_assignment,
-    get_student_profile, randomize_seating, save_seating_plan,
-    unassign_student  # Add this new import
+    award_points, deduct_points, bulk_award_points, apply_behavior_actions, update_seat_assignment,
+    get_student_profile, randomize_seating, save_seating_plan, restore_seating_plan,
+    unassign_student,  # Add this new import
+    seating_events, classroom_seating, export_behaviors,
 )
 
 urlpatterns = [
@@ -15,6 +16,9 @@ urlpatterns = [
     path('teacher-profile/', teacher_profile, name='teacher_profile'),
     path('student-profile/', student_profile, name='student_profile'),
     path('seating-plan/', seating_plan, name='seatingPlan'),
+    path('seating-plan/events/', seating_events, name='seating_events'),
+    path('api/classrooms/<int:classroom_id>/seating/', classroom_seating, name='classroom_seating'),
+    path('api/behaviors/export/', export_behaviors, name='export_behaviors'),
     path('behavior-history/', student_behavior_history, name='student_behavior_history'),
     path('logout/', logout_view, name='logout'),
     path('teacher-settings/', teacher_settings, name='teacher_settings'),
@@ -26,9 +30,12 @@ urlpatterns = [
     # Make sure these URL patterns exist
     path('award-points/', award_points, name='award_points'),
     path('deduct-points/', deduct_points, name='deduct_points'),
+    path('award-points/bulk/', bulk_award_points, name='bulk_award_points'),
+    path('api/behaviors/actions/', apply_behavior_actions, name='apply_behavior_actions'),
     path('update-seat-assignment/', update_seat_assignment, name='update_seat_assignment'),
     path('get-student-profile/', get_student_profile, name='get_student_profile'),
     path('randomize-seating/', randomize_seating, name='randomize_seating'),
     path('save-seating-plan/', save_seating_plan, name='save_seating_plan'),
+    path('restore-seating-plan/', restore_seating_plan, name='restore_seating_plan'),
     path('unassign-student/', unassign_student, name='unassign_student'),  # Add this new URL pattern
 ]
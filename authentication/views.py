@@ -1,29 +1,52 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth import authenticate, login, logout
-from django.contrib.auth.decorators import login_required, permission_required
+from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import Group
 from django.contrib import messages
 from django.utils.decorators import method_decorator
 from django.views.decorators.debug import sensitive_post_parameters
 from django.views.decorators.csrf import csrf_protect
-from django.views.decorators.cache import never_cache
+from django.views.decorators.cache import cache_control, never_cache
 from django.core.paginator import Paginator
-from django.db.models import Sum, Count, Q
 from django.core.exceptions import PermissionDenied
-from django.http import JsonResponse
-from django.views.decorators.http import require_POST
+from django.db import IntegrityError, transaction
+from django.core.handlers.asgi import ASGIRequest
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import condition, require_GET, require_POST
+from django.utils.dateparse import parse_date
 
 from .forms import TeacherProfileForm, NotificationSettingsForm, DisplaySettingsForm, CustomPasswordChangeForm
 import logging
-from .models import Student, Subject, StudentSubject, Behavior, ClassRoom, SeatingPlan, SeatAssignment, Teacher
+from .analytics import (
+    RADAR_AXES, monthly_points, percentile_label, recent_months_range, student_rank, teacher_charts,
+    teacher_dashboard,
+)
+from .banding import classroom_bands, student_category
+from .exports import EXPORT_FORMATS, aexport_rows, astream_export, export_rows, stream_export
+from .ledger import atotals_for, record_behaviors, totals_for
+from .models import (
+    Student, Subject, StudentSubject, Behavior, ClassRoom, SeatingPlan, SeatAssignment, Teacher,
+    StudentPointsSummary, BehaviorDailyRollup,
+)
+from .roles import STUDENT_ROLES, TEACHER_ROLES, role_required
+from .live import event_stream, publish_points, publish_seat, publish_seating, publish_unassign
+from .seating import (
+    build_seating_context, copy_assignments, describe_student, render_seating_fragments, seating_etag,
+    serialize_seating, touch_plan,
+)
 import json
 import random
+import uuid
 from datetime import datetime, timedelta
 
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Most queued award/deduct clicks the seating plan page may flush in one request
+ACTION_BATCH_LIMIT = 200
+
 @sensitive_post_parameters()
 @csrf_protect
 @never_cache
@@ -33,7 +56,7 @@ def login_view(request):
     """
     # If user is already authenticated, redirect to appropriate dashboard
     if request.user.is_authenticated:
-        return redirect_based_on_role(request.user)
+        return redirect_based_on_role(request)
         
     context = {}
     if request.method == "POST":
@@ -44,7 +67,7 @@ def login_view(request):
         if not username or not password:
             logger.warning(f"Login attempt with empty fields from IP: {get_client_ip(request)}")
             context["error"] = "Username and password are required"
-            return render(request, "frontend/pages/AppLogin/index.html", context)
+            return render(request, "frontend/Pages/AppLogin/index.html", context)
         
         # Attempt authentication
         user = authenticate(request, username=username, password=password)
@@ -54,199 +77,90 @@ def login_view(request):
             if not user.is_active:
                 logger.warning(f"Login attempt for inactive account: {username} from IP: {get_client_ip(request)}")
                 context["error"] = "This account has been disabled. Please contact support."
-                return render(request, "frontend/pages/AppLogin/index.html", context)
+                return render(request, "frontend/Pages/AppLogin/index.html", context)
                 
-            # Log successful login
-            logger.info(f"Successful login: {username} with role(s): {', '.join([g.name for g in user.groups.all()])}")
-            
             # Login user
             login(request, user)
             
+            # Log successful login (this resolves and stores the user's roles for later requests)
+            logger.info(f"Successful login: {username} with role(s): {', '.join(sorted(request.roles.groups))}")
+            
             # Redirect based on role
-            return redirect_based_on_role(user)
+            return redirect_based_on_role(request)
         else:
             # Log failed login attempt
             logger.warning(f"Failed login attempt for username: {username} from IP: {get_client_ip(request)}")
             context["error"] = "Invalid username or password"
             
-    return render(request, "frontend/pages/AppLogin/index.html", context)
+    return render(request, "frontend/Pages/AppLogin/index.html", context)
 
-def redirect_based_on_role(user):
+def redirect_based_on_role(request):
     """
     Helper function to redirect users based on their role
     """
-    if user.groups.filter(name="Student").exists():
+    if request.roles.is_student:
         return redirect("student_profile")
-    elif user.groups.filter(name__in=["Teacher", "Staff"]).exists():
+    elif request.roles.is_teacher:
         return redirect("teacher_profile")
-    elif user.is_superuser:
+    elif request.roles.is_superuser:
         return redirect("admin:index")
     else:
         # Handle users with no assigned roles
-        logger.warning(f"User {user.username} has no valid role assigned")
+        logger.warning(f"User {request.user.username} has no valid role assigned")
         return redirect("role_error")
 
 def role_error(request):
     """
     View for users with no valid role assignment
     """
-    return render(request, "frontend/pages/AppLogin/role_error.html")
+    return render(request, "frontend/Pages/AppLogin/role_error.html")
 
 @login_required
 def seating_plan(request):
-    # For debugging
-    print(f"User: {request.user.username}, Groups: {[g.name for g in request.user.groups.all()]}")
-    
     # Remove this block to allow students to access the seating plan
-    # if request.user.groups.filter(name="Student").exists():
+    # if request.roles.is_student:
     #     logger.warning(f"Student {request.user.username} attempted to access seating plan")
     #     raise PermissionDenied("Students cannot access the seating plan.")
     
-    # Get all classrooms for this teacher
-    classrooms = ClassRoom.objects.filter(teacher=request.user)
+    # Get all classrooms for this teacher (subject is shown in the classroom picker)
+    classrooms = list(ClassRoom.objects.filter(teacher=request.user).select_related('subject'))
     
     # Get the selected classroom (default to the first one)
     selected_classroom_id = request.GET.get('classroom', None)
+    selected_classroom = classrooms[0] if classrooms else None
     
     if selected_classroom_id and selected_classroom_id.isdigit():
-        try:
-            selected_classroom = classrooms.get(id=int(selected_classroom_id))
-        except ClassRoom.DoesNotExist:
-            selected_classroom = classrooms.first() if classrooms.exists() else None
-    else:
-        selected_classroom = classrooms.first() if classrooms.exists() else None
-    
-    # Get the active seating plan for the selected classroom
-    active_seating_plan = None
-    seat_assignments = []
-    unassigned_students = []
-    
-    if selected_classroom:
-        # Get all students enrolled in this subject
-        enrolled_students = StudentSubject.objects.filter(
-            subject=selected_classroom.subject
-        ).select_related('student__user')
-        
-        # Get the active seating plan
-        try:
-            active_seating_plan = SeatingPlan.objects.get(
-                classroom=selected_classroom,
-                is_active=True
-            )
-            
-            # Get seat assignments for this plan
-            seat_assignments = SeatAssignment.objects.filter(
-                seating_plan=active_seating_plan
-            ).select_related('student__user')
-            
-            # Get assigned student IDs
-            assigned_student_ids = seat_assignments.values_list('student_id', flat=True)
-            
-            # Get unassigned students
-            unassigned_students = [
-                enrollment.student for enrollment in enrolled_students
-                if enrollment.student.id not in assigned_student_ids
-            ]
-            
-        except SeatingPlan.DoesNotExist:
-            # No active seating plan, all students are unassigned
-            unassigned_students = [enrollment.student for enrollment in enrolled_students]
-    
-    # Get behavior data for all students
-    student_ids = [s.id for s in unassigned_students]
-    if seat_assignments:
-        student_ids.extend([sa.student.id for sa in seat_assignments])
-    
-    # Get total points for each student
-    student_points = {}
-    if student_ids:
-        behaviors = Behavior.objects.filter(student_id__in=student_ids)
-        
-        for student_id in student_ids:
-            student_behaviors = behaviors.filter(student_id=student_id)
-            total_points = sum(b.points for b in student_behaviors)
-            student_points[student_id] = total_points
-    
-    # Get recent behavior for each student
-    student_recent_behavior = {}
-    if student_ids:
-        for student_id in student_ids:
-            recent = Behavior.objects.filter(student_id=student_id).order_by('-recorded_at').first()
-            if recent:
-                student_recent_behavior[student_id] = recent.description
-    
-    # Calculate behavior categories (green, orange, red)
-    if student_points:
-        all_points = sorted(student_points.values(), reverse=True)
-        total_students = len(all_points)
-        
-        # Top 50%
-        green_threshold = all_points[int(total_students * 0.5) - 1] if total_students > 1 else 0
-        
-        # Next 25%
-        orange_threshold = all_points[int(total_students * 0.75) - 1] if total_students > 3 else 0
-        
-        # Bottom 25% is red
-    else:
-        green_threshold = 0
-        orange_threshold = 0
-    
-    # Prepare seat grid
-    seat_grid = []
-    if selected_classroom:
-        for row in range(selected_classroom.rows):
-            seat_row = []
-            for col in range(selected_classroom.columns):
-                # Find if there's a student assigned to this seat
-                assigned_student = None
-                for assignment in seat_assignments:
-                    if assignment.row == row and assignment.column == col:
-                        assigned_student = assignment.student
-                        break
-                
-                seat_row.append({
-                    'row': row,
-                    'column': col,
-                    'student': assigned_student,
-                    'points': student_points.get(assigned_student.id, 0) if assigned_student else 0,
-                    'recent_behavior': student_recent_behavior.get(assigned_student.id, '') if assigned_student else '',
-                    'category': 'green' if assigned_student and student_points.get(assigned_student.id, 0) >= green_threshold else
-                               'orange' if assigned_student and student_points.get(assigned_student.id, 0) >= orange_threshold else
-                               'red' if assigned_student else ''
-                })
-            seat_grid.append(seat_row)
+        selected_classroom = next(
+            (classroom for classroom in classrooms if classroom.id == int(selected_classroom_id)),
+            selected_classroom
+        )
     
     context = {
         'classrooms': classrooms,
         'selected_classroom': selected_classroom,
-        'active_seating_plan': active_seating_plan,
-        'seat_grid': seat_grid,
-        'unassigned_students': [
-            {
-                'student': student,
-                'points': student_points.get(student.id, 0),
-                'recent_behavior': student_recent_behavior.get(student.id, ''),
-                'category': 'green' if student_points.get(student.id, 0) >= green_threshold else
-                           'orange' if student_points.get(student.id, 0) >= orange_threshold else
-                           'red'
-            }
-            for student in unassigned_students
-        ],
-        'green_threshold': green_threshold,
-        'orange_threshold': orange_threshold
+        'active_seating_plan_id': '',
+        'seat_grid_html': '',
+        'unassigned_students_html': '',
+        'saved_seating_plans': [],
+        'green_threshold': 0,
+        'orange_threshold': 0
     }
     
-    return render(request, "frontend/pages/SeatingPlan/index.html", context)
+    # Render the seat grid (a fixed number of queries), or reuse it from the cache
+    if selected_classroom:
+        context.update(render_seating_fragments(selected_classroom))
+        context['saved_seating_plans'] = SeatingPlan.objects.filter(
+            classroom=selected_classroom, is_active=False
+        ).order_by('-created_at').only('id', 'name')
+    
+    return render(request, "frontend/Pages/SeatingPlan/index.html", context)
 
 @login_required
 @require_POST
-def award_points(request):
+async def award_points(request):
     """Award behavior points to a student."""
     try:
-        # Add debugging
-        print("award_points called")
-        print(f"POST data: {request.POST}")
-        
+        user = await request.auser()
         student_id = request.POST.get('student_id')
         points = int(request.POST.get('points', 1))
         reason = request.POST.get('reason')
@@ -256,28 +170,33 @@ def award_points(request):
         if reason == 'Other' and custom_reason:
             reason = custom_reason
             
-        # Get the student
-        student = Student.objects.get(id=student_id)
-        
-        # Get the classroom and subject
-        classroom_id = request.POST.get('classroom_id')
-        classroom = ClassRoom.objects.get(id=classroom_id)
-        subject = classroom.subject
+        # Get the student and the classroom
+        student = await Student.objects.select_related('user').aget(id=student_id)
+        classroom = await ClassRoom.objects.aget(id=request.POST.get('classroom_id'))
         
-        # Create behavior record
-        behavior = Behavior.objects.create(
+        behavior = await _record_behavior(
             student=student,
-            subject=subject,
+            subject_id=classroom.subject_id,
+            classroom=classroom,
+            teacher=user,
             behavior_type='positive',
             description=reason,
             points=points,
-            recorded_by=request.user.get_full_name() or request.user.username
+            recorded_by=user.get_full_name() or user.username
         )
         
+        # Report the new total and band so the seat card can be updated in place
+        total_points = (await atotals_for([student.id]))[student.id]
+        bands = await sync_to_async(classroom_bands)(classroom)
+        
         return JsonResponse({
             'success': True,
             'message': f'Awarded {points} points to {student.user.get_full_name()}',
-            'behavior_id': behavior.id
+            'behavior_id': behavior.id,
+            'total_points': total_points,
+            'category': student_category(bands, total_points),
+            'green_threshold': bands['green_threshold'],
+            'orange_threshold': bands['orange_threshold']
         })
     except Exception as e:
         logger.error(f"Error awarding points: {str(e)}")
@@ -286,57 +205,122 @@ def award_points(request):
             'error': str(e)
         })
 
+@sync_to_async
+def _record_behavior(**fields):
+    """
+    Create a Behavior and update the points ledger for async views. The
+    async ORM cannot open a transaction, and the ledger must change in the
+    same one as the row, so this part runs on the ORM's sync thread.
+    """
+    with transaction.atomic():
+        behavior = Behavior.objects.create(**fields)
+        record_behaviors([behavior])
+        publish_points([behavior.student_id], behavior.description)
+    return behavior
+
+@sync_to_async
+def _seat_changed(seating_plan, student, row=None, column=None):
+    """Refresh the plan's cached seat maps and publish the student's card (unassigned when row is None)."""
+    touch_plan(seating_plan.id)
+    payload = describe_student(student, seating_plan.classroom)
+    if row is None:
+        publish_unassign(seating_plan.classroom_id, seating_plan.id, payload)
+    else:
+        publish_seat(seating_plan.classroom_id, seating_plan.id, payload, row, column)
+    return payload
+
+def classroom_seating_etag(request, classroom_id):
+    classroom = ClassRoom.objects.filter(id=classroom_id, teacher=request.user).first()
+    return seating_etag(classroom) if classroom else None
+
+
 @login_required
-@require_POST
-def deduct_points(request):
-    """Deduct behavior points from a student."""
+@require_GET
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=classroom_seating_etag)
+def classroom_seating(request, classroom_id):
+    """Return a classroom's active seat map as JSON, answering 304 when it has not changed."""
+    classroom = ClassRoom.objects.filter(id=classroom_id, teacher=request.user).first()
+    if classroom is None:
+        return JsonResponse({'success': False, 'error': 'Classroom not found'}, status=404)
+    
+    return JsonResponse(serialize_seating(classroom, build_seating_context(classroom)))
+
+@role_required(*TEACHER_ROLES, raise_exception=True)
+@require_GET
+@never_cache
+def export_behaviors(request):
+    """
+    Stream behavior records as CSV (?format=csv, the default) or JSON lines
+    (?format=jsonl), filtered by ?subject=, ?classroom= and ?start=/?end=
+    (YYYY-MM-DD, inclusive). Pass ?after_id= with the last id received to
+    resume. Teachers export their own classrooms' subjects; staff export all.
+    """
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse({'success': False, 'error': f'Unknown format: {export_format}'}, status=400)
+    
     try:
-        # Add debugging
-        print("deduct_points called")
-        print(f"POST data: {request.POST}")
-        
-        student_id = request.POST.get('student_id')
-        points = int(request.POST.get('points', -1))  # Should be negative
-        reason = request.POST.get('reason')
-        custom_reason = request.POST.get('custom_reason')
-        
-        # Use custom reason if provided
-        if reason == 'Other' and custom_reason:
-            reason = custom_reason
-            
-        # Get the student
-        student = Student.objects.get(id=student_id)
-        
-        # Get the classroom and subject
-        classroom_id = request.POST.get('classroom_id')
-        classroom = ClassRoom.objects.get(id=classroom_id)
-        subject = classroom.subject
-        
-        # Create behavior record
-        behavior = Behavior.objects.create(
-            student=student,
-            subject=subject,
-            behavior_type='negative',
-            description=reason,
-            points=points,  # This should be a negative number
-            recorded_by=request.user.get_full_name() or request.user.username
-        )
-        
-        return JsonResponse({
-            'success': True,
-            'message': f'Deducted {abs(points)} points from {student.user.get_full_name()}',
-            'behavior_id': behavior.id
-        })
-    except Exception as e:
-        logger.error(f"Error deducting points: {str(e)}")
-        return JsonResponse({
-            'success': False,
-            'error': str(e)
-        })
+        start = _parse_export_date(request.GET.get('start'))
+        end = _parse_export_date(request.GET.get('end'))
+        after_id = int(request.GET['after_id']) if request.GET.get('after_id') else None
+        subject_id = int(request.GET['subject']) if request.GET.get('subject') else None
+        classroom_id = int(request.GET['classroom']) if request.GET.get('classroom') else None
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    
+    classrooms = ClassRoom.objects.all() if 'Staff' in request.roles else ClassRoom.objects.filter(teacher=request.user)
+    subject_ids = None if 'Staff' in request.roles else set(classrooms.values_list('subject_id', flat=True))
+    if classroom_id is not None:
+        classroom_subject = classrooms.filter(id=classroom_id).values_list('subject_id', flat=True).first()
+        if classroom_subject is None:
+            return JsonResponse({'success': False, 'error': 'Classroom not found'}, status=404)
+        subject_ids = {classroom_subject}
+    if subject_id is not None:
+        if subject_ids is not None and subject_id not in subject_ids:
+            return JsonResponse({'success': False, 'error': 'Subject not found'}, status=404)
+        subject_ids = {subject_id}
+    
+    content_type, extension = EXPORT_FORMATS[export_format]
+    # ASGI buffers sync iterators whole, so stream from an async one there
+    if isinstance(request, ASGIRequest):
+        lines = astream_export(aexport_rows(subject_ids, start, end, after_id), export_format)
+    else:
+        lines = stream_export(export_rows(subject_ids, start, end, after_id), export_format)
+    response = StreamingHttpResponse(lines, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="behaviors.{extension}"'
+    return response
+
+def _parse_export_date(value):
+    if not value:
+        return None
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(f'Invalid date: {value} (expected YYYY-MM-DD)')
+    return parsed
+
+@login_required
+async def seating_events(request):
+    """Stream live seat and points updates for one of the teacher's classrooms."""
+    # The stream holds its connection open, which only an ASGI server can serve
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    
+    user = await request.auser()
+    classroom_id = request.GET.get('classroom', '')
+    if not classroom_id.isdigit() or not await ClassRoom.objects.filter(
+        id=int(classroom_id), teacher=user
+    ).aexists():
+        return HttpResponse(status=404)
+    
+    response = StreamingHttpResponse(event_stream(int(classroom_id)), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 @login_required
 @require_POST
-def update_seat_assignment(request):
+async def update_seat_assignment(request):
     """Update a student's seat assignment."""
     try:
         data = json.loads(request.body)
@@ -346,45 +330,49 @@ def update_seat_assignment(request):
         column = int(data.get('column'))
         
         # Get the student and seating plan
-        student = Student.objects.get(id=student_id)
-        seating_plan = SeatingPlan.objects.get(id=seating_plan_id)
+        student = await Student.objects.select_related('user').aget(id=student_id)
+        seating_plan = await SeatingPlan.objects.select_related('classroom').aget(id=seating_plan_id)
         
         # Check if this seat is already occupied
-        existing_assignment = SeatAssignment.objects.filter(
-            seating_plan=seating_plan,
-            row=row,
-            column=column
-        ).first()
-        
-        if existing_assignment:
+        if await SeatAssignment.objects.filter(seating_plan=seating_plan, row=row, column=column).aexists():
             return JsonResponse({
                 'success': False,
                 'error': 'This seat is already occupied'
             })
         
         # Check if this student already has a seat
-        existing_student_assignment = SeatAssignment.objects.filter(
+        existing_student_assignment = await SeatAssignment.objects.filter(
             seating_plan=seating_plan,
             student=student
-        ).first()
+        ).afirst()
         
         if existing_student_assignment:
             # Update the existing assignment
             existing_student_assignment.row = row
             existing_student_assignment.column = column
-            existing_student_assignment.save()
+            await existing_student_assignment.asave()
         else:
             # Create a new assignment
-            SeatAssignment.objects.create(
+            await SeatAssignment.objects.acreate(
                 seating_plan=seating_plan,
                 student=student,
                 row=row,
                 column=column
             )
         
+        # Send the card to this page and any other open views of the classroom
+        payload = await _seat_changed(seating_plan, student, row, column)
+        
         return JsonResponse({
             'success': True,
-            'message': f'Updated seat assignment for {student.user.get_full_name()}'
+            'message': f'Updated seat assignment for {student.user.get_full_name()}',
+            'student': payload
+        })
+    except IntegrityError:
+        # Someone else took the seat between the check above and the write
+        return JsonResponse({
+            'success': False,
+            'error': 'This seat is already occupied'
         })
     except Exception as e:
         logger.error(f"Error updating seat assignment: {str(e)}")
@@ -394,26 +382,27 @@ def update_seat_assignment(request):
         })
 
 @login_required
-def get_student_profile(request):
+async def get_student_profile(request):
     """Get a student's profile data for the modal."""
     try:
         student_id = request.GET.get('student_id')
-        student = Student.objects.get(id=student_id)
+        student = await Student.objects.aget(id=student_id)
         
         # Get behavior records
         behaviors = Behavior.objects.filter(student=student).order_by('-recorded_at')[:10]
         
-        # Calculate total points
-        total_points = sum(b.points for b in Behavior.objects.filter(student=student))
+        # Read total points from the points ledger
+        total_points = (await atotals_for([student.id]))[student.id]
         
         # Format activities for the response
-        activities = []
-        for behavior in behaviors:
-            activities.append({
+        activities = [
+            {
                 'points': behavior.points,
                 'description': behavior.description,
                 'date': behavior.recorded_at.strftime('%b %d, %Y %I:%M %p')
-            })
+            }
+            async for behavior in behaviors
+        ]
         
         return JsonResponse({
             'success': True,
@@ -438,41 +427,42 @@ def randomize_seating(request):
         # Get the classroom
         classroom = ClassRoom.objects.get(id=classroom_id)
         
-        # Get or create an active seating plan
-        seating_plan, created = SeatingPlan.objects.get_or_create(
-            classroom=classroom,
-            is_active=True,
-            defaults={'name': 'Randomized Plan'}
-        )
-        
-        if not created:
-            # Clear existing assignments
-            SeatAssignment.objects.filter(seating_plan=seating_plan).delete()
-        
         # Get all students enrolled in this subject
-        enrolled_students = StudentSubject.objects.filter(
-            subject=classroom.subject
-        ).select_related('student__user')
-        
-        students = [enrollment.student for enrollment in enrolled_students]
+        students = list(StudentSubject.objects.filter(
+            subject_id=classroom.subject_id
+        ).values_list('student_id', flat=True).distinct())
         random.shuffle(students)
         
-        # Assign seats
-        seat_count = 0
-        for row in range(classroom.rows):
-            for col in range(classroom.columns):
-                if seat_count < len(students):
-                    SeatAssignment.objects.create(
-                        seating_plan=seating_plan,
-                        student=students[seat_count],
-                        row=row,
-                        column=col
-                    )
-                    seat_count += 1
-        
+        # Replace the assignments in one transaction so a failure never leaves a half-filled plan
+        with transaction.atomic():
+            seating_plan, created = SeatingPlan.objects.get_or_create(
+                classroom=classroom,
+                is_active=True,
+                defaults={'name': 'Randomized Plan'}
+            )
+            
+            if not created:
+                # Clear existing assignments
+                SeatAssignment.objects.filter(seating_plan=seating_plan).delete()
+            
+            # Assign seats row by row
+            SeatAssignment.objects.bulk_create([
+                SeatAssignment(
+                    seating_plan=seating_plan,
+                    student_id=student_id,
+                    row=index // classroom.columns,
+                    column=index % classroom.columns
+                )
+                for index, student_id in enumerate(students[:classroom.rows * classroom.columns])
+            ])
+            touch_plan(seating_plan.id)
+            publish_seating(classroom)
+        
+        # Return the new seat map so the page can redraw without reloading
         return JsonResponse({
             'success': True,
-            'message': 'Seating plan randomized successfully'
+            'message': 'Seating plan randomized successfully',
+            'seating': serialize_seating(classroom, build_seating_context(classroom))
         })
     except Exception as e:
         logger.error(f"Error randomizing seating: {str(e)}")
@@ -499,25 +489,20 @@ def save_seating_plan(request):
             is_active=True
         )
         
-        # Create a new seating plan with the same assignments
-        new_plan = SeatingPlan.objects.create(
-            classroom=classroom,
-            name=plan_name,
-            is_active=False
-        )
-        
-        # Copy seat assignments
-        for assignment in SeatAssignment.objects.filter(seating_plan=active_plan):
-            SeatAssignment.objects.create(
-                seating_plan=new_plan,
-                student=assignment.student,
-                row=assignment.row,
-                column=assignment.column
+        # Create a new seating plan with a copy of the active plan's assignments
+        with transaction.atomic():
+            new_plan = SeatingPlan.objects.create(
+                classroom=classroom,
+                name=plan_name,
+                is_active=False
             )
+            copy_assignments(active_plan, new_plan)
         
         return JsonResponse({
             'success': True,
-            'message': f'Seating plan "{plan_name}" saved successfully'
+            'message': f'Seating plan "{plan_name}" saved successfully',
+            'seating_plan_id': new_plan.id,
+            'plan_name': new_plan.name
         })
     except Exception as e:
         logger.error(f"Error saving seating plan: {str(e)}")
@@ -526,13 +511,59 @@ def save_seating_plan(request):
             'error': str(e)
         })
 
-@permission_required('authentication.view_seatingplan', raise_exception=True)
-@login_required
+@role_required(*TEACHER_ROLES, raise_exception=True)
+@require_POST
+def restore_seating_plan(request):
+    """
+    Copy a saved seating plan's layout into the classroom's active plan.
+    Teachers restore plans of their own classrooms, staff of any.
+    """
+    try:
+        data = json.loads(request.body)
+        classroom_id = data.get('classroom_id')
+        saved_plan_id = data.get('seating_plan_id')
+        
+        # Get the classroom and the saved plan
+        classrooms = ClassRoom.objects.all() if 'Staff' in request.roles else ClassRoom.objects.filter(teacher=request.user)
+        classroom = classrooms.filter(id=classroom_id).first()
+        if classroom is None:
+            return JsonResponse({'success': False, 'error': 'Classroom not found'}, status=404)
+        saved_plan = SeatingPlan.objects.get(id=saved_plan_id, classroom=classroom, is_active=False)
+        
+        # Replace the active plan's assignments in one transaction
+        with transaction.atomic():
+            active_plan, created = SeatingPlan.objects.get_or_create(
+                classroom=classroom,
+                is_active=True,
+                defaults={'name': saved_plan.name}
+            )
+            copy_assignments(saved_plan, active_plan, replace=not created)
+            touch_plan(active_plan.id)
+            publish_seating(classroom)
+        
+        return JsonResponse({
+            'success': True,
+            'message': f'Seating plan "{saved_plan.name}" restored successfully',
+            'seating': serialize_seating(classroom, build_seating_context(classroom))
+        })
+    except SeatingPlan.DoesNotExist:
+        return JsonResponse({
+            'success': False,
+            'error': 'Saved seating plan not found'
+        })
+    except Exception as e:
+        logger.error(f"Error restoring seating plan: {str(e)}")
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        })
+
+@role_required(permission='authentication.view_seatingplan', raise_exception=True)
 def behaviour_history(request):
-    return render(request, "frontend/pages/BehaviourHistory/index.html")
+    return render(request, "frontend/Pages/BehaviourHistory/index.html")
 
 def login_faq(request):
-    return render(request, "frontend/pages/FAQsLogin/index.html")
+    return render(request, "frontend/Pages/FAQsLogin/index.html")
 
 @login_required
 def logout_view(request):
@@ -542,212 +573,53 @@ def logout_view(request):
     messages.success(request, "You have been successfully logged out.")
     return redirect("login")
 
-@login_required
+@role_required(*TEACHER_ROLES)
 def teacher_profile(request):
-    if not request.user.groups.filter(name__in=["Teacher", "Staff"]).exists():
-        logger.warning(f"Unauthorized access attempt to teacher profile by {request.user.username}")
-        return redirect('login')
     
     try:
-        # Get teacher data
-        try:
-            teacher = Teacher.objects.get(user=request.user)
-            
-            # Get classrooms taught by this teacher
-            classrooms = ClassRoom.objects.filter(teacher=request.user)
-            
-            # Count total students
-            total_students = 0
-            for classroom in classrooms:
-                enrolled_students = StudentSubject.objects.filter(subject=classroom.subject).count()
-                total_students += enrolled_students
-            
-            # Get behavior scores for each class
-            class_behavior_scores = {}
-            for classroom in classrooms:
-                # Get students enrolled in this subject
-                enrolled_students = StudentSubject.objects.filter(
-                    subject=classroom.subject
-                ).values_list('student_id', flat=True)
-                
-                # Get average behavior score for these students
-                if enrolled_students:
-                    behaviors = Behavior.objects.filter(student_id__in=enrolled_students)
-                    student_points = {}
-                    
-                    for student_id in enrolled_students:
-                        student_behaviors = behaviors.filter(student_id=student_id)
-                        total_points = sum(b.points for b in student_behaviors)
-                        student_points[student_id] = total_points
-                    
-                    if student_points:
-                        avg_score = sum(student_points.values()) / len(student_points)
-                        # Normalize to a 0-100 scale
-                        normalized_score = min(100, max(0, 75 + avg_score))
-                        class_behavior_scores[classroom.name] = round(normalized_score)
-                    else:
-                        class_behavior_scores[classroom.name] = 85
-                else:
-                    class_behavior_scores[classroom.name] = 85
-            
-            # Calculate average behavior score
-            average_behavior_score = round(sum(class_behavior_scores.values()) / len(class_behavior_scores)) if class_behavior_scores else 85
-            
-            # Get recent behavior records
-            recent_behaviors = Behavior.objects.filter(
-                recorded_by__contains=f"{request.user.first_name} {request.user.last_name}"
-            ).select_related('student__user').order_by('-recorded_at')[:5]
-            
-            # Get students requiring attention (low behavior scores)
-            students_requiring_attention = []
-            for classroom in classrooms:
-                enrolled_students = StudentSubject.objects.filter(
-                    subject=classroom.subject
-                ).values_list('student_id', flat=True)
-                
-                if enrolled_students:
-                    behaviors = Behavior.objects.filter(student_id__in=enrolled_students)
-                    student_points = {}
-                    
-                    for student_id in enrolled_students:
-                        student_behaviors = behaviors.filter(student_id=student_id)
-                        total_points = sum(b.points for b in student_behaviors)
-                        student_points[student_id] = total_points
-                    
-                    # Find students with low points
-                    for student_id, points in student_points.items():
-                        if points < -3:  # Threshold for "requiring attention"
-                            student = Student.objects.get(id=student_id)
-                            students_requiring_attention.append({
-                                'id': student.id,
-                                'name': student.user.get_full_name() or student.user.username,
-                                'class': classroom.name,
-                                'behavior_score': min(100, max(0, 75 + points)),
-                                'points': points
-                            })
-            
-            # Sort by points (ascending) and limit to 4
-            students_requiring_attention.sort(key=lambda x: x['points'])
-            students_requiring_attention = students_requiring_attention[:4]
-            
-            # Get pending assignments (placeholder - replace with your actual Assignment model)
-            pending_assessments = random.randint(5, 15)
-            
-        except (Teacher.DoesNotExist, Exception) as e:
-            # Fallback to mock data if database models aren't fully set up yet
-            logger.warning(f"Using mock data due to error: {str(e)}")
-            
-            # Create teacher with default values if it doesn't exist
-            teacher, created = Teacher.objects.get_or_create(
-                user=request.user,
-                defaults={
-                    'department': 'General',
-                    'years_experience': 5,
-                    'office': 'Main Building',
-                    'office_hours': 'Mon-Fri: 9:00 AM - 5:00 PM',
-                    'phone': '555-123-4567'
-                }
-            )
-            
-            # Generate mock classroom data
-            classrooms = []
-            for i in range(5):
-                subject = random.choice(['Mathematics', 'Science', 'English', 'History', 'Art'])
-                grade = random.choice([9, 10, 11])
-                section = random.choice(['A', 'B', 'C'])
-                classrooms.append({
-                    'id': i + 1,
-                    'name': f'{grade}{section} {subject}',
-                    'rows': random.randint(4, 6),
-                    'columns': random.randint(5, 7)
-                })
-            
-            # Count total students (estimate based on classroom size)
-            total_students = len(classrooms) * random.randint(20, 30)
-            
-            # Generate random behavior scores for each class
-            class_behavior_scores = {}
-            for classroom in classrooms:
-                class_behavior_scores[classroom['name']] = random.randint(75, 95)
-            
-            # Calculate average behavior score
-            average_behavior_score = sum(class_behavior_scores.values()) // len(class_behavior_scores) if class_behavior_scores else 85
-            
-            # Generate example recent behaviors
-            recent_behaviors = []
-            student_names = [
-                "Emma Thompson", "James Wilson", "Sophia Martinez", 
-                "Ethan Brown", "Olivia Davis", "Noah Johnson"
-            ]
-            behavior_descriptions = [
-                "Excellent participation in class discussion",
-                "Disrupting class with excessive talking",
-                "Helping classmate with difficult problem",
-                "Outstanding homework submission",
-                "Late to class without excuse",
-                "Great teamwork during group project"
-            ]
-            
-            for i in range(5):
-                recent_behaviors.append({
-                    'student': {'user': {'get_full_name': lambda i=i: student_names[i % len(student_names)]}},
-                    'points': random.choice([5, 3, -2, 4, -3, 2]),
-                    'description': behavior_descriptions[i % len(behavior_descriptions)],
-                    'recorded_at': f"{random.randint(1, 12)}/{random.randint(1, 28)}/2025, {random.randint(8, 4)}:{random.randint(0, 59):02d} {'AM' if random.randint(0, 1) == 0 else 'PM'}"
-                })
-            
-            # Generate students requiring attention
-            students_requiring_attention = []
-            for i in range(4):
-                students_requiring_attention.append({
-                    'id': i + 1,
-                    'name': student_names[i % len(student_names)],
-                    'class': list(class_behavior_scores.keys())[i % len(class_behavior_scores)] if class_behavior_scores else "Unknown",
-                    'behavior_score': random.randint(65, 75),
-                    'points': random.randint(-8, -3)
-                })
-            
-            # Set pending assessments
-            pending_assessments = random.randint(5, 15)
+        # Teachers without a profile yet get one with default details
+        teacher, created = Teacher.objects.get_or_create(
+            user=request.user,
+            defaults={
+                'department': 'General',
+                'years_experience': 5,
+                'office': 'Main Building',
+                'office_hours': 'Mon-Fri: 9:00 AM - 5:00 PM',
+                'phone': '555-123-4567'
+            }
+        )
+        
+        # Get classrooms taught by this teacher
+        classrooms = list(ClassRoom.objects.filter(teacher=request.user))
+        
+        # Student counts, class behavior scores and students requiring attention
+        # come from grouped queries, cached per teacher
+        dashboard = teacher_dashboard(request.user, classrooms)
+        total_students = dashboard['total_students']
+        class_behavior_scores = dashboard['class_behavior_scores']
+        average_behavior_score = dashboard['average_behavior_score']
+        students_requiring_attention = dashboard['students_requiring_attention']
+        
+        # Monthly trend, radar and pending assessments for every class in one cached pass
+        charts = teacher_charts(request.user, classrooms)
+        
+        # Get recent behavior records
+        recent_behaviors = Behavior.objects.filter(
+            recorded_by__contains=f"{request.user.first_name} {request.user.last_name}"
+        ).select_related('student__user').order_by('-recorded_at')[:5]
         
-        # Prepare chart data
         chart_data = []
+        radar_data = []
         for i, classroom in enumerate(classrooms):
-            classroom_name = classroom['name'] if isinstance(classroom, dict) else classroom.name
-            score = class_behavior_scores.get(classroom_name, 80)
-            
-            # Generate random data points for the chart
-            data_points = []
-            for j in range(10):  # 10 months
-                # Add some variation to the score for each month
-                variation = 1 if (j % 3 == 0) else (-1 if j % 3 == 1 else 0)
-                data_points.append(score + variation)
-            
             chart_data.append({
-                'name': classroom_name,
-                'data': data_points,
+                'name': classroom.name,
+                'data': charts['trend'][classroom.id],
                 'color': i + 1  # For get_color filter
             })
-        
-        # Prepare radar chart data
-        radar_data = []
-        for i, classroom in enumerate(classrooms):
-            classroom_name = classroom['name'] if isinstance(classroom, dict) else classroom.name
-            score = class_behavior_scores.get(classroom_name, 80)
-            
-            # Generate data for the 5 radar chart categories
-            radar_points = [
-                score,  # Behavior
-                score + 5 + (2 if i % 2 == 0 else -2),  # Attendance
-                score - 3 + (3 if i % 2 == 0 else -3),  # Participation
-                score + 2 + (2 if i % 2 == 0 else -2),  # Homework
-                score + 4 + (4 if i % 2 == 0 else -4)   # Test Scores
-            ]
-            
             radar_data.append({
-                'name': classroom_name,
-                'data': radar_points,
-                'color': i + 1  # For get_color filter
+                'name': classroom.name,
+                'data': charts['radar'][classroom.id],
+                'color': i + 1
             })
         
         context = {
@@ -759,8 +631,10 @@ def teacher_profile(request):
             'recent_behaviors': recent_behaviors,
             'students_requiring_attention': students_requiring_attention,
             'years_experience': int(teacher.years_experience) if hasattr(teacher, 'years_experience') and teacher.years_experience is not None else 0,
-            'pending_assessments': pending_assessments,
+            'pending_assessments': charts['pending_assessments'],
+            'chart_months': json.dumps(charts['months']),
             'chart_data': chart_data,
+            'radar_axes': json.dumps(RADAR_AXES),
             'radar_data': radar_data
         }
         
@@ -768,13 +642,10 @@ def teacher_profile(request):
         logger.error(f"Error in teacher profile: {str(e)}")
         context = {'error': 'An error occurred while loading the teacher profile'}
     
-    return render(request, "frontend/pages/ViewProfileTeacher/index.html", context)
+    return render(request, "frontend/Pages/ViewProfileTeacher/index.html", context)
 
-@login_required
+@role_required(*STUDENT_ROLES)
 def student_profile(request):
-    if not request.user.groups.filter(name="Student").exists():
-        logger.warning(f"Unauthorized access attempt to student profile by {request.user.username}")
-        return redirect('login')
     
     try:
         student = Student.objects.get(user=request.user)
@@ -788,14 +659,15 @@ def student_profile(request):
         logger.error(f"Student profile not found for user {request.user.username}")
         context = {'error': 'Student profile not found'}
     
-    return render(request, "frontend/pages/ViewProfileStudent/index.html", context)
+    return render(request, "frontend/Pages/ViewProfileStudent/index.html", context)
 
 
 @login_required
 @require_POST
-def deduct_points(request):
+async def deduct_points(request):
     """Deduct points from a student."""
     try:
+        user = await request.auser()
         # Get form data
         student_id = request.POST.get('student_id')
         points = int(request.POST.get('points', 0))  # This should be a negative number
@@ -805,38 +677,50 @@ def deduct_points(request):
         if points > 0:
             points = -points
         
-        # Get the student and create behavior record
-        student = Student.objects.get(id=student_id)
+        # Get the student
+        student = await Student.objects.select_related('user').aget(id=student_id)
         
         # Get classroom/subject context if available
         classroom_id = request.POST.get('classroom_id')
-        subject = None
+        classroom = None
         
         if classroom_id:
             try:
-                classroom = ClassRoom.objects.get(id=classroom_id)
-                subject = classroom.subject
+                classroom = await ClassRoom.objects.aget(id=classroom_id)
             except ClassRoom.DoesNotExist:
                 pass
         
-        # Create the behavior record
-        behavior = Behavior.objects.create(
+        # Create the behavior record and update the points ledger together
+        await _record_behavior(
             student=student,
-            subject=subject,
+            subject_id=classroom.subject_id if classroom else None,
+            classroom=classroom,
+            teacher=user,
             behavior_type='negative',
             description=reason,
             points=points,  # This should be negative
-            recorded_by=request.user.get_full_name() or request.user.username
+            recorded_by=user.get_full_name() or user.username
         )
         
-        # Calculate total points for the student
-        total_points = Behavior.objects.filter(student=student).aggregate(Sum('points'))['points__sum'] or 0
+        # Read the student's new total from the points ledger
+        total_points = (await atotals_for([student.id]))[student.id]
         
-        return JsonResponse({
+        response = {
             'success': True,
             'message': f'Deducted {abs(points)} points from {student.user.get_full_name() or student.user.username}',
             'total_points': total_points
-        })
+        }
+        
+        # Report the new band when the deduction was made from a classroom
+        if classroom:
+            bands = await sync_to_async(classroom_bands)(classroom)
+            response.update({
+                'category': student_category(bands, total_points),
+                'green_threshold': bands['green_threshold'],
+                'orange_threshold': bands['orange_threshold']
+            })
+        
+        return JsonResponse(response)
     except Exception as e:
         logger.error(f"Error deducting points: {str(e)}")
         return JsonResponse({
@@ -844,11 +728,228 @@ def deduct_points(request):
             'error': str(e)
         })
 
-@login_required
+@role_required(*TEACHER_ROLES, raise_exception=True)
+@require_POST
+def bulk_award_points(request):
+    """
+    Award or deduct the same points for many students in one transaction.
+    Teachers act on their own classrooms, staff on any, and only students
+    enrolled in the classroom's subject are affected.
+    """
+    try:
+        data = json.loads(request.body)
+        action = data.get('action', 'award')
+        points = abs(int(data.get('points', 1)))
+        reason = data.get('reason') or 'Unspecified'
+        
+        if action not in ('award', 'deduct'):
+            return JsonResponse({'success': False, 'error': f'Unknown action "{action}"'})
+        if points == 0:
+            return JsonResponse({'success': False, 'error': 'Points must not be zero'})
+        
+        classrooms = ClassRoom.objects.all() if 'Staff' in request.roles else ClassRoom.objects.filter(teacher=request.user)
+        classroom = classrooms.filter(id=data.get('classroom_id')).first()
+        if classroom is None:
+            return JsonResponse({'success': False, 'error': 'Classroom not found'}, status=404)
+        
+        # Either everyone seated in a plan of this classroom, or an explicit list of students
+        if data.get('seating_plan_id'):
+            requested_ids = SeatAssignment.objects.filter(
+                seating_plan_id=data['seating_plan_id'],
+                seating_plan__classroom=classroom
+            ).values('student_id')
+        else:
+            requested_ids = {int(student_id) for student_id in data.get('student_ids', [])}
+        student_ids = list(StudentSubject.objects.filter(
+            subject_id=classroom.subject_id, student_id__in=requested_ids
+        ).values_list('student_id', flat=True))
+        
+        if not student_ids:
+            return JsonResponse({'success': False, 'error': 'No students selected'})
+        
+        behavior_type = 'positive' if action == 'award' else 'negative'
+        signed_points = points if action == 'award' else -points
+        recorded_by = request.user.get_full_name() or request.user.username
+        
+        # Insert every behavior row and update the points ledger together
+        with transaction.atomic():
+            behaviors = Behavior.objects.bulk_create([
+                Behavior(
+                    student_id=student_id,
+                    subject_id=classroom.subject_id,
+                    classroom=classroom,
+                    teacher=request.user,
+                    behavior_type=behavior_type,
+                    description=reason,
+                    points=signed_points,
+                    recorded_by=recorded_by
+                )
+                for student_id in student_ids
+            ])
+            record_behaviors(behaviors)
+            publish_points(student_ids, reason)
+        
+        # Report the new totals and bands for every affected seat
+        totals = totals_for(student_ids)
+        bands = classroom_bands(classroom)
+        verb = 'Awarded' if action == 'award' else 'Deducted'
+        
+        return JsonResponse({
+            'success': True,
+            'message': f'{verb} {points} points for {len(student_ids)} students',
+            'students': [
+                {
+                    'student_id': student_id,
+                    'total_points': totals[student_id],
+                    'category': student_category(bands, totals[student_id])
+                }
+                for student_id in student_ids
+            ],
+            'green_threshold': bands['green_threshold'],
+            'orange_threshold': bands['orange_threshold']
+        })
+    except Exception as e:
+        logger.error(f"Error applying bulk points: {str(e)}")
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        })
+
+@role_required(*TEACHER_ROLES, raise_exception=True)
+@require_POST
+def apply_behavior_actions(request):
+    """
+    Apply a batch of award/deduct clicks queued by the seating plan page in
+    one transaction. Each action carries a UUID generated by the page; an
+    action whose id is already stored was applied by an earlier attempt at
+    the same flush and is reported as a duplicate, so retries never record
+    a click twice.
+    """
+    try:
+        actions = json.loads(request.body)['actions']
+    except (ValueError, KeyError, TypeError):
+        actions = None
+    if not isinstance(actions, list) or not actions:
+        return JsonResponse({'success': False, 'error': 'Expected {"actions": [...]}'}, status=400)
+    if len(actions) > ACTION_BATCH_LIMIT:
+        return JsonResponse(
+            {'success': False, 'error': f'At most {ACTION_BATCH_LIMIT} actions per request'}, status=400
+        )
+    
+    results = []
+    for action in actions:
+        try:
+            results.append(_parse_action(action))
+        except ValueError as e:
+            client_id = action.get('client_id') if isinstance(action, dict) else None
+            results.append({'client_id': client_id, 'status': 'rejected', 'error': str(e)})
+    valid = [result for result in results if result['status'] is None]
+    
+    # Resolve classrooms, enrolments and already applied ids for the whole batch at once
+    classrooms = ClassRoom.objects.all() if 'Staff' in request.roles else ClassRoom.objects.filter(teacher=request.user)
+    classrooms = {
+        classroom.id: classroom
+        for classroom in classrooms.filter(id__in={result['classroom_id'] for result in valid})
+    }
+    enrolled = set(StudentSubject.objects.filter(
+        student_id__in={result['student_id'] for result in valid},
+        subject_id__in={classroom.subject_id for classroom in classrooms.values()},
+    ).values_list('student_id', 'subject_id'))
+    applied_ids = set(Behavior.objects.filter(
+        client_id__in=[result['client_id'] for result in valid]
+    ).values_list('client_id', flat=True))
+    
+    recorded_by = request.user.get_full_name() or request.user.username
+    behaviors = []
+    for result in valid:
+        classroom = classrooms.get(result['classroom_id'])
+        if classroom is None:
+            result.update(status='rejected', error='Classroom not found')
+        elif (result['student_id'], classroom.subject_id) not in enrolled:
+            result.update(status='rejected', error='Student is not in this class')
+        elif result['client_id'] in applied_ids:
+            result['status'] = 'duplicate'
+        else:
+            result['status'] = 'applied'
+            applied_ids.add(result['client_id'])
+            behaviors.append(Behavior(
+                client_id=result['client_id'],
+                student_id=result['student_id'],
+                subject_id=classroom.subject_id,
+                classroom=classroom,
+                teacher=request.user,
+                behavior_type='positive' if result['points'] > 0 else 'negative',
+                description=result['reason'],
+                points=result['points'],
+                recorded_by=recorded_by
+            ))
+    
+    if behaviors:
+        try:
+            with transaction.atomic():
+                Behavior.objects.bulk_create(behaviors)
+                record_behaviors(behaviors)
+                # Live pages show each student's latest reason, so publish per reason
+                last_reasons = {behavior.student_id: behavior.description for behavior in behaviors}
+                for reason in set(last_reasons.values()):
+                    publish_points([sid for sid, last in last_reasons.items() if last == reason], reason)
+        except IntegrityError:
+            # A concurrent attempt at the same batch committed first; a retry reports its actions as duplicates
+            return JsonResponse({'success': False, 'error': 'Actions are already being applied'}, status=409)
+    
+    # Report the current total and band of every student the page should reconcile
+    accepted = [result for result in results if result['status'] in ('applied', 'duplicate')]
+    totals = totals_for({result['student_id'] for result in accepted})
+    bands = {}
+    for result in accepted:
+        classroom_id = result['classroom_id']
+        if classroom_id not in bands:
+            bands[classroom_id] = classroom_bands(classrooms[classroom_id])
+        result['total_points'] = totals[result['student_id']]
+        result['category'] = student_category(bands[classroom_id], result['total_points'])
+    
+    return JsonResponse({
+        'success': True,
+        'applied': len(behaviors),
+        'results': [
+            {
+                key: str(value) if key == 'client_id' and value is not None else value
+                for key, value in result.items()
+                if key in ('client_id', 'status', 'error', 'student_id', 'total_points', 'category')
+            }
+            for result in results
+        ]
+    })
+
+def _parse_action(action):
+    """Validate one queued action, raising ValueError with a message for the page."""
+    if not isinstance(action, dict):
+        raise ValueError('Invalid action')
+    try:
+        client_id = uuid.UUID(str(action.get('client_id')))
+    except ValueError:
+        raise ValueError('client_id must be a UUID')
+    if action.get('type') not in ('award', 'deduct'):
+        raise ValueError(f'Unknown action "{action.get("type")}"')
+    try:
+        points = abs(int(action.get('points')))
+        student_id = int(action.get('student_id'))
+        classroom_id = int(action.get('classroom_id'))
+    except (TypeError, ValueError):
+        raise ValueError('points, student_id and classroom_id must be numbers')
+    if points == 0:
+        raise ValueError('Points must not be zero')
+    return {
+        'client_id': client_id,
+        'status': None,
+        'student_id': student_id,
+        'classroom_id': classroom_id,
+        'points': points if action['type'] == 'award' else -points,
+        'reason': str(action.get('reason') or 'Unspecified'),
+    }
+
+@role_required(*TEACHER_ROLES)
 def teacher_settings(request):
-    if not request.user.groups.filter(name__in=["Teacher", "Staff"]).exists():
-        logger.warning(f"Unauthorized access attempt to teacher settings by {request.user.username}")
-        return redirect('login')
     
     try:
         teacher, created = Teacher.objects.get_or_create(
@@ -952,25 +1053,19 @@ def teacher_settings(request):
             'active_tab': request.GET.get('tab', 'profile')
         }
         
-        return render(request, "frontend/pages/SettingPageTeacher/index.html")
+        return render(request, "frontend/Pages/SettingPageTeacher/index.html")
     
     except Exception as e:
         logger.error(f"Error in teacher settings: {str(e)}")
         messages.error(request, f"An error occurred while loading settings: {str(e)}")
         return redirect('teacher_profile')
 
-@login_required
+@role_required(*TEACHER_ROLES)
 def teacher_faq(request):
-    if not request.user.groups.filter(name__in=["Teacher", "Staff"]).exists():
-        logger.warning(f"Unauthorized access attempt to teacher FAQ by {request.user.username}")
-        return redirect('login')
-    return render(request, "frontend/pages/FAQsTeacher/index.html")
+    return render(request, "frontend/Pages/FAQsTeacher/index.html")
 
-@login_required
+@role_required(*STUDENT_ROLES)
 def student_dash(request):
-    if not request.user.groups.filter(name="Student").exists():
-        logger.warning(f"Unauthorized access attempt to student dashboard by {request.user.username}")
-        return redirect('login')
     
     try:
         student = Student.objects.get(user=request.user)
@@ -995,13 +1090,10 @@ def student_dash(request):
         logger.error(f"Student profile not found for user {request.user.username}")
         context = {'error': 'Student profile not found'}
     
-    return render(request, "frontend/pages/StudentDashboard/index.html", context)
+    return render(request, "frontend/Pages/StudentDashboard/index.html", context)
 
-@login_required
+@role_required(*STUDENT_ROLES)
 def student_settings(request):
-    if not request.user.groups.filter(name="Student").exists():
-        logger.warning(f"Unauthorized access attempt to student settings by {request.user.username}")
-        return redirect('login')
     
     # Get or create student record
     student, created = Student.objects.get_or_create(user=request.user)
@@ -1074,16 +1166,16 @@ def student_settings(request):
             # Validate current password
             if not request.user.check_password(current_password):
                 messages.error(request, "Current password is incorrect.")
-                return render(request, "frontend/pages/SettingPageStudent/index.html", context)
+                return render(request, "frontend/Pages/SettingPageStudent/index.html", context)
                 
             # Validate new password
             if new_password != confirm_password:
                 messages.error(request, "New passwords don't match.")
-                return render(request, "frontend/pages/SettingPageStudent/index.html", context)
+                return render(request, "frontend/Pages/SettingPageStudent/index.html", context)
                 
             if len(new_password) < 8:
                 messages.error(request, "Password must be at least 8 characters long.")
-                return render(request, "frontend/pages/SettingPageStudent/index.html", context)
+                return render(request, "frontend/Pages/SettingPageStudent/index.html", context)
                 
             # Change password
             request.user.set_password(new_password)
@@ -1111,16 +1203,13 @@ def student_settings(request):
             # Just acknowledge the form submission without trying to save to non-existent fields
             messages.success(request, "Privacy settings saved!")
     
-    return render(request, "frontend/pages/SettingPageStudent/index.html", context)
+    return render(request, "frontend/Pages/SettingPageStudent/index.html", context)
 
-@login_required
+@role_required(*STUDENT_ROLES)
 def student_behavior_history(request):
     """
     View for student behavior history page
     """
-    if not request.user.groups.filter(name="Student").exists():
-        logger.warning(f"Unauthorized access attempt to behavior history by {request.user.username}")
-        return redirect('login')
     
     try:
         student = Student.objects.get(user=request.user)
@@ -1162,57 +1251,23 @@ def student_behavior_history(request):
         page_number = request.GET.get('page', 1)
         behaviors = paginator.get_page(page_number)
         
-        # Get statistics
-        total_points = Behavior.objects.filter(student=student).aggregate(total=Sum('points'))['total'] or 0
-        positive_count = Behavior.objects.filter(student=student, behavior_type='positive').count()
-        negative_count = Behavior.objects.filter(student=student, behavior_type='negative').count()
+        # Get statistics from the points ledger
+        summary = StudentPointsSummary.objects.filter(student=student).values(
+            'total', 'positive_count', 'negative_count'
+        ).first() or {}
+        total_points = summary.get('total', 0)
+        positive_count = summary.get('positive_count', 0)
+        negative_count = summary.get('negative_count', 0)
         
         # Get subjects for filter dropdown
         subjects = Subject.objects.all()
         
-        # Get chart data (last 6 months)
-        six_months_ago = datetime.now() - timedelta(days=180)
-        chart_data = []
-        
-        # Prepare chart data by month
-        for i in range(6):
-            month_start = six_months_ago + timedelta(days=30 * i)
-            month_end = six_months_ago + timedelta(days=30 * (i + 1))
-            
-            month_positive = Behavior.objects.filter(
-                student=student,
-                behavior_type='positive',
-                recorded_at__gte=month_start,
-                recorded_at__lt=month_end
-            ).aggregate(total=Sum('points'))['total'] or 0
-            
-            month_negative = abs(Behavior.objects.filter(
-                student=student,
-                behavior_type='negative',
-                recorded_at__gte=month_start,
-                recorded_at__lt=month_end
-            ).aggregate(total=Sum('points'))['total'] or 0)
-            
-            month_net = month_positive - month_negative
-            
-            chart_data.append({
-                'month': month_start.strftime('%b'),
-                'positive': month_positive,
-                'negative': month_negative,
-                'net': month_net
-            })
-        
-        # Calculate class rank based on total points
-        all_students = Student.objects.annotate(
-            total_points=Sum('behaviors__points')
-        ).order_by('-total_points')
+        # Get chart data (last 6 calendar months) in one grouped query
+        chart_start, chart_end = recent_months_range(6)
+        chart_data = monthly_points(BehaviorDailyRollup.objects.filter(student=student), chart_start, chart_end)
         
-        # Find current student's rank
-        rank = 1
-        for s in all_students:
-            if s.id == student.id:
-                break
-            rank += 1
+        # Rank the student school-wide against the points ledger
+        rank, cohort_size = student_rank(student.id)
         
         context = {
             'student': student,
@@ -1222,7 +1277,8 @@ def student_behavior_history(request):
             'positive_count': positive_count,
             'negative_count': negative_count,
             'rank': rank,
-            'chart_data': json.dumps(chart_data),
+            'percentile_rank': percentile_label(rank, cohort_size),
+            'chart_data': chart_data,
             'selected_subject': subject_id,
             'selected_type': behavior_type,
             'date_from': date_from,
@@ -1233,12 +1289,12 @@ def student_behavior_history(request):
         logger.error(f"Student profile not found for user {request.user.username}")
         context = {'error': 'Student profile not found'}
     
-    return render(request, "frontend/pages/BehaviorHistory/index.html", context)
+    return render(request, "frontend/Pages/BehaviorHistory/index.html", context)
 
 
 @login_required
 @require_POST
-def unassign_student(request):
+async def unassign_student(request):
     """Unassign a student from their seat."""
     try:
         data = json.loads(request.body)
@@ -1246,61 +1302,29 @@ def unassign_student(request):
         seating_plan_id = data.get('seating_plan_id')
         
         # Get the student and seating plan
-        student = Student.objects.get(id=student_id)
-        seating_plan = SeatingPlan.objects.get(id=seating_plan_id)
+        student = await Student.objects.select_related('user').aget(id=student_id)
+        seating_plan = await SeatingPlan.objects.select_related('classroom').aget(id=seating_plan_id)
         
         # Find and delete the seat assignment
-        seat_assignment = SeatAssignment.objects.filter(
+        deleted, _ = await SeatAssignment.objects.filter(
             seating_plan=seating_plan,
             student=student
-        ).first()
+        ).adelete()
         
-        if not seat_assignment:
+        if not deleted:
             return JsonResponse({
                 'success': False,
                 'error': 'Student is not assigned to any seat'
             })
         
-        # Delete the assignment
-        seat_assignment.delete()
-        
-        # Get student's behavior category for UI update
-        behaviors = Behavior.objects.filter(student=student)
-        total_points = sum(b.points for b in behaviors)
-        
-        # Calculate thresholds (similar to seating_plan view)
-        # Fix: Use the correct related name 'subjects' instead of 'studentsubject'
-        all_students = Student.objects.filter(
-            subjects__subject=seating_plan.classroom.subject
-        ).distinct()
-        
-        all_points = []
-        for s in all_students:
-            s_behaviors = Behavior.objects.filter(student=s)
-            s_points = sum(b.points for b in s_behaviors)
-            all_points.append(s_points)
-        
-        all_points.sort(reverse=True)
-        total_students = len(all_points)
-        
-        # Top 50%
-        green_threshold = all_points[int(total_students * 0.5) - 1] if total_students > 1 else 0
-        
-        # Next 25%
-        orange_threshold = all_points[int(total_students * 0.75) - 1] if total_students > 3 else 0
-        
-        # Determine category
-        if total_points >= green_threshold:
-            category = 'green-category'
-        elif total_points >= orange_threshold:
-            category = 'orange-category'
-        else:
-            category = 'red-category'
+        # Get student's card (with its behavior category) for the UI update
+        payload = await _seat_changed(seating_plan, student)
         
         return JsonResponse({
             'success': True,
             'message': f'Unassigned {student.user.get_full_name() or student.user.username} from their seat',
-            'category': category
+            'category': payload['category'],
+            'student': payload
         })
     except Exception as e:
         logger.error(f"Error unassigning student: {str(e)}")
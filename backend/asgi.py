@@ -3,6 +3,14 @@ ASGI config for backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve the site through this module (e.g. ``uvicorn backend.asgi:application``)
+to enable live seating plan updates; the event stream is long-lived and is
+turned away under WSGI, where pages fall back to updating only themselves.
+The seating plan's JSON endpoints (awarding and deducting points, student
+profiles, seat moves) are async views, so under ASGI a burst of clicks does
+not hold a worker thread per request; compare the two handlers with
+`manage.py bench_concurrency`.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,10 +44,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'authentication.middleware.RequestMetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'authentication.middleware.RoleMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -138,3 +141,82 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Testing
+# https://docs.djangoproject.com/en/5.1/topics/testing/advanced/#defining-a-test-runner
+#
+# The runner turns on QUERY_BUDGET_STRICT and swaps in a per-process cache.
+
+TEST_RUNNER = 'backend.test_runner.TestRunner'
+
+
+# Request instrumentation (authentication/middleware.py)
+# https://docs.djangoproject.com/en/5.1/topics/logging/
+
+# Most SQL queries each view may run (by URL name) with a cold cache and
+# a session whose roles must be resolved again, as on the first request
+# after login and every ROLES_TTL seconds after (authentication/roles.py).
+# Going over logs a warning, or fails the request under tests.
+QUERY_BUDGETS = {
+    'seatingPlan': 14,
+    'classroom_seating': 14,
+    'teacher_profile': 22,
+    'student_behavior_history': 19,
+    'get_student_profile': 8,
+    'award_points': 16,
+    'deduct_points': 16,
+    'bulk_award_points': 24,
+    'apply_behavior_actions': 24,
+    'update_seat_assignment': 12,
+    'unassign_student': 12,
+    'randomize_seating': 20,
+    'save_seating_plan': 12,
+    'restore_seating_plan': 24,
+    'graph_dataset': 12,
+}
+QUERY_BUDGET_STRICT = False
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'authentication.requests': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+#
+# Must be shared by every worker process. Cached roles, seat maps and
+# charts are invalidated by bumping generations kept in this cache
+# (authentication/caching.py); with a per-process cache such as Django's
+# default LocMemCache, only the worker that made a change would see the bump.
+# Set REDIS_URL (needs the redis package) when workers run on several hosts;
+# otherwise workers on one host share a file-based cache.
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_DIR', os.path.join(tempfile.gettempdir(), 'schoolproject-cache')),
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
@@ -0,0 +1,26 @@
+"""
+Test runner for `manage.py test` (settings.TEST_RUNNER).
+
+Runs the suite with a per-process cache, so tests never share the
+deployment's cache, with QUERY_BUDGET_STRICT on, so a view going over its
+query budget fails its test, and with the per-request log lines silenced.
+"""
+import logging
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.test_settings = override_settings(
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+            QUERY_BUDGET_STRICT=True,
+        )
+        self.test_settings.enable()
+        logging.getLogger('authentication.requests').setLevel(logging.WARNING)
+
+    def teardown_test_environment(self, **kwargs):
+        self.test_settings.disable()
+        super().teardown_test_environment(**kwargs)
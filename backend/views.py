@@ -3,10 +3,10 @@ from django.contrib.auth.models import User
 from django.contrib import messages
 
 def static_page(request, page):
-    return render(request, f'frontend/pages/{page}/index.html')
+    return render(request, f'frontend/Pages/{page}/index.html')
 
 def homepage(request):
-    return render(request, 'frontend/pages/AppLogin/index.html')  # AppLogin as main page
+    return render(request, 'frontend/Pages/AppLogin/index.html')  # AppLogin as main page
 
 # Needs to be fixed
 def register(request):
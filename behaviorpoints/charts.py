@@ -0,0 +1,59 @@
+"""
+Chart data for behavior points: positive, negative and net points per
+student for one classroom over a date range.
+
+The whole dataset is one grouped query over the daily rollups, so its cost
+follows the number of days in the range rather than the number of
+behaviors. It is cached per classroom and date range until a behavior
+changes the totals of any student in the classroom's subject.
+"""
+from django.core.cache import cache
+from django.db.models import Sum
+
+from authentication.caching import get_generation
+from authentication.models import BehaviorDailyRollup
+
+GRAPH_TIMEOUT = 60 * 60
+
+
+def points_by_student(classroom, start=None, end=None):
+    """
+    Return [{'student_id', 'student', 'positive', 'negative', 'net'}, ...]
+    for every student with behaviors in the classroom's subject between
+    start and end (dates, inclusive; None leaves that side open). 'negative'
+    is the number of points deducted, so net = positive - negative.
+    """
+    generation = get_generation('subject', classroom.subject_id)
+    cache_key = f'graph:classroom:{classroom.id}:{start}:{end}:{generation}'
+    dataset = cache.get(cache_key)
+    if dataset is None:
+        dataset = _compute_dataset(classroom.subject_id, start, end)
+        cache.set(cache_key, dataset, GRAPH_TIMEOUT)
+    return dataset
+
+
+def _compute_dataset(subject_id, start, end):
+    rollups = BehaviorDailyRollup.objects.filter(subject_id=subject_id)
+    if start is not None:
+        rollups = rollups.filter(day__gte=start)
+    if end is not None:
+        rollups = rollups.filter(day__lte=end)
+    rows = rollups.values(
+        'student_id', 'student__user__username', 'student__user__first_name', 'student__user__last_name',
+    ).annotate(
+        positive=Sum('positive_points'),
+        negative=Sum('negative_points'),
+    ).order_by('student__user__last_name', 'student__user__first_name', 'student_id')
+    return [
+        {
+            'student_id': row['student_id'],
+            'student': (
+                f"{row['student__user__first_name']} {row['student__user__last_name']}".strip()
+                or row['student__user__username']
+            ),
+            'positive': row['positive'],
+            'negative': -row['negative'],
+            'net': row['positive'] + row['negative'],
+        }
+        for row in rows
+    ]
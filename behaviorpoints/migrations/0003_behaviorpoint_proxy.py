@@ -0,0 +1,31 @@
+# Generated by Django 5.1.5 on 2026-10-18 19:10
+
+import authentication.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    # authentication.0010 copies every BehaviorPoint row into Behavior before the table goes
+    dependencies = [
+        ('authentication', '0010_behavior_events'),
+        ('behaviorpoints', '0002_alter_behaviorpoint_student_and_more'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='BehaviorPoint',
+        ),
+        migrations.CreateModel(
+            name='BehaviorPoint',
+            fields=[
+            ],
+            options={
+                'permissions': [('can_award_points', 'Can award behavior points')],
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=(authentication.models.LegacyBehaviorMixin, 'authentication.behavior'),
+        ),
+    ]
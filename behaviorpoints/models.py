@@ -1,25 +1,49 @@
 from django.db import models
-from django.contrib.auth.models import User
-
-class BehaviorPoint(models.Model):
-    student = models.ForeignKey(
-        User, 
-        on_delete=models.CASCADE, 
-        related_name='received_points',
-        limit_choices_to={'groups__name': 'Student'}
-    )
-    teacher = models.ForeignKey(
-        User, 
-        on_delete=models.CASCADE, 
-        related_name='given_points',
-        editable=False
-    )
-    points = models.IntegerField()
-    reason = models.CharField(max_length=255)
-    classroom = models.CharField(max_length=100)
-    timestamp = models.DateTimeField(auto_now_add=True)
+
+from authentication.models import Behavior, ClassRoom, LegacyBehaviorMixin, Student
+
+
+class BehaviorPointManager(models.Manager):
+    """
+    Accepts the old BehaviorPoint fields on create(): student as the
+    student's User (or student_id as a user id), reason for description,
+    and classroom as a classroom name, resolved among the teacher's own
+    classrooms first. A user without a Student profile raises ValueError.
+    """
+    def create(self, student=None, student_id=None, reason=None, classroom=None, **kwargs):
+        if isinstance(student, Student):
+            kwargs['student'] = student
+        elif student is not None or student_id is not None:
+            user_id = student.pk if student is not None else student_id
+            try:
+                kwargs['student'] = Student.objects.get(user_id=user_id)
+            except Student.DoesNotExist:
+                raise ValueError(f'User {user_id} is not a student') from None
+        if reason is not None:
+            kwargs.setdefault('description', reason)
+        if isinstance(classroom, str):
+            matches = ClassRoom.objects.filter(name=classroom).order_by('id')
+            teacher = kwargs.get('teacher')
+            kwargs['classroom'] = (teacher and matches.filter(teacher=teacher).first()) or matches.first()
+        elif classroom is not None:
+            kwargs['classroom'] = classroom
+        return super().create(**kwargs)
+
+
+class BehaviorPoint(LegacyBehaviorMixin, Behavior):
+    """Formerly its own table keyed on User; now a view of the canonical Behavior events."""
+    objects = BehaviorPointManager()
 
     class Meta:
+        proxy = True
         permissions = [
             ("can_award_points", "Can award behavior points"),
         ]
+
+    @property
+    def reason(self):
+        return self.description
+
+    @property
+    def timestamp(self):
+        return self.recorded_at
@@ -1,3 +1,70 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+
+from authentication.ledger import record_behaviors, refresh_students
+from authentication.models import Behavior
+from authentication.tests import create_classroom
+
+
+class GraphDatasetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher, self.classroom = create_classroom('graph', 3)
+        self.client.force_login(self.teacher)
+
+    def get(self, **params):
+        return self.client.get(reverse('graph_dataset'), {'classroom': self.classroom.id, **params})
+
+    def test_points_per_student_from_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('max-age=60', response['Cache-Control'])
+        self.assertIn('private', response['Cache-Control'])
+        grouped = [q['sql'] for q in queries.captured_queries if 'GROUP BY' in q['sql']]
+        self.assertEqual(len(grouped), 1)
+
+        rows = {row['student_id']: row for row in response.json()['graphData']}
+        for row in rows.values():
+            self.assertEqual(row['net'], row['positive'] - row['negative'])
+        expected = {
+            student_id: sum(Behavior.objects.filter(student_id=student_id).values_list('points', flat=True))
+            for student_id in rows
+        }
+        self.assertEqual({student_id: row['net'] for student_id, row in rows.items()}, expected)
+
+    def test_cached_per_scope_until_a_behavior_changes(self):
+        first = self.get().json()['graphData']
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.get().json()['graphData'], first)
+        self.assertFalse([q for q in queries.captured_queries if 'GROUP BY' in q['sql']])
+
+        student_id = first[0]['student_id']
+        with self.captureOnCommitCallbacks(execute=True):
+            record_behaviors([Behavior.objects.create(
+                student_id=student_id, subject=self.classroom.subject, behavior_type='negative',
+                description='Late', points=-4, recorded_by='Test Teacher',
+            )])
+        row = next(row for row in self.get().json()['graphData'] if row['student_id'] == student_id)
+        self.assertEqual(row['negative'], first[0]['negative'] + 4)
+
+    def test_date_range(self):
+        behaviors = Behavior.objects.filter(subject=self.classroom.subject)
+        behaviors.update(recorded_at=datetime(2024, 5, 1, 12, tzinfo=dt_timezone.utc))
+        refresh_students(behaviors.values_list('student_id', flat=True))
+        self.assertEqual(self.get(start='2024-05-02').json()['graphData'], [])
+        self.assertEqual(len(self.get(start='2024-05-01', end='2024-05-01').json()['graphData']), 3)
+        self.assertEqual(self.get(start='May').status_code, 400)
 
-# Create your tests here.
+    def test_other_teachers_classrooms_are_hidden(self):
+        other, _ = create_classroom('graph_other', 1)
+        self.client.force_login(other)
+        self.assertEqual(self.get().status_code, 404)
+        self.client.force_login(User.objects.create(username='graph_nobody'))
+        self.assertEqual(self.get().status_code, 403)
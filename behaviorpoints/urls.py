@@ -3,4 +3,5 @@ from . import views
 
 urlpatterns = [
     path('award/', views.award_point, name='award_point'),
+    path('graph/', views.graph_dataset, name='graph_dataset'),
 ] 
\ No newline at end of file
@@ -1,10 +1,19 @@
 from django.shortcuts import render
 from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required, permission_required
-from django.views.decorators.http import require_http_methods
+from django.utils.dateparse import parse_date
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import require_GET, require_http_methods
 import json
+
+from authentication.models import ClassRoom
+from authentication.roles import TEACHER_ROLES, role_required
+from .charts import points_by_student
 from .models import BehaviorPoint
 
+# Browsers may reuse a chart for this long; the server-side copy is invalidated on every behavior change
+GRAPH_MAX_AGE = 60
+
 # Create your views here.
 
 @login_required
@@ -21,21 +30,40 @@ def award_point(request):
     )
     return JsonResponse({'status': 'success'})
 
-@login_required
-def graphDataset(request):
-    students = users.objects.filter(behaviourpoints__isnull=False).distinct()
-    data = []
-    for student in students:
-        posPoints = BehaviorPoint.objects.filter(student=student, points__gt=0).aggregate(TOTAL = Sum('points'))['total']
-        negPoints = BehaviorPoint.objects.filter('points' < 0).aggregate(TOTAL = Sum('points'))['total']
-        data.append({
-            'student': student.username,
-            'positive': posPoints,
-            'negative': negPoints,
-            'net': posPoints - negPoints,
-        })
-    
-    context = {
-        'graphData': json.dumps(data)
-    }
-    return render(request, 'index.html', data)
+@role_required(*TEACHER_ROLES, raise_exception=True)
+@require_GET
+@cache_control(private=True, max_age=GRAPH_MAX_AGE)
+def graph_dataset(request):
+    """
+    Return positive/negative/net points per student for ?classroom= as JSON,
+    optionally limited to ?start=/?end= (YYYY-MM-DD, inclusive). Teachers
+    chart their own classrooms; staff chart any.
+    """
+    try:
+        classroom_id = int(request.GET['classroom'])
+        start, end = (_parse_date(request.GET.get(name)) for name in ('start', 'end'))
+    except KeyError:
+        return JsonResponse({'success': False, 'error': 'classroom is required'}, status=400)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    classrooms = ClassRoom.objects.all() if 'Staff' in request.roles else ClassRoom.objects.filter(teacher=request.user)
+    classroom = classrooms.filter(id=classroom_id).first()
+    if classroom is None:
+        return JsonResponse({'success': False, 'error': 'Classroom not found'}, status=404)
+
+    return JsonResponse({
+        'success': True,
+        'classroom': {'id': classroom.id, 'name': classroom.name},
+        'start': start.isoformat() if start else None,
+        'end': end.isoformat() if end else None,
+        'graphData': points_by_student(classroom, start, end),
+    })
+
+def _parse_date(value):
+    if not value:
+        return None
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(f'Invalid date: {value} (expected YYYY-MM-DD)')
+    return parsed
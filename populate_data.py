@@ -3,6 +3,7 @@ import random
 from django.contrib.auth.models import User, Group
 from django.utils import timezone
 from datetime import timedelta, date
+from authentication.ledger import refresh_students
 from authentication.models import Teacher, Student, ClassRoom, Behavior, Subject, StudentSubject, SeatingPlan, SeatAssignment
 
 def run():
@@ -224,6 +225,9 @@ def run():
             recorded_at=record_date
         )
     
+    # Bring the points summaries and daily rollups in line with the new behaviors
+    refresh_students([student.id for student in students])
+    
     # Create seating plans for each classroom
     print("Creating seating plans...")
     for classroom in classrooms: